@@ -1,12 +1,19 @@
 """API Router configuration."""
 from rest_framework.routers import DefaultRouter, SimpleRouter
 from django.conf import settings
+from django.urls import path
 
 from my_garage.api.views import (
     VehicleViewSet,
     ServiceRecordViewSet,
     UpgradeViewSet,
     ConditionReportViewSet,
+    UploadSessionViewSet,
+    SearchView,
+    BatchView,
+    GarageValuationView,
+    VinDecodeView,
+    event_stream,
 )
 
 # Use DefaultRouter for development (browsable API), SimpleRouter for production
@@ -17,5 +24,12 @@ router.register("vehicles", VehicleViewSet)
 router.register("service-records", ServiceRecordViewSet)
 router.register("upgrades", UpgradeViewSet)
 router.register("condition-reports", ConditionReportViewSet)
+router.register("uploads", UploadSessionViewSet)
 
-urlpatterns = router.urls
+urlpatterns = [
+    path("batch/", BatchView.as_view(), name="batch"),
+    path("events/", event_stream, name="events"),
+    path("search/", SearchView.as_view(), name="search"),
+    path("valuations/", GarageValuationView.as_view(), name="valuations"),
+    path("vins/decode/", VinDecodeView.as_view(), name="vin-decode"),
+] + router.urls
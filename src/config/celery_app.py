@@ -2,7 +2,7 @@
 import os
 import sys
 from pathlib import Path
-from celery import Celery
+from celery import Celery, signals
 
 # Add src to python path
 BASE_DIR = Path(__file__).resolve().parent.parent
@@ -11,6 +11,12 @@ sys.path.append(str(BASE_DIR / 'src'))
 # Set default Django settings module
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'config.settings.local')
 
+# Celery's Django fixup runs the system checks at worker start, which imports
+# the URLconf and with it every view, serializer and their dependencies that a
+# worker never uses. Checks run at deploy time (migrate); set
+# CELERY_SKIP_CHECKS= (empty) to run them in workers too.
+os.environ.setdefault('CELERY_SKIP_CHECKS', 'true')
+
 app = Celery('my_garage')
 
 # Load config from Django settings with CELERY_ prefix
@@ -20,6 +26,14 @@ app.config_from_object('django.conf:settings', namespace='CELERY')
 app.autodiscover_tasks()
 
 
+@signals.worker_init.connect
+def use_worker_database_connections(**kwargs):
+    """Workers keep connections longer than web processes (WORKER_DATABASE_CONNECTION)."""
+    from django.conf import settings
+    from my_garage.utils.db import apply_connection_settings
+    apply_connection_settings(settings.WORKER_DATABASE_CONNECTION)
+
+
 @app.task(bind=True)
 def debug_task(self):
     """Debug task to test Celery."""
@@ -1,8 +1,10 @@
 """Base settings shared across all environments."""
 import os
 import sys
+from datetime import timedelta
 from pathlib import Path
 from celery.schedules import crontab
+from kombu import Queue
 
 # Build paths
 # BASE_DIR is now the root of the project (containing src, manage.py, etc.)
@@ -35,11 +37,13 @@ INSTALLED_APPS = [
 
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
+    'my_garage.utils.staticfiles.StaticFilesMiddleware',
     'corsheaders.middleware.CorsMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'my_garage.utils.routing.ReplicaRoutingMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
@@ -64,7 +68,35 @@ TEMPLATES = [
 
 WSGI_APPLICATION = 'config.wsgi.application'
 
-# Database
+# Database connections are reused rather than opened per request or task.
+# <prefix>_CONN_MAX_AGE is how long (seconds) a connection is kept, checked
+# before each reuse. Setting <prefix>_POOL_MAX_SIZE switches to a psycopg 3
+# pool instead (pip install my-garage[pool]). Web processes read the DB_
+# variables; Celery workers read WORKER_DB_ ones (applied in config.celery_app).
+# Pools are per process: prefer them with thread or solo worker pools.
+def _connection_settings(prefix: str, default_max_age: int) -> dict:
+    pool_max_size = int(os.environ.get(f'{prefix}_POOL_MAX_SIZE', '0'))
+    if pool_max_size:
+        # The pool hands out checked connections and Django refuses CONN_MAX_AGE with it
+        return {
+            'CONN_MAX_AGE': 0,
+            'CONN_HEALTH_CHECKS': False,
+            'OPTIONS': {'pool': {
+                'min_size': int(os.environ.get(f'{prefix}_POOL_MIN_SIZE', '1')),
+                'max_size': pool_max_size,
+                'timeout': float(os.environ.get(f'{prefix}_POOL_TIMEOUT', '10')),
+            }},
+        }
+    return {
+        'CONN_MAX_AGE': int(os.environ.get(f'{prefix}_CONN_MAX_AGE', str(default_max_age))),
+        'CONN_HEALTH_CHECKS': True,
+        'OPTIONS': {},
+    }
+
+
+DATABASE_CONNECTION = _connection_settings('DB', default_max_age=60)
+WORKER_DATABASE_CONNECTION = _connection_settings('WORKER_DB', default_max_age=600)
+
 DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.postgresql',
@@ -73,9 +105,25 @@ DATABASES = {
         'PASSWORD': os.environ.get('DB_PASSWORD', 'postgres'),
         'HOST': os.environ.get('DB_HOST', 'localhost'),
         'PORT': os.environ.get('DB_PORT', '5432'),
+        **DATABASE_CONNECTION,
     }
 }
 
+# Read replicas (my_garage.utils.routing): one alias per host in
+# DB_REPLICA_HOSTS, same credentials as the primary. Only @replica_read
+# selectors and replica_reads() blocks in web requests use them, and only while
+# no more than REPLICA_MAX_LAG_SECONDS behind (measured every
+# REPLICA_LAG_CHECK_INTERVAL seconds). A user who writes reads from the primary
+# for the next REPLICA_PIN_SECONDS.
+REPLICA_DATABASES = []
+for _number, _host in enumerate(filter(None, os.environ.get('DB_REPLICA_HOSTS', '').split(',')), start=1):
+    DATABASES[f'replica{_number}'] = {**DATABASES['default'], 'HOST': _host.strip(), 'TEST': {'MIRROR': 'default'}}
+    REPLICA_DATABASES.append(f'replica{_number}')
+DATABASE_ROUTERS = ['my_garage.utils.routing.ReplicaRouter']
+REPLICA_MAX_LAG_SECONDS = float(os.environ.get('REPLICA_MAX_LAG_SECONDS', '5'))
+REPLICA_LAG_CHECK_INTERVAL = float(os.environ.get('REPLICA_LAG_CHECK_INTERVAL', '5'))
+REPLICA_PIN_SECONDS = int(os.environ.get('REPLICA_PIN_SECONDS', '15'))
+
 # Password validation
 AUTH_PASSWORD_VALIDATORS = [
     {'NAME': 'django.contrib.auth.password_validation.UserAttributeSimilarityValidator'},
@@ -94,11 +142,35 @@ USE_TZ = True
 STATIC_URL = '/static/'
 STATIC_ROOT = BASE_DIR / 'staticfiles'
 STATICFILES_DIRS = [BASE_DIR / 'static']
+# collectstatic writes content-hashed, precompressed copies that the app
+# serves itself (my_garage.utils.staticfiles); hashed names are cached for a
+# year, the unhashed ones for STATIC_MAX_AGE seconds
+STATIC_MAX_AGE = int(os.environ.get('STATIC_MAX_AGE', '60'))
 
 # Media files (User uploads)
 MEDIA_URL = '/media/'
 MEDIA_ROOT = BASE_DIR / 'media'
 
+# MEDIA_STORAGE=s3 keeps media in an S3-compatible bucket (my_garage.utils.storage):
+# clients upload with presigned POSTs and OCR fetches objects by presigned URL.
+# Set AWS_S3_ENDPOINT_URL for MinIO; credentials come from the usual AWS_* variables.
+MEDIA_STORAGE = os.environ.get('MEDIA_STORAGE', 'filesystem')
+STORAGES = {
+    'default': {'BACKEND': 'django.core.files.storage.FileSystemStorage'},
+    'staticfiles': {'BACKEND': 'my_garage.utils.staticfiles.CompressedManifestStaticFilesStorage'},
+}
+if MEDIA_STORAGE == 's3':
+    STORAGES['default'] = {
+        'BACKEND': 'my_garage.utils.storage.S3MediaStorage',
+        'OPTIONS': {
+            'bucket_name': os.environ.get('AWS_STORAGE_BUCKET_NAME'),
+            'endpoint_url': os.environ.get('AWS_S3_ENDPOINT_URL'),
+            'region_name': os.environ.get('AWS_S3_REGION_NAME'),
+            'location': os.environ.get('AWS_S3_MEDIA_LOCATION', 'media'),
+            'querystring_expire': int(os.environ.get('AWS_QUERYSTRING_EXPIRE', '3600')),
+        },
+    }
+
 # Default primary key field type
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
@@ -114,6 +186,14 @@ REST_FRAMEWORK = {
     'PAGE_SIZE': 20,
 }
 
+# Cache (Redis) - also holds valuation enqueue locks
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+        'LOCATION': os.environ.get('CACHE_URL', 'redis://localhost:6379/1'),
+    }
+}
+
 # Celery Configuration
 CELERY_BROKER_URL = os.environ.get('CELERY_BROKER_URL', 'redis://localhost:6379/0')
 CELERY_RESULT_BACKEND = os.environ.get('CELERY_RESULT_BACKEND', 'redis://localhost:6379/0')
@@ -122,13 +202,157 @@ CELERY_TASK_SERIALIZER = 'json'
 CELERY_RESULT_SERIALIZER = 'json'
 CELERY_TIMEZONE = TIME_ZONE
 
+# Queues: user-facing work (OCR a user is waiting on, manual refreshes) never
+# sits behind the weekly bulk fan-out. Run separate workers per queue, e.g.
+#   celery -A config.celery_app worker -Q interactive,default
+#   celery -A config.celery_app worker -Q bulk
+CELERY_TASK_DEFAULT_QUEUE = 'default'
+CELERY_TASK_QUEUES = (
+    Queue('default'),
+    Queue('interactive'),
+    Queue('bulk'),
+)
+CELERY_TASK_ROUTES = {
+    'my_garage.tasks.task_process_receipt_ocr': {'queue': 'interactive'},
+    'my_garage.tasks.task_process_receipt_ocr_batch': {'queue': 'interactive'},
+    'my_garage.update_valuation': {'queue': 'interactive'},
+    'my_garage.bulk_refresh': {'queue': 'bulk'},
+    'my_garage.tasks.task_complete_upload': {'queue': 'interactive'},
+    'my_garage.purge_uploads': {'queue': 'bulk'},
+    'my_garage.poll_part_prices': {'queue': 'bulk'},
+}
+
+# Priorities within a queue. On the Redis broker 0 is the highest priority, and
+# messages without one count as 0, hence the explicit middle default.
+TASK_PRIORITY_INTERACTIVE = 0
+TASK_PRIORITY_BULK = 9
+CELERY_TASK_DEFAULT_PRIORITY = 5
+CELERY_BROKER_TRANSPORT_OPTIONS = {
+    'priority_steps': list(range(10)),
+    'sep': ':',
+    'queue_order_strategy': 'priority',
+}
+# Don't let one worker prefetch a pile of bulk messages ahead of urgent ones
+CELERY_WORKER_PREFETCH_MULTIPLIER = 1
+
 # Celery Beat Schedule
 CELERY_BEAT_SCHEDULE = {
     "bulk_valuation_refresh": {
-        "task": "my_garage.tasks.task_bulk_valuation_refresh",
+        "task": "my_garage.bulk_refresh",
         "schedule": crontab(hour=3, minute=0, day_of_week=1),  # Every Monday at 3 AM
     },
+    "purge_abandoned_uploads": {
+        "task": "my_garage.purge_uploads",
+        "schedule": crontab(hour=4, minute=0),  # Every day at 4 AM
+    },
+    "poll_part_prices": {
+        "task": "my_garage.poll_part_prices",
+        "schedule": crontab(minute='*/10'),  # Only parts that are due are polled
+    },
 }
 
 # FastAPI Service URL (separate service)
 FASTAPI_BASE_URL = os.environ.get('FASTAPI_BASE_URL', 'http://localhost:8001')
+
+# Valuation refresh: how long an enqueued/in-flight valuation blocks duplicates,
+# and how recent a valuation must be for the weekly bulk refresh to skip it
+VALUATION_ENQUEUE_LOCK_TTL = int(os.environ.get('VALUATION_ENQUEUE_LOCK_TTL', str(60 * 60)))
+VALUATION_FRESHNESS_WINDOW = timedelta(hours=int(os.environ.get('VALUATION_FRESHNESS_HOURS', '72')))
+
+# Garage valuation engine (my_garage.utils.valuation). Condition moves value
+# by `condition_weights[area]` of the market value per grade point above or
+# below `reference_grade`; installed upgrades add `upgrade_retention[buyer][category]`
+# of their cost (negative: the buyer pays less for a modified car).
+VALUATION_MODEL = {
+    'reference_grade': 7.0,
+    'condition_weights': {'EXTERIOR': 0.03, 'INTERIOR': 0.02, 'ENGINE': 0.04, 'WHEELS': 0.01},
+    'upgrade_retention': {
+        'enthusiast': {
+            'ENGINE': 0.35, 'DRIVETRAIN': 0.3, 'SUSPENSION': 0.4, 'BRAKES': 0.45, 'WHEELS': 0.5,
+            'EXTERIOR': 0.2, 'INTERIOR': 0.3, 'ELECTRONICS': 0.15, 'OTHER': 0.2,
+        },
+        'purist': {
+            'ENGINE': -0.2, 'DRIVETRAIN': -0.15, 'SUSPENSION': -0.05, 'BRAKES': 0.1, 'WHEELS': 0.0,
+            'EXTERIOR': -0.1, 'INTERIOR': 0.0, 'ELECTRONICS': -0.05, 'OTHER': 0.0,
+        },
+    },
+}
+# What-if scenarios: a market-wide price multiplier and the kind of buyer
+VALUATION_SCENARIOS = {
+    'baseline': {'market': 1.0, 'buyer': 'enthusiast'},
+    'purist_buyer': {'market': 1.0, 'buyer': 'purist'},
+    'market_down_10': {'market': 0.9, 'buyer': 'enthusiast'},
+    'market_up_10': {'market': 1.1, 'buyer': 'enthusiast'},
+}
+
+# Token buckets guarding the FastAPI services, per worker process: `rate`
+# requests/second refilling up to `burst`. Remove an entry to disable its limit.
+EXTERNAL_SERVICE_RATE_LIMITS = {
+    'ocr': {
+        'rate': float(os.environ.get('OCR_RATE_LIMIT', '10')),
+        'burst': float(os.environ.get('OCR_RATE_BURST', '20')),
+    },
+    'mcp': {
+        'rate': float(os.environ.get('MCP_RATE_LIMIT', '5')),
+        'burst': float(os.environ.get('MCP_RATE_BURST', '10')),
+    },
+}
+# Longest a task sleeps for a token before retrying later instead
+RATE_LIMIT_MAX_WAIT = 2.0
+
+# Receipts sent per request to the batch OCR endpoint
+OCR_BATCH_SIZE = int(os.environ.get('OCR_BATCH_SIZE', '16'))
+
+# Resumable uploads (my_garage.utils.uploads). Chunks are staged here, outside
+# MEDIA_ROOT, until the upload is finalized; unfinished uploads idle for
+# UPLOAD_SESSION_TTL are purged daily.
+UPLOAD_STAGING_DIR = Path(os.environ.get('UPLOAD_STAGING_DIR', BASE_DIR / 'upload_staging'))
+UPLOAD_MAX_SIZE = int(os.environ.get('UPLOAD_MAX_SIZE', str(50 * 1024 * 1024)))
+UPLOAD_MAX_CHUNK_SIZE = int(os.environ.get('UPLOAD_MAX_CHUNK_SIZE', str(5 * 1024 * 1024)))
+UPLOAD_SESSION_TTL = timedelta(hours=int(os.environ.get('UPLOAD_SESSION_TTL_HOURS', '24')))
+
+# Wishlist price tracking: each distinct part is polled every check interval,
+# which halves when its price changes and grows by half while it holds, within
+# these bounds. Parts are priced PART_PRICE_BATCH_SIZE per MCP call.
+PART_PRICE_INITIAL_INTERVAL = timedelta(hours=int(os.environ.get('PART_PRICE_INITIAL_HOURS', '24')))
+PART_PRICE_MIN_INTERVAL = timedelta(hours=int(os.environ.get('PART_PRICE_MIN_HOURS', '1')))
+PART_PRICE_MAX_INTERVAL = timedelta(hours=int(os.environ.get('PART_PRICE_MAX_HOURS', str(7 * 24))))
+PART_PRICE_BATCH_SIZE = int(os.environ.get('PART_PRICE_BATCH_SIZE', '50'))
+PART_PRICE_POLL_LIMIT = int(os.environ.get('PART_PRICE_POLL_LIMIT', '5000'))
+
+# Admin changelists on PostgreSQL show the planner's row estimate instead of an
+# exact COUNT(*) once it reaches this many rows (my_garage.utils.pagination)
+ADMIN_EXACT_COUNT_THRESHOLD = int(os.environ.get('ADMIN_EXACT_COUNT_THRESHOLD', '100000'))
+
+# Offline VIN decoding (my_garage.utils.vin): the WMI/VDS dataset, the index
+# compiled from it on first use, and the most VINs one API request may decode
+VIN_DATASET_PATH = Path(os.environ.get('VIN_DATASET_PATH', BASE_DIR / 'src' / 'my_garage' / 'data' / 'vin_patterns.csv'))
+VIN_INDEX_PATH = Path(os.environ.get('VIN_INDEX_PATH', BASE_DIR / 'vin_index.bin'))
+VIN_DECODE_BATCH_MAX = int(os.environ.get('VIN_DECODE_BATCH_MAX', '5000'))
+
+# Comparable-listings warehouse: valuations read MarketListing rows and only
+# ask the Web MCP agent for model years not fetched within MARKET_COHORT_TTL.
+# Trim and a +/- MARKET_MILEAGE_BAND mileage window narrow the comparables
+# while at least MARKET_MIN_COMPARABLES remain.
+MARKET_COHORT_TTL = timedelta(hours=int(os.environ.get('MARKET_COHORT_TTL_HOURS', '72')))
+MARKET_MIN_COMPARABLES = int(os.environ.get('MARKET_MIN_COMPARABLES', '5'))
+MARKET_MILEAGE_BAND = int(os.environ.get('MARKET_MILEAGE_BAND', '30000'))
+
+# Most operations one POST /api/batch/ may carry
+BATCH_MAX_OPERATIONS = int(os.environ.get('BATCH_MAX_OPERATIONS', '100'))
+
+# Server-sent events (my_garage.utils.events): Redis pub/sub between
+# processes; streams send a keep-alive comment when idle and are ended
+# after EVENTS_STREAM_MAX_SECONDS, after which clients reconnect.
+EVENTS_BACKEND = os.environ.get('EVENTS_BACKEND', 'redis')
+EVENTS_REDIS_URL = os.environ.get('EVENTS_REDIS_URL', 'redis://localhost:6379/0')
+EVENTS_KEEPALIVE_SECONDS = float(os.environ.get('EVENTS_KEEPALIVE_SECONDS', '15'))
+EVENTS_STREAM_MAX_SECONDS = float(os.environ.get('EVENTS_STREAM_MAX_SECONDS', '3600'))
+EVENTS_RETRY_MS = int(os.environ.get('EVENTS_RETRY_MS', '3000'))
+
+# Cached template fragments on the dashboard and vehicle pages are keyed on a
+# per-vehicle change stamp, so edits show at once and the timeout only bounds
+# how long unused fragments are kept. Change FRAGMENT_CACHE_VERSION (e.g. to
+# the release) when deploying template changes.
+FRAGMENT_CACHE_TIMEOUT = int(os.environ.get('FRAGMENT_CACHE_TIMEOUT', str(24 * 3600)))
+FRAGMENT_CACHE_VERSION = os.environ.get('FRAGMENT_CACHE_VERSION', '1')
@@ -12,10 +12,20 @@ DATABASES = {
         'NAME': BASE_DIR / 'db.sqlite3',
     }
 }
+# A second connection to the same file stands in for a read replica
+DATABASES['replica'] = {**DATABASES['default'], 'TEST': {'MIRROR': 'default'}}
+REPLICA_DATABASES = ['replica']
 
 # CORS for development
 CORS_ALLOW_ALL_ORIGINS = True
 
+# In-process cache instead of Redis
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    }
+}
+
 # Celery - Use eager for development (synchronous)
 CELERY_TASK_ALWAYS_EAGER = True
 CELERY_TASK_EAGER_PROPAGATES = True
@@ -64,3 +64,14 @@ LOGGING = {
         },
     },
 }
+
+# Compiled templates are kept for the life of the process. Django already
+# does this when no loaders are configured; spelling it out keeps it that
+# way if the loaders are ever customised.
+TEMPLATES[0]['APP_DIRS'] = False
+TEMPLATES[0]['OPTIONS']['loaders'] = [
+    ('django.template.loaders.cached.Loader', [
+        'django.template.loaders.filesystem.Loader',
+        'django.template.loaders.app_directories.Loader',
+    ]),
+]
@@ -1,4 +1,6 @@
 """Test settings."""
+import tempfile
+
 from .base import *
 
 DEBUG = True
@@ -8,8 +10,15 @@ DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.sqlite3',
         'NAME': ':memory:',
-    }
+    },
+    # Shares the test database; routing tests enable it through REPLICA_DATABASES
+    'replica': {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': ':memory:',
+        'TEST': {'MIRROR': 'default'},
+    },
 }
+REPLICA_DATABASES = []
 
 # Disable migrations for faster tests
 class DisableMigrations:
@@ -26,9 +35,28 @@ PASSWORD_HASHERS = [
     'django.contrib.auth.hashers.MD5PasswordHasher',
 ]
 
+# In-process cache instead of Redis
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    }
+}
+
 # Celery - Always eager in tests
 CELERY_TASK_ALWAYS_EAGER = True
 CELERY_TASK_EAGER_PROPAGATES = True
 
 # Email backend for tests
 EMAIL_BACKEND = 'django.core.mail.backends.locmem.EmailBackend'
+
+# External services are stubbed in tests; rate limiting is tested explicitly
+EXTERNAL_SERVICE_RATE_LIMITS = {}
+
+# Keep the compiled VIN index out of the source tree
+VIN_INDEX_PATH = Path(tempfile.gettempdir()) / 'my_garage_test_vin_index.bin'
+
+# Server-sent events stay in-process
+EVENTS_BACKEND = 'memory'
+
+# The test runner sets DEBUG = False, and tests don't run collectstatic
+STORAGES = {**STORAGES, 'staticfiles': {'BACKEND': 'django.contrib.staticfiles.storage.StaticFilesStorage'}}
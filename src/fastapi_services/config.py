@@ -0,0 +1,103 @@
+"""
+Runtime configuration for the FastAPI stand-in services.
+
+Everything is read from environment variables so the same app can be started
+with different latency/error/payload profiles for load tests, e.g.::
+
+    STANDIN_OCR_LATENCY_MS=800 STANDIN_ERROR_RATE=0.02 pixi run fastapi
+"""
+import os
+from dataclasses import dataclass, field
+from functools import lru_cache
+from typing import Tuple
+
+
+def _env_float(name: str, default: float) -> float:
+    return float(os.environ.get(name, default))
+
+
+def _env_int(name: str, default: int) -> int:
+    return int(os.environ.get(name, default))
+
+
+def _env_list(name: str, default: str) -> Tuple[str, ...]:
+    return tuple(item.strip() for item in os.environ.get(name, default).split(',') if item.strip())
+
+
+@dataclass(frozen=True)
+class EndpointProfile:
+    """Simulated behaviour of a single endpoint."""
+    latency_ms: float = 0.0
+    jitter_ms: float = 0.0
+    error_rate: float = 0.0
+
+
+@dataclass(frozen=True)
+class ServiceSettings:
+    """Tunable knobs for the stand-in services."""
+    ocr: EndpointProfile = field(default_factory=EndpointProfile)
+    mcp: EndpointProfile = field(default_factory=EndpointProfile)
+
+    # Synthetic payload sizes (listings are per marketplace source)
+    receipt_line_items: int = 6
+    listings_per_search: int = 25
+
+    # OCR compute: worker processes (0 = thread pool), simulated hash rounds per image,
+    # and the most images accepted by one batch request
+    ocr_workers: int = 0
+    ocr_cpu_rounds: int = 0
+    ocr_max_batch: int = 64
+    # Receipts read from object storage: download timeout in seconds and size cap
+    ocr_fetch_timeout: float = 10.0
+    ocr_max_object_bytes: int = 50 * 1024 * 1024
+
+    # Market search: synthetic marketplaces, extra fixture files (bundled name or path),
+    # per-source timeout in seconds and the LRU+TTL result cache
+    mcp_sources: Tuple[str, ...] = ("bringatrailer.com", "carsandbids.com", "ebay.com/motors", "hemmings.com")
+    mcp_fixtures: Tuple[str, ...] = ()
+    mcp_source_timeout: float = 5.0
+    mcp_cache_size: int = 1024
+    mcp_cache_ttl: float = 900.0
+    mcp_partial_cache_ttl: float = 60.0
+    # Most parts priced by one search_part_prices call
+    mcp_max_parts: int = 200
+
+    # Requests processed concurrently before answering 503 (0 disables the limit)
+    max_inflight: int = 0
+
+    # Seed for synthetic data; responses are deterministic per request input
+    seed: int = 0
+
+
+def _profile(prefix: str) -> EndpointProfile:
+    """Reads STANDIN_<PREFIX>_* with STANDIN_* fallbacks."""
+    return EndpointProfile(
+        latency_ms=_env_float(f"STANDIN_{prefix}_LATENCY_MS", _env_float('STANDIN_LATENCY_MS', 0)),
+        jitter_ms=_env_float(f"STANDIN_{prefix}_JITTER_MS", _env_float('STANDIN_JITTER_MS', 0)),
+        error_rate=_env_float(f"STANDIN_{prefix}_ERROR_RATE", _env_float('STANDIN_ERROR_RATE', 0)),
+    )
+
+
+@lru_cache(maxsize=1)
+def get_settings() -> ServiceSettings:
+    """Returns settings loaded from the environment (cached for the process)."""
+    return ServiceSettings(
+        ocr=_profile('OCR'),
+        mcp=_profile('MCP'),
+        receipt_line_items=_env_int('STANDIN_RECEIPT_LINE_ITEMS', 6),
+        listings_per_search=_env_int('STANDIN_LISTINGS_PER_SEARCH', 25),
+        ocr_workers=_env_int('STANDIN_OCR_WORKERS', os.cpu_count() or 1),
+        ocr_cpu_rounds=_env_int('STANDIN_OCR_CPU_ROUNDS', 0),
+        ocr_max_batch=_env_int('STANDIN_OCR_MAX_BATCH', 64),
+        ocr_fetch_timeout=_env_float('STANDIN_OCR_FETCH_TIMEOUT_S', 10.0),
+        ocr_max_object_bytes=_env_int('STANDIN_OCR_MAX_OBJECT_BYTES', 50 * 1024 * 1024),
+        mcp_sources=_env_list('STANDIN_MCP_SOURCES', ','.join(ServiceSettings.mcp_sources)),
+        mcp_fixtures=_env_list('STANDIN_MCP_FIXTURES', ''),
+        mcp_source_timeout=_env_float('STANDIN_MCP_SOURCE_TIMEOUT_S', 5.0),
+        mcp_cache_size=_env_int('STANDIN_MCP_CACHE_SIZE', 1024),
+        mcp_cache_ttl=_env_float('STANDIN_MCP_CACHE_TTL_S', 900.0),
+        mcp_partial_cache_ttl=_env_float('STANDIN_MCP_PARTIAL_CACHE_TTL_S', 60.0),
+        mcp_max_parts=_env_int('STANDIN_MCP_MAX_PARTS', 200),
+        max_inflight=_env_int('STANDIN_MAX_INFLIGHT', 0),
+        seed=_env_int('STANDIN_SEED', 0),
+    )
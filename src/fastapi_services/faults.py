@@ -0,0 +1,67 @@
+"""Latency, error and backpressure simulation for the stand-in services."""
+import asyncio
+import json
+import random
+
+from fastapi import HTTPException
+
+from .config import EndpointProfile
+
+
+async def simulate_latency(profile: EndpointProfile) -> None:
+    """Sleeps for the configured latency (plus gaussian jitter)."""
+    delay_ms = profile.latency_ms
+    if profile.jitter_ms:
+        delay_ms = max(0.0, random.gauss(delay_ms, profile.jitter_ms))
+    if delay_ms:
+        await asyncio.sleep(delay_ms / 1000)
+
+
+def roll_failure(profile: EndpointProfile) -> bool:
+    """True with probability `profile.error_rate`."""
+    return bool(profile.error_rate) and random.random() < profile.error_rate
+
+
+async def simulate_endpoint(profile: EndpointProfile) -> None:
+    """Sleeps for the configured latency and randomly fails at the configured error rate."""
+    await simulate_latency(profile)
+    if roll_failure(profile):
+        raise HTTPException(status_code=500, detail="Simulated upstream failure")
+
+
+class InflightLimitMiddleware:
+    """
+    Rejects requests with 503 + Retry-After once `max_inflight` are being served,
+    the way an overloaded inference service sheds load. Pure ASGI so it adds no
+    per-request task or body buffering.
+    """
+
+    def __init__(self, app, max_inflight: int):
+        self.app = app
+        self.max_inflight = max_inflight
+        self.inflight = 0
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] != 'http' or not self.max_inflight:
+            await self.app(scope, receive, send)
+            return
+
+        if self.inflight >= self.max_inflight:
+            body = json.dumps({"detail": "Service overloaded"}).encode()
+            await send({
+                'type': 'http.response.start',
+                'status': 503,
+                'headers': [
+                    (b'content-type', b'application/json'),
+                    (b'content-length', str(len(body)).encode()),
+                    (b'retry-after', b'1'),
+                ],
+            })
+            await send({'type': 'http.response.body', 'body': body})
+            return
+
+        self.inflight += 1
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            self.inflight -= 1
@@ -0,0 +1,43 @@
+"""
+FastAPI application serving the OCR and Web MCP endpoints.
+
+Start with ``pixi run fastapi`` (``uvicorn fastapi_services.main:app``).
+The current implementation is a stand-in that produces synthetic receipts and
+listings; see `fastapi_services.config` for latency, error-rate, payload and
+backpressure knobs.
+"""
+from contextlib import asynccontextmanager
+
+from fastapi import FastAPI
+
+from .config import get_settings
+from .faults import InflightLimitMiddleware
+from .mcp.router import router as mcp_router
+from .ocr.engine import shutdown_executor
+from .ocr.router import router as ocr_router
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Shuts the OCR process pool down with the server."""
+    yield
+    shutdown_executor()
+
+
+def create_app() -> FastAPI:
+    """Builds the application from the current environment settings."""
+    settings = get_settings()
+    app = FastAPI(title="My Garage AI Services", version="0.1.0", lifespan=lifespan)
+    app.include_router(ocr_router)
+    app.include_router(mcp_router)
+
+    @app.get("/health")
+    async def health() -> dict:
+        return {"status": "ok"}
+
+    if settings.max_inflight:
+        app.add_middleware(InflightLimitMiddleware, max_inflight=settings.max_inflight)
+    return app
+
+
+app = create_app()
@@ -0,0 +1,42 @@
+"""Web MCP tool execution endpoint."""
+from typing import Any, Dict
+
+from fastapi import APIRouter, HTTPException
+from pydantic import BaseModel, Field
+
+from .tools import search_market_listings, search_part_prices
+
+router = APIRouter(prefix="/mcp", tags=["mcp"])
+
+
+class ToolCall(BaseModel):
+    """Body of `POST /mcp/execute`, as sent by `vehicle_update_market_valuation`."""
+    tool_name: str
+    arguments: Dict[str, Any] = Field(default_factory=dict)
+
+
+TOOLS = {
+    "search_market_listings": search_market_listings,
+    "search_part_prices": search_part_prices,
+}
+
+
+@router.post("/execute")
+async def execute_tool(call: ToolCall) -> Dict[str, Any]:
+    """
+    Dispatches a tool call by name.
+    Answers 502 when every upstream source failed, so callers retry instead
+    of treating the outage as "no comparable listings".
+    """
+    tool = TOOLS.get(call.tool_name)
+    if tool is None:
+        raise HTTPException(status_code=404, detail=f"Unknown tool '{call.tool_name}'")
+
+    try:
+        result = await tool(call.arguments)
+    except ValueError as exc:
+        raise HTTPException(status_code=422, detail=str(exc))
+    sources = result.get("sources", [])
+    if sources and not any(source["ok"] for source in sources):
+        raise HTTPException(status_code=502, detail={"message": "All listing sources failed", "sources": sources})
+    return {"tool_name": call.tool_name, **result}
@@ -0,0 +1,105 @@
+"""
+Pluggable listing sources for `search_market_listings`.
+
+A source is anything with a `name`, an optional `timeout` (seconds) and an
+async `search(query)` returning listing dicts. Production sources would wrap
+marketplace scrapers; the ones here are local stand-ins.
+"""
+import json
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+from ..config import EndpointProfile
+from ..faults import roll_failure, simulate_latency
+from ..synthetic import rng_for, synthetic_listings
+
+FIXTURES_DIR = Path(__file__).resolve().parent / "fixtures"
+
+
+class SourceError(Exception):
+    """A listing source could not answer."""
+
+
+@dataclass(frozen=True)
+class ListingQuery:
+    """Normalized `search_market_listings` arguments; hashable so it can key caches."""
+    make: str
+    model: str
+    year_min: int
+    year_max: int
+    trim: str = ""
+
+    @classmethod
+    def from_arguments(cls, arguments: Dict[str, Any]) -> "ListingQuery":
+        year_min = int(arguments.get("year_min") or arguments.get("year_max") or 0)
+        year_max = int(arguments.get("year_max") or year_min)
+        return cls(
+            make=str(arguments.get("make", "")).strip().lower(),
+            model=str(arguments.get("model", "")).strip().lower(),
+            year_min=min(year_min, year_max),
+            year_max=max(year_min, year_max),
+            trim=str(arguments.get("trim") or "").strip().lower(),
+        )
+
+    def matches(self, listing: Dict[str, Any]) -> bool:
+        return (
+            str(listing.get("make", "")).lower() == self.make
+            and str(listing.get("model", "")).lower() == self.model
+            and self.year_min <= int(listing.get("year", 0)) <= self.year_max
+            and (not self.trim or str(listing.get("trim", "")).lower() == self.trim)
+        )
+
+
+class ListingSource:
+    """Base class for listing sources."""
+    name: str = "source"
+    timeout: Optional[float] = None
+
+    async def search(self, query: ListingQuery) -> List[Dict[str, Any]]:
+        raise NotImplementedError
+
+
+class SyntheticListingSource(ListingSource):
+    """Generates deterministic listings for one marketplace with simulated latency/failures."""
+
+    def __init__(self, name: str, profile: EndpointProfile, count: int, seed: int = 0,
+                 timeout: Optional[float] = None):
+        self.name = name
+        self.profile = profile
+        self.count = count
+        self.seed = seed
+        self.timeout = timeout
+
+    async def search(self, query: ListingQuery) -> List[Dict[str, Any]]:
+        await simulate_latency(self.profile)
+        if roll_failure(self.profile):
+            raise SourceError(f"{self.name} returned an error")
+
+        rng = rng_for(self.seed, self.name, query)
+        arguments = {"make": query.make.title(), "model": query.model.title(), "trim": query.trim,
+                     "year_min": query.year_min, "year_max": query.year_max}
+        listings = synthetic_listings(rng, arguments, self.count)
+        for listing in listings:
+            listing["source"] = self.name
+        return listings
+
+
+class FixtureListingSource(ListingSource):
+    """Serves listings from a JSON file (a list of listing dicts), filtered by the query."""
+
+    def __init__(self, name: str, listings: List[Dict[str, Any]], delay: float = 0.0,
+                 timeout: Optional[float] = None):
+        self.name = name
+        self.listings = listings
+        self.delay = delay
+        self.timeout = timeout
+
+    @classmethod
+    def from_path(cls, path: Path, **kwargs) -> "FixtureListingSource":
+        return cls(kwargs.pop("name", path.stem), json.loads(Path(path).read_text()), **kwargs)
+
+    async def search(self, query: ListingQuery) -> List[Dict[str, Any]]:
+        if self.delay:
+            await simulate_latency(EndpointProfile(latency_ms=self.delay * 1000))
+        return [dict(listing, source=self.name) for listing in self.listings if query.matches(listing)]
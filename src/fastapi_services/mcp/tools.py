@@ -0,0 +1,141 @@
+"""MCP tool implementations."""
+import asyncio
+import datetime
+import time
+from functools import lru_cache
+from pathlib import Path
+from typing import Any, Dict, List, Sequence
+
+from ..config import get_settings
+from ..faults import simulate_latency
+from ..synthetic import synthetic_part_offers
+from .cache import Coalescer, TTLCache
+from .sources import (
+    FIXTURES_DIR,
+    FixtureListingSource,
+    ListingQuery,
+    ListingSource,
+    SyntheticListingSource,
+)
+
+
+class MarketSearch:
+    """
+    `search_market_listings`: fans a query out to every listing source at once.
+
+    Each source gets its own timeout, so a slow or failing marketplace only
+    drops its own listings (reported as `partial`) and total latency is bounded
+    by the slowest source rather than their sum. Identical concurrent queries
+    share one fan-out, and answers are kept in an LRU+TTL cache; partial
+    answers are cached for a shorter time so a recovered source is picked up.
+    """
+
+    def __init__(self, sources: Sequence[ListingSource], default_timeout: float,
+                 cache_size: int = 1024, cache_ttl: float = 900.0, partial_ttl: float = 60.0):
+        self.sources = list(sources)
+        self.default_timeout = default_timeout
+        self.cache_ttl = cache_ttl
+        self.partial_ttl = partial_ttl
+        self.cache = TTLCache(cache_size)
+        self.coalescer = Coalescer()
+
+    async def __call__(self, arguments: Dict[str, Any]) -> Dict[str, Any]:
+        query = ListingQuery.from_arguments(arguments)
+        cached = self.cache.get(query)
+        if cached is not None:
+            return {**cached, "cached": True}
+
+        result = await self.coalescer.run(query, lambda: self._fan_out(query))
+        return {**result, "cached": False}
+
+    async def _query_source(self, source: ListingSource, query: ListingQuery) -> Dict[str, Any]:
+        timeout = source.timeout or self.default_timeout
+        started = time.perf_counter()
+        status: Dict[str, Any] = {"name": source.name, "ok": False, "count": 0}
+        listings: List[Dict[str, Any]] = []
+        try:
+            listings = await asyncio.wait_for(source.search(query), timeout)
+            status.update(ok=True, count=len(listings))
+        except asyncio.TimeoutError:
+            status["error"] = f"timed out after {timeout:g}s"
+        except Exception as exc:
+            status["error"] = str(exc) or type(exc).__name__
+        status["elapsed_ms"] = round((time.perf_counter() - started) * 1000, 1)
+        return {"status": status, "listings": listings}
+
+    async def _fan_out(self, query: ListingQuery) -> Dict[str, Any]:
+        answers = await asyncio.gather(*(self._query_source(s, query) for s in self.sources))
+
+        # The same car is often cross-posted; keep the first copy of each URL
+        seen = set()
+        results = []
+        for answer in answers:
+            for listing in answer["listings"]:
+                key = listing.get("url") or id(listing)
+                if key not in seen:
+                    seen.add(key)
+                    results.append(listing)
+
+        statuses = [answer["status"] for answer in answers]
+        failed = sum(not s["ok"] for s in statuses)
+        result = {"results": results, "sources": statuses, "partial": bool(failed)}
+        if failed < len(statuses):
+            self.cache.set(query, result, self.partial_ttl if failed else self.cache_ttl)
+        return result
+
+
+def build_default_sources() -> List[ListingSource]:
+    """Synthetic marketplaces from STANDIN_MCP_SOURCES plus any fixture files listed in STANDIN_MCP_FIXTURES."""
+    settings = get_settings()
+    sources: List[ListingSource] = [
+        SyntheticListingSource(name, settings.mcp, settings.listings_per_search, seed=settings.seed)
+        for name in settings.mcp_sources
+    ]
+    for fixture in settings.mcp_fixtures:
+        path = Path(fixture) if "/" in fixture else FIXTURES_DIR / fixture
+        sources.append(FixtureListingSource.from_path(path))
+    return sources
+
+
+@lru_cache(maxsize=1)
+def get_market_search() -> MarketSearch:
+    """Process-wide `MarketSearch`, so its cache and coalescing span requests."""
+    settings = get_settings()
+    return MarketSearch(
+        build_default_sources(),
+        default_timeout=settings.mcp_source_timeout,
+        cache_size=settings.mcp_cache_size,
+        cache_ttl=settings.mcp_cache_ttl,
+        partial_ttl=settings.mcp_partial_cache_ttl,
+    )
+
+
+async def search_market_listings(arguments: Dict[str, Any]) -> Dict[str, Any]:
+    """Returns comparable listings for the requested make/model/year range."""
+    return await get_market_search()(arguments)
+
+
+async def search_part_prices(arguments: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Current seller offers for a batch of parts (`parts`: brand/part_number
+    pairs), with the lowest in-stock price of each (null when none is).
+    """
+    settings = get_settings()
+    parts = arguments.get("parts") or []
+    if len(parts) > settings.mcp_max_parts:
+        raise ValueError(f"At most {settings.mcp_max_parts} parts per call")
+    await simulate_latency(settings.mcp)
+
+    now = datetime.datetime.now(datetime.timezone.utc)
+    results = []
+    for part in parts:
+        brand, part_number = str(part.get("brand", "")), str(part.get("part_number", ""))
+        offers = synthetic_part_offers(settings.seed, brand, part_number, now)
+        in_stock = [offer["price"] for offer in offers if offer["in_stock"]]
+        results.append({
+            "brand": brand,
+            "part_number": part_number,
+            "offers": offers,
+            "lowest_price": min(in_stock) if in_stock else None,
+        })
+    return {"results": results}
@@ -0,0 +1,46 @@
+"""
+Fetching receipt images straight from object storage.
+
+Django sends the object key with a presigned GET URL, so the OCR service
+reads the bytes from the bucket itself and needs no storage credentials.
+"""
+import posixpath
+
+import httpx
+from pydantic import BaseModel
+
+
+class ObjectRef(BaseModel):
+    """A stored receipt: its key in the bucket and a presigned URL to read it."""
+    key: str
+    url: str
+
+    @property
+    def filename(self) -> str:
+        return posixpath.basename(self.key)
+
+
+class ObjectFetchError(Exception):
+    """The object could not be downloaded."""
+
+
+def object_client(timeout: float) -> httpx.AsyncClient:
+    """HTTP client used for downloads (replaced in tests)."""
+    return httpx.AsyncClient(timeout=timeout)
+
+
+async def fetch_object(client: httpx.AsyncClient, ref: ObjectRef, max_bytes: int) -> bytes:
+    """Downloads `ref`, refusing objects larger than `max_bytes`."""
+    try:
+        async with client.stream("GET", ref.url) as response:
+            if response.status_code != 200:
+                raise ObjectFetchError(f"Fetching {ref.key} returned HTTP {response.status_code}")
+            chunks, size = [], 0
+            async for chunk in response.aiter_bytes():
+                size += len(chunk)
+                if size > max_bytes:
+                    raise ObjectFetchError(f"{ref.key} is larger than {max_bytes} bytes")
+                chunks.append(chunk)
+    except httpx.HTTPError as exc:
+        raise ObjectFetchError(f"Fetching {ref.key} failed: {exc}") from exc
+    return b"".join(chunks)
@@ -0,0 +1,119 @@
+"""OCR endpoints."""
+import asyncio
+import json
+from typing import AsyncIterator, Awaitable, Callable, List, Tuple
+
+from fastapi import APIRouter, File, HTTPException, UploadFile
+from fastapi.responses import StreamingResponse
+from pydantic import BaseModel
+
+from ..config import ServiceSettings, get_settings
+from ..faults import roll_failure, simulate_endpoint, simulate_latency
+from .engine import run_extraction
+from .objects import ObjectFetchError, ObjectRef, fetch_object, object_client
+
+router = APIRouter(prefix="/ocr", tags=["ocr"])
+
+NDJSON_MEDIA_TYPE = "application/x-ndjson"
+
+# (index in the request, filename, coroutine function returning the image bytes)
+ExtractionJob = Tuple[int, str, Callable[[], Awaitable[bytes]]]
+
+
+@router.post("/process")
+async def process_receipt(file: UploadFile = File(...)) -> dict:
+    """Extracts vendor, totals and line items from a receipt image."""
+    content = await file.read()
+    await simulate_endpoint(get_settings().ocr)
+    return await run_extraction(content, file.filename or "")
+
+
+@router.post("/process-batch")
+async def process_receipt_batch(files: List[UploadFile] = File(...)) -> StreamingResponse:
+    """
+    Extracts many receipts in one request.
+
+    Images are fanned out across the OCR process pool and results are streamed
+    back as NDJSON in completion order, one line per image::
+
+        {"index": 3, "filename": "r3.jpg", "ok": true, "result": {...}}
+        {"index": 0, "filename": "r0.jpg", "ok": false, "error": "..."}
+
+    `index` is the position of the file in the request.
+    """
+    settings = get_settings()
+    if len(files) > settings.ocr_max_batch:
+        raise HTTPException(status_code=413, detail=f"At most {settings.ocr_max_batch} files per batch")
+
+    items = [(index, f.filename or "", await f.read()) for index, f in enumerate(files)]
+    await simulate_latency(settings.ocr)
+
+    def loader(content: bytes) -> Callable[[], Awaitable[bytes]]:
+        async def load() -> bytes:
+            return content
+        return load
+
+    jobs = [(index, filename, loader(content)) for index, filename, content in items]
+    return StreamingResponse(_stream_extractions(settings, jobs), media_type=NDJSON_MEDIA_TYPE)
+
+
+@router.post("/process-object")
+async def process_receipt_object(ref: ObjectRef) -> dict:
+    """Like /process, for a receipt already in object storage."""
+    settings = get_settings()
+    async with object_client(settings.ocr_fetch_timeout) as client:
+        try:
+            content = await fetch_object(client, ref, settings.ocr_max_object_bytes)
+        except ObjectFetchError as exc:
+            raise HTTPException(status_code=502, detail=str(exc))
+    await simulate_endpoint(settings.ocr)
+    return await run_extraction(content, ref.filename)
+
+
+class ObjectBatch(BaseModel):
+    objects: List[ObjectRef]
+
+
+@router.post("/process-batch-objects")
+async def process_receipt_object_batch(batch: ObjectBatch) -> StreamingResponse:
+    """
+    Like /process-batch, for receipts already in object storage. Each image
+    is downloaded as part of its own extraction, so a missing object fails
+    only its line.
+    """
+    settings = get_settings()
+    if len(batch.objects) > settings.ocr_max_batch:
+        raise HTTPException(status_code=413, detail=f"At most {settings.ocr_max_batch} files per batch")
+    await simulate_latency(settings.ocr)
+
+    async def stream() -> AsyncIterator[bytes]:
+        async with object_client(settings.ocr_fetch_timeout) as client:
+            def loader(ref: ObjectRef) -> Callable[[], Awaitable[bytes]]:
+                return lambda: fetch_object(client, ref, settings.ocr_max_object_bytes)
+
+            jobs = [(index, ref.filename, loader(ref)) for index, ref in enumerate(batch.objects)]
+            async for line in _stream_extractions(settings, jobs):
+                yield line
+
+    return StreamingResponse(stream(), media_type=NDJSON_MEDIA_TYPE)
+
+
+async def _stream_extractions(settings: ServiceSettings, jobs: List[ExtractionJob]) -> AsyncIterator[bytes]:
+    """Runs the jobs concurrently and yields one NDJSON line per job in completion order."""
+    async def extract(index: int, filename: str, load: Callable[[], Awaitable[bytes]]) -> dict:
+        line = {"index": index, "filename": filename}
+        if roll_failure(settings.ocr):
+            return {**line, "ok": False, "error": "Simulated extraction failure"}
+        try:
+            return {**line, "ok": True, "result": await run_extraction(await load(), filename)}
+        except Exception as exc:
+            return {**line, "ok": False, "error": str(exc)}
+
+    pending = [asyncio.ensure_future(extract(*job)) for job in jobs]
+    try:
+        for finished in asyncio.as_completed(pending):
+            yield (json.dumps(await finished) + "\n").encode()
+    finally:
+        # Client went away mid-stream; don't leave queued pool work behind
+        for task in pending:
+            task.cancel()
@@ -0,0 +1,111 @@
+"""Deterministic synthetic payloads for the stand-in services."""
+import datetime
+import hashlib
+import random
+from typing import Any, Dict, List
+
+VENDORS = [
+    "Eastside Auto Care", "Precision Tuning", "Jiffy Lube #2291", "Dealer Service Center",
+    "Redline Performance", "Main Street Garage", "Tire Kingdom", "Euro Specialists",
+]
+
+LINE_ITEMS = [
+    ("5W-30 Synthetic Oil", 38.0, 70.0),
+    ("Oil Filter", 8.0, 25.0),
+    ("Engine Air Filter", 15.0, 45.0),
+    ("Brake Pads (Front)", 60.0, 220.0),
+    ("Brake Rotor", 45.0, 180.0),
+    ("Spark Plugs (set)", 30.0, 120.0),
+    ("Coolant Flush", 80.0, 160.0),
+    ("Wheel Alignment", 80.0, 150.0),
+    ("Timing Belt Kit", 150.0, 600.0),
+    ("Labor", 60.0, 900.0),
+]
+
+LISTING_SITES = ["bringatrailer.com", "carsandbids.com", "ebay.com/motors", "hemmings.com"]
+
+PART_SELLERS = ["summitracing.com", "rockauto.com", "fcpeuro.com", "ebay.com/motors"]
+# How long a seller holds a price, per part: some parts reprice every few
+# hours, most weekly or slower
+PRICE_EPOCH_HOURS = [6, 24, 72, 168, 168, 720]
+
+
+def rng_for(seed: int, *parts: Any) -> random.Random:
+    """A Random seeded from the service seed and the request input, so identical requests get identical data."""
+    digest = hashlib.blake2b(repr((seed,) + parts).encode(), digest_size=8).digest()
+    return random.Random(int.from_bytes(digest, 'big'))
+
+
+def synthetic_receipt(rng: random.Random, line_items: int) -> Dict[str, Any]:
+    """Builds an OCR-style extraction of a workshop receipt."""
+    items: List[Dict[str, Any]] = []
+    for _ in range(line_items):
+        description, low, high = rng.choice(LINE_ITEMS)
+        items.append({
+            "description": description,
+            "quantity": rng.randint(1, 4) if description != "Labor" else 1,
+            "amount": round(rng.uniform(low, high), 2),
+        })
+    parts = [i for i in items if i["description"] != "Labor"]
+    labor = [i for i in items if i["description"] == "Labor"]
+    total = round(sum(i["amount"] for i in items), 2)
+    date = datetime.date(2015, 1, 1) + datetime.timedelta(days=rng.randint(0, 3650))
+
+    return {
+        "vendor": rng.choice(VENDORS),
+        "date": date.isoformat(),
+        "description": ", ".join(dict.fromkeys(i["description"] for i in parts)) or "Labor only",
+        "total_cost": total,
+        "parts_cost": round(sum(i["amount"] for i in parts), 2),
+        "labor_cost": round(sum(i["amount"] for i in labor), 2),
+        "line_items": items,
+        "confidence": round(rng.uniform(0.82, 0.99), 3),
+    }
+
+
+def synthetic_listings(rng: random.Random, arguments: Dict[str, Any], count: int) -> List[Dict[str, Any]]:
+    """Builds comparable market listings for a make/model/year range."""
+    year_min = int(arguments.get("year_min") or 2000)
+    year_max = int(arguments.get("year_max") or year_min)
+    base_price = rng.uniform(15000, 90000)
+    listings = []
+    for n in range(count):
+        year = rng.randint(year_min, max(year_min, year_max))
+        mileage = rng.randint(5000, 180000)
+        # Newer, lower-mileage cars price higher; spread is lognormal-ish
+        price = base_price * (1 + 0.04 * (year - year_min)) * (1.25 - mileage / 400000)
+        price *= rng.lognormvariate(0, 0.12)
+        site = rng.choice(LISTING_SITES)
+        listings.append({
+            "make": arguments.get("make", ""),
+            "model": arguments.get("model", ""),
+            "trim": arguments.get("trim", ""),
+            "year": year,
+            "mileage": mileage,
+            "price": round(price, 2),
+            "source": site,
+            "url": f"https://{site}/listing/{rng.getrandbits(40):x}-{n}",
+            "sold_date": (datetime.date(2024, 1, 1) + datetime.timedelta(days=rng.randint(0, 600))).isoformat(),
+        })
+    return listings
+
+
+def synthetic_part_offers(seed: int, brand: str, part_number: str, now: datetime.datetime) -> List[Dict[str, Any]]:
+    """
+    Seller offers for a part. Prices are stable within a part-specific epoch
+    and move between epochs, so repeated polls see realistic change rates.
+    """
+    part_rng = rng_for(seed, brand, part_number)
+    base_price = part_rng.uniform(40, 4000)
+    epoch_hours = part_rng.choice(PRICE_EPOCH_HOURS)
+    epoch = int(now.timestamp() // (epoch_hours * 3600))
+    offers = []
+    for seller in part_rng.sample(PART_SELLERS, part_rng.randint(1, len(PART_SELLERS))):
+        rng = rng_for(seed, brand, part_number, seller, epoch)
+        offers.append({
+            "seller": seller,
+            "price": round(base_price * rng.uniform(0.9, 1.1), 2),
+            "in_stock": rng.random() > 0.15,
+            "url": f"https://{seller}/p/{part_number.lower()}",
+        })
+    return offers
@@ -0,0 +1,129 @@
+"""Tests for the stand-in OCR and MCP endpoints."""
+import json
+
+import httpx
+import pytest
+from fastapi.testclient import TestClient
+
+from fastapi_services import config
+from fastapi_services.main import create_app
+from fastapi_services.mcp.tools import get_market_search
+from fastapi_services.ocr import router as ocr_router
+
+
+@pytest.fixture(autouse=True)
+def fresh_settings():
+    """Settings are cached per process; reload them around each test."""
+    config.get_settings.cache_clear()
+    get_market_search.cache_clear()
+    yield
+    config.get_settings.cache_clear()
+    get_market_search.cache_clear()
+
+
+def _client(monkeypatch, **env) -> TestClient:
+    for key, value in env.items():
+        monkeypatch.setenv(key, str(value))
+    return TestClient(create_app())
+
+
+def test_ocr_process_returns_deterministic_receipt(monkeypatch):
+    """Identical images yield identical synthetic receipts of the configured size."""
+    client = _client(monkeypatch, STANDIN_RECEIPT_LINE_ITEMS=4)
+    first = client.post('/ocr/process', files={'file': ('r.jpg', b'receipt-bytes')}).json()
+    second = client.post('/ocr/process', files={'file': ('r.jpg', b'receipt-bytes')}).json()
+
+    assert first == second
+    assert len(first['line_items']) == 4
+    assert first['total_cost'] == round(sum(i['amount'] for i in first['line_items']), 2)
+
+
+def test_mcp_search_market_listings(monkeypatch):
+    """The valuation tool returns priced listings within the requested years."""
+    client = _client(monkeypatch, STANDIN_LISTINGS_PER_SEARCH=7, STANDIN_MCP_SOURCES='bringatrailer.com')
+    response = client.post('/mcp/execute', json={
+        'tool_name': 'search_market_listings',
+        'arguments': {'make': 'Toyota', 'model': 'Supra', 'year_min': 1997, 'year_max': 1999},
+    })
+
+    assert response.status_code == 200
+    results = response.json()['results']
+    assert len(results) == 7
+    assert all(1997 <= r['year'] <= 1999 and r['price'] > 0 for r in results)
+
+
+def test_mcp_unknown_tool_is_404(monkeypatch):
+    client = _client(monkeypatch)
+    assert client.post('/mcp/execute', json={'tool_name': 'nope'}).status_code == 404
+
+
+def test_mcp_search_part_prices_batches_parts(monkeypatch):
+    """One call prices many parts, in request order; oversized batches are rejected."""
+    client = _client(monkeypatch, STANDIN_MCP_MAX_PARTS=3)
+    parts = [{'brand': 'BREMBO', 'part_number': f"GT{i}"} for i in range(3)]
+    response = client.post('/mcp/execute', json={'tool_name': 'search_part_prices', 'arguments': {'parts': parts}})
+
+    assert response.status_code == 200
+    results = response.json()['results']
+    assert [r['part_number'] for r in results] == ['GT0', 'GT1', 'GT2']
+    for result in results:
+        in_stock = [o['price'] for o in result['offers'] if o['in_stock']]
+        assert result['lowest_price'] == (min(in_stock) if in_stock else None)
+
+    parts.append({'brand': 'HKS', 'part_number': 'X1'})
+    response = client.post('/mcp/execute', json={'tool_name': 'search_part_prices', 'arguments': {'parts': parts}})
+    assert response.status_code == 422
+
+
+def test_all_sources_failing_is_502(monkeypatch):
+    """When every marketplace errors the tool fails loudly instead of returning no comps."""
+    client = _client(monkeypatch, STANDIN_MCP_ERROR_RATE=1)
+    response = client.post('/mcp/execute', json={'tool_name': 'search_market_listings'})
+    assert response.status_code == 502
+    assert len(response.json()['detail']['sources']) == 4
+
+
+def test_ocr_batch_streams_one_ndjson_line_per_file(monkeypatch):
+    """Batch results arrive as NDJSON, indexed by request position, via the process pool."""
+    client = _client(monkeypatch, STANDIN_OCR_WORKERS=2, STANDIN_OCR_CPU_ROUNDS=10)
+    files = [('files', (f"r{i}.jpg", f"receipt-{i}".encode())) for i in range(5)]
+    with client:
+        response = client.post('/ocr/process-batch', files=files)
+        single = client.post('/ocr/process', files={'file': ('r3.jpg', b'receipt-3')}).json()
+
+    assert response.headers['content-type'].startswith('application/x-ndjson')
+    lines = [json.loads(line) for line in response.text.splitlines()]
+    assert sorted(line['index'] for line in lines) == [0, 1, 2, 3, 4]
+    assert all(line['ok'] for line in lines)
+    assert next(line for line in lines if line['index'] == 3)['result'] == single
+
+
+def test_ocr_batch_rejects_oversized_batches(monkeypatch):
+    client = _client(monkeypatch, STANDIN_OCR_WORKERS=0, STANDIN_OCR_MAX_BATCH=2)
+    files = [('files', (f"r{i}.jpg", b'x')) for i in range(3)]
+    assert client.post('/ocr/process-batch', files=files).status_code == 413
+
+
+def test_ocr_reads_receipts_from_object_storage(monkeypatch):
+    """Objects are fetched by presigned URL; a missing one fails only its own line."""
+    bucket = {'/media/receipts/r1.jpg': b'receipt-1'}
+
+    def handler(request):
+        content = bucket.get(request.url.path)
+        return httpx.Response(200, content=content) if content else httpx.Response(404)
+
+    monkeypatch.setattr(ocr_router, 'object_client',
+                        lambda timeout: httpx.AsyncClient(transport=httpx.MockTransport(handler)))
+    client = _client(monkeypatch, STANDIN_OCR_WORKERS=0)
+    ref = {'key': 'receipts/r1.jpg', 'url': 'https://s3.test/media/receipts/r1.jpg?X-Amz-Signature=x'}
+    missing = {'key': 'receipts/r2.jpg', 'url': 'https://s3.test/media/receipts/r2.jpg'}
+
+    single = client.post('/ocr/process-object', json=ref).json()
+    uploaded = client.post('/ocr/process', files={'file': ('r1.jpg', b'receipt-1')}).json()
+    assert single == uploaded
+    assert client.post('/ocr/process-object', json=missing).status_code == 502
+
+    response = client.post('/ocr/process-batch-objects', json={'objects': [ref, missing]})
+    lines = {line['index']: line for line in map(json.loads, response.text.splitlines())}
+    assert lines[0]['ok'] and lines[0]['result'] == single
+    assert not lines[1]['ok'] and '404' in lines[1]['error']
@@ -0,0 +1,87 @@
+"""Tests for the market search fan-out, cache and coalescing."""
+import asyncio
+
+from fastapi_services.mcp.cache import TTLCache
+from fastapi_services.mcp.sources import FIXTURES_DIR, FixtureListingSource, ListingSource
+from fastapi_services.mcp.tools import MarketSearch
+
+SUPRA = {'make': 'Toyota', 'model': 'Supra', 'year_min': 1993, 'year_max': 1998}
+
+
+class CountingSource(ListingSource):
+    """Returns one listing after `delay` seconds and counts calls."""
+
+    def __init__(self, name, delay=0.0, fail=False):
+        self.name = name
+        self.delay = delay
+        self.fail = fail
+        self.calls = 0
+
+    async def search(self, query):
+        self.calls += 1
+        await asyncio.sleep(self.delay)
+        if self.fail:
+            raise RuntimeError('boom')
+        return [{'url': f"https://{self.name}/1", 'price': 100}]
+
+
+def test_fan_out_is_bounded_by_slowest_source_and_reports_partial():
+    """Sources run concurrently; a timeout or error drops only that source."""
+    sources = [
+        CountingSource('a', delay=0.1),
+        CountingSource('b', delay=0.1),
+        CountingSource('slow', delay=5),
+        CountingSource('broken', fail=True),
+    ]
+    search = MarketSearch(sources, default_timeout=0.3)
+
+    elapsed, result = asyncio.run(_timed(search, SUPRA))
+
+    assert elapsed < 0.6
+    assert result['partial'] is True
+    assert {l['url'] for l in result['results']} == {'https://a/1', 'https://b/1'}
+    status = {s['name']: s for s in result['sources']}
+    assert 'timed out' in status['slow']['error']
+    assert status['broken']['error'] == 'boom'
+
+
+def test_identical_concurrent_queries_share_one_fan_out_then_hit_cache():
+    source = CountingSource('a', delay=0.05)
+    search = MarketSearch([source], default_timeout=1)
+
+    async def burst():
+        return await asyncio.gather(*(search(SUPRA) for _ in range(10)))
+
+    results = asyncio.run(burst())
+    assert source.calls == 1
+    assert all(not r['cached'] for r in results)
+
+    assert asyncio.run(search(SUPRA))['cached'] is True
+    assert source.calls == 1
+
+
+def test_fixture_source_filters_by_query():
+    source = FixtureListingSource.from_path(FIXTURES_DIR / 'sample_listings.json')
+    result = asyncio.run(MarketSearch([source], default_timeout=1)(SUPRA))
+    assert result['results']
+    assert all(l['model'] == 'Supra' and 1993 <= l['year'] <= 1998 for l in result['results'])
+
+
+def test_ttl_cache_expires_and_evicts_lru():
+    now = [0.0]
+    cache = TTLCache(maxsize=2, clock=lambda: now[0])
+    cache.set('a', 1, ttl=10)
+    cache.set('b', 2, ttl=10)
+    cache.get('a')
+    cache.set('c', 3, ttl=10)
+    assert cache.get('b') is None and cache.get('a') == 1
+
+    now[0] = 11
+    assert cache.get('a') is None
+
+
+async def _timed(search, arguments):
+    loop = asyncio.get_running_loop()
+    start = loop.time()
+    result = await search(arguments)
+    return loop.time() - start, result
@@ -1,14 +1,70 @@
 """Django admin configuration for my_garage."""
 from django.contrib import admin
-from my_garage.models import Vehicle, ServiceRecord, Upgrade, ConditionReport
+from django.contrib.auth import get_user_model
+from django.db import connection
+from my_garage.models import Vehicle, ServiceRecord, Upgrade, ConditionReport, SearchDocument
+from my_garage.utils.pagination import EstimatedCountPaginator
+from my_garage.utils.search import match_condition
+
+
+class LargeTableAdminMixin:
+    """
+    Changelist settings for tables with millions of rows: the total comes from
+    the planner's estimate rather than COUNT(*), and the unfiltered total
+    isn't counted at all alongside filtered results.
+    """
+
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+
+
+class OwnerFilter(admin.SimpleListFilter):
+    """
+    Filters by `?owner=<user id>` without listing every user as a choice;
+    owners are found through the search box instead.
+    """
+
+    title = 'owner'
+    parameter_name = 'owner'
+
+    def lookups(self, request, model_admin):
+        value = self.value()
+        if not value or not value.isdigit():
+            return []
+        user = get_user_model().objects.filter(pk=value).first()
+        return [(value, str(user))] if user else []
+
+    def queryset(self, request, queryset):
+        value = self.value()
+        if value and value.isdigit():
+            return queryset.filter(owner_id=value)
+        return queryset
+
+
+class SearchIndexAdminMixin:
+    """
+    Answers the changelist search box from the full-text index instead of
+    `icontains` across `search_fields`, which only enable the box here.
+    """
+
+    search_kind = None
+
+    def get_search_results(self, request, queryset, search_term):
+        condition = match_condition(connection, search_term)
+        if condition is None:
+            return queryset, False
+        matches = SearchDocument.objects.filter(condition, kind=self.search_kind).values('object_id')
+        return queryset.filter(pk__in=matches), False
 
 
 @admin.register(Vehicle)
-class VehicleAdmin(admin.ModelAdmin):
+class VehicleAdmin(LargeTableAdminMixin, admin.ModelAdmin):
     """Admin for Vehicle model."""
 
     list_display = ['__str__', 'owner', 'year', 'mileage', 'current_market_value', 'created_at']
-    list_filter = ['make', 'year', 'owner']
+    list_filter = ['make', 'year', OwnerFilter]
+    list_select_related = ['owner']
+    autocomplete_fields = ['owner']
     search_fields = ['make', 'model', 'vin', 'owner__username']
     readonly_fields = ['created_at']
 
@@ -26,14 +82,17 @@ class VehicleAdmin(admin.ModelAdmin):
 
 
 @admin.register(ServiceRecord)
-class ServiceRecordAdmin(admin.ModelAdmin):
+class ServiceRecordAdmin(LargeTableAdminMixin, SearchIndexAdminMixin, admin.ModelAdmin):
     """Admin for ServiceRecord model."""
 
     list_display = ['vehicle', 'date', 'vendor', 'category', 'total_cost', 'is_verified']
+    # No date_hierarchy: its year links need a DISTINCT scan of the whole table
     list_filter = ['category', 'is_verified', 'date']
-    search_fields = ['vehicle__make', 'vehicle__model', 'vendor', 'description']
+    list_select_related = ['vehicle']
+    raw_id_fields = ['vehicle']
+    search_fields = ['vendor', 'description']
+    search_kind = 'SERVICE'
     readonly_fields = ['ocr_raw_data']
-    date_hierarchy = 'date'
 
     fieldsets = (
         ('Service Information', {
@@ -49,20 +108,23 @@ class ServiceRecordAdmin(admin.ModelAdmin):
 
 
 @admin.register(Upgrade)
-class UpgradeAdmin(admin.ModelAdmin):
+class UpgradeAdmin(LargeTableAdminMixin, SearchIndexAdminMixin, admin.ModelAdmin):
     """Admin for Upgrade model."""
 
-    list_display = ['vehicle', 'part_name', 'brand', 'status', 'cost', 'installation_date']
-    list_filter = ['status', 'brand']
-    search_fields = ['vehicle__make', 'vehicle__model', 'part_name', 'brand', 'part_number']
-    date_hierarchy = 'installation_date'
+    list_display = ['vehicle', 'part_name', 'brand', 'category', 'stage', 'status', 'cost', 'installation_date']
+    # Brands are found through search; a brand filter lists DISTINCT brand over every row
+    list_filter = ['status', 'stage', 'category', 'installation_date']
+    list_select_related = ['vehicle']
+    raw_id_fields = ['vehicle']
+    search_fields = ['part_name', 'brand', 'part_number']
+    search_kind = 'UPGRADE'
 
     fieldsets = (
         ('Part Information', {
-            'fields': ('vehicle', 'part_name', 'brand', 'part_number')
+            'fields': ('vehicle', 'part_name', 'brand', 'part_number', 'category')
         }),
         ('Status & Cost', {
-            'fields': ('status', 'cost', 'installation_date')
+            'fields': ('status', 'stage', 'cost', 'installation_date')
         }),
         ('Notes', {
             'fields': ('notes',)
@@ -71,12 +133,15 @@ class UpgradeAdmin(admin.ModelAdmin):
 
 
 @admin.register(ConditionReport)
-class ConditionReportAdmin(admin.ModelAdmin):
+class ConditionReportAdmin(LargeTableAdminMixin, SearchIndexAdminMixin, admin.ModelAdmin):
     """Admin for ConditionReport model."""
 
     list_display = ['vehicle', 'area', 'grade', 'value_adjustment', 'created_at']
     list_filter = ['area', 'created_at']
-    search_fields = ['vehicle__make', 'vehicle__model', 'ai_feedback']
+    list_select_related = ['vehicle']
+    raw_id_fields = ['vehicle']
+    search_fields = ['ai_feedback']
+    search_kind = 'CONDITION'
     readonly_fields = ['created_at']
 
     fieldsets = (
@@ -1,11 +1,31 @@
-from django.db.models import Sum, QuerySet, DecimalField
-from django.db.models.functions import Coalesce
+import datetime
+import uuid
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Count, F, Max, Min, OuterRef, Q, Subquery, Sum, QuerySet, DecimalField, Window
+from django.db.models.functions import Coalesce, RowNumber, Trunc, TruncYear
 from decimal import Decimal
-from typing import Dict, Any
-from bson import ObjectId
+from typing import TYPE_CHECKING, Dict, Any, List, Optional, Sequence
+from django.db import connections, router
 
-from my_garage.models import Vehicle, ServiceRecord, Upgrade, ConditionReport
+from my_garage.models import (
+    Vehicle,
+    ServiceRecord,
+    Upgrade,
+    ConditionReport,
+    SearchDocument,
+    ServiceCostRollup,
+    ValuationEvent,
+    PartPricePoint,
+    MarketListing,
+)
 from ..utils.mongo import get_collection
+from ..utils.routing import replica_read
+from ..utils.search import match_condition, ranked_ids
+
+if TYPE_CHECKING:
+    # numpy (through the valuation engine) is imported by the selectors that use it
+    from ..utils.valuation import ValuationInputs, ValuationResult
 
 
 def vehicle_get_total_maintenance_cost(vehicle: Vehicle) -> Decimal:
@@ -32,6 +52,7 @@ def vehicle_get_total_upgrade_cost(vehicle: Vehicle) -> Decimal:
     )['total']
 
 
+@replica_read
 def vehicle_get_build_summary(vehicle_id: int) -> Dict[str, Any]:
     """
     Aggregates all financial and condition data for a specific vehicle dashboard.
@@ -65,7 +86,91 @@ def vehicle_list_wishlist_items(vehicle: Vehicle) -> QuerySet[Upgrade]:
     """
     Returns all parts currently in the 'Wishlist' status.
     """
-    return Upgrade.objects.filter(vehicle=vehicle, status='WISHLIST').order_by('part_name')
+    return (Upgrade.objects.filter(vehicle=vehicle, status='WISHLIST')
+            .select_related('tracked_part').order_by('part_name'))
+
+
+def vehicle_change_stamp_key(vehicle_id: int) -> str:
+    return f"vehicle:stamp:{vehicle_id}"
+
+
+def vehicle_get_change_stamps(vehicle_ids: Sequence[int]) -> Dict[int, str]:
+    """
+    The current change stamp of each vehicle, which versions its cached page
+    fragments: services replace it whenever something those fragments show
+    changes (vehicle_touch). Vehicles without one are given a fresh stamp.
+    """
+    keys = {vehicle_change_stamp_key(pk): pk for pk in vehicle_ids}
+    stamps = cache.get_many(keys)
+    missing = [key for key in keys if key not in stamps]
+    for key in missing:
+        # add() keeps a stamp that a concurrent touch wrote in the meantime
+        cache.add(key, uuid.uuid4().hex, settings.FRAGMENT_CACHE_TIMEOUT)
+    if missing:
+        stamps.update(cache.get_many(missing))
+    return {keys[key]: stamp for key, stamp in stamps.items()}
+
+
+@replica_read(max_lag=60)
+def tracked_part_get_price_history(part_id: int, since: Optional[datetime.datetime] = None) -> List[Dict[str, Any]]:
+    """
+    Price changes of a tracked part, oldest first. Each price holds until the
+    next one, so the last entry is the current price.
+    """
+    points = PartPricePoint.objects.filter(part_id=part_id)
+    if since:
+        # Include the price that was current at `since`
+        before = points.filter(observed_at__lt=since).order_by('-observed_at').values('pk')[:1]
+        points = points.filter(Q(observed_at__gte=since) | Q(pk__in=before))
+    return list(points.order_by('observed_at').values('price', 'observed_at'))
+
+
+def market_listing_get_comparables(make: str, model: str, year_min: int, year_max: int, trim: str = '',
+                                   mileage: Optional[int] = None) -> QuerySet[MarketListing]:
+    """
+    Warehouse listings of `make` and `model` from `year_min` to `year_max`,
+    narrowed to the same trim, then to mileage within MARKET_MILEAGE_BAND,
+    as long as each step leaves at least MARKET_MIN_COMPARABLES.
+    """
+    listings = MarketListing.objects.filter(
+        make=make.strip().lower(), model=model.strip().lower(), year__range=(year_min, year_max)
+    )
+    narrowing = []
+    if trim.strip():
+        narrowing.append(Q(trim=trim.strip().lower()))
+    if mileage is not None:
+        band = settings.MARKET_MILEAGE_BAND
+        narrowing.append(Q(mileage__range=(max(mileage - band, 0), mileage + band)))
+    for condition in narrowing:
+        narrowed = listings.filter(condition)
+        if narrowed.count() >= settings.MARKET_MIN_COMPARABLES:
+            listings = narrowed
+    return listings
+
+
+@replica_read
+def market_listing_get_price_stats(make: str, model: str, year_min: int, year_max: int, trim: str = '',
+                                   mileage: Optional[int] = None) -> Dict[str, Any]:
+    """
+    Price quartiles of the comparables (see `market_listing_get_comparables`)
+    overall and the median per model year, computed locally in one query.
+    """
+    import numpy as np
+
+    rows = list(market_listing_get_comparables(make, model, year_min, year_max, trim, mileage)
+                .values_list('year', 'price'))
+    if not rows:
+        return {'count': 0, 'p25': None, 'median': None, 'p75': None, 'by_year': {}}
+    years = np.array([year for year, _ in rows])
+    prices = np.array([price for _, price in rows], dtype=float)
+    p25, median, p75 = (Decimal(f"{value:.2f}") for value in np.percentile(prices, [25, 50, 75]))
+    return {
+        'count': len(rows),
+        'p25': p25,
+        'median': median,
+        'p75': p75,
+        'by_year': {int(year): Decimal(f"{np.median(prices[years == year]):.2f}") for year in np.unique(years)},
+    }
 
 
 def vehicle_get_pending_service_count(vehicle: Vehicle) -> int:
@@ -82,6 +187,8 @@ def service_record_get_ocr_details(record: ServiceRecord) -> Dict[str, Any]:
     if not record.ocr_raw_data or 'mongo_id' not in record.ocr_raw_data:
         return {}
 
+    from bson import ObjectId
+
     try:
         collection = get_collection('ocr_documents')
         doc = collection.find_one({"_id": ObjectId(record.ocr_raw_data['mongo_id'])})
@@ -92,4 +199,198 @@ def service_record_get_ocr_details(record: ServiceRecord) -> Dict[str, Any]:
         # Log error in production
         pass
         
-    return {}
\ No newline at end of file
+    return {}
+
+@replica_read(max_lag=30)
+def search_documents(owner: Any, query: str, kinds: Optional[Sequence[str]] = None,
+                     limit: int = 20) -> List[SearchDocument]:
+    """
+    Ranked full-text search over the owner's service history, upgrades and
+    condition reports. Each document carries its score as `.rank`.
+    """
+    # The ranking query is raw SQL, so send it where the ORM reads go
+    alias = router.db_for_read(SearchDocument)
+    connection = connections[alias]
+    ranked = ranked_ids(connection, query, owner.pk, kinds, limit)
+
+    if ranked is None:
+        # No ranking index on this database: unranked, most recent first
+        condition = match_condition(connection, query)
+        if condition is None:
+            return []
+        queryset = SearchDocument.objects.using(alias).filter(condition, owner=owner)
+        if kinds:
+            queryset = queryset.filter(kind__in=kinds)
+        documents = list(queryset.order_by('-updated_at')[:limit])
+        for document in documents:
+            document.rank = 0.0
+        return documents
+
+    documents = SearchDocument.objects.using(alias).in_bulk([doc_id for doc_id, _ in ranked])
+    results = []
+    for doc_id, rank in ranked:
+        document = documents[doc_id]
+        document.rank = rank
+        results.append(document)
+    return results
+
+
+@replica_read
+def vehicle_get_cost_history(
+        vehicle: Vehicle,
+        start: Optional[datetime.date] = None,
+        end: Optional[datetime.date] = None,
+        categories: Optional[Sequence[str]] = None,
+        granularity: str = 'month'
+) -> List[Dict[str, Any]]:
+    """
+    Verified service spend per period ('month' or 'year') and category,
+    read from the monthly rollups: at most 12 x categories rows per year of
+    history. `start`/`end` are inclusive and compared by month.
+    """
+    rows = ServiceCostRollup.objects.filter(vehicle=vehicle)
+    if start:
+        rows = rows.filter(month__gte=start.replace(day=1))
+    if end:
+        rows = rows.filter(month__lte=end.replace(day=1))
+    if categories:
+        rows = rows.filter(category__in=categories)
+
+    period = TruncYear('month') if granularity == 'year' else F('month')
+    return list(
+        rows.annotate(period=period)
+        .values('period', 'category')
+        .annotate(total=Sum('total'), count=Sum('record_count'))
+        .order_by('period', 'category')
+    )
+
+
+# Bucket sizes tried when downsampling valuation history, finest first
+HISTORY_GRANULARITIES = [
+    ('hour', datetime.timedelta(hours=1)),
+    ('day', datetime.timedelta(days=1)),
+    ('week', datetime.timedelta(weeks=1)),
+    ('month', datetime.timedelta(days=31)),
+    ('year', datetime.timedelta(days=366)),
+]
+
+
+@replica_read
+def vehicle_get_valuation_history(
+        vehicle: Vehicle,
+        start: Optional[datetime.datetime] = None,
+        end: Optional[datetime.datetime] = None,
+        max_points: int = 100
+) -> List[Dict[str, Any]]:
+    """
+    The vehicle's market value over time from the valuation ledger, oldest
+    first. With more than `max_points` events in range, returns the value at
+    the end of each hour/day/week/month/year, using the finest bucket that
+    fits, so charts stay cheap however busy a vehicle's history is.
+    """
+    events = ValuationEvent.objects.filter(vehicle=vehicle)
+    if start:
+        events = events.filter(created_at__gte=start)
+    if end:
+        events = events.filter(created_at__lte=end)
+
+    fields = ('created_at', 'value_after', 'source')
+    span = events.aggregate(count=Count('id'), first=Min('created_at'), last=Max('created_at'))
+    if not span['count'] or span['count'] <= max_points:
+        return list(events.order_by('created_at', 'id').values(*fields))
+
+    elapsed = span['last'] - span['first']
+    kind = next((name for name, width in HISTORY_GRANULARITIES if elapsed / width < max_points - 1),
+                HISTORY_GRANULARITIES[-1][0])
+    bucket = Trunc('created_at', kind)
+    latest = events.annotate(
+        rank=Window(RowNumber(), partition_by=[bucket], order_by=[F('created_at').desc(), F('id').desc()])
+    ).filter(rank=1)
+    return list(latest.order_by('created_at', 'id').values(*fields))
+
+
+def garage_get_valuation_inputs(vehicles: QuerySet[Vehicle]) -> "ValuationInputs":
+    """
+    Loads what the valuation engine needs for `vehicles` into arrays with
+    five aggregate queries, whatever the number of vehicles.
+
+    The engine applies condition itself, from the latest grades, so the
+    market value it starts from leaves out the CONDITION adjustments that
+    current_market_value has accumulated since the last absolute value.
+    """
+    import numpy as np
+    from ..utils.valuation import ValuationInputs
+
+    rows = list(vehicles.order_by('pk').values_list('pk', 'current_market_value', 'purchase_price'))
+    inputs = ValuationInputs.empty(
+        [pk for pk, _, _ in rows],
+        [c for c, _ in Upgrade.CATEGORY_CHOICES],
+        [a for a, _ in ConditionReport.AREA_CHOICES],
+    )
+    if not rows:
+        return inputs
+    inputs.market_value[:] = np.array([value for _, value, _ in rows], dtype=float)
+    inputs.total_investment[:] = np.nan_to_num(np.array([price for _, _, price in rows], dtype=float))
+    vehicle_ids = vehicles.values('pk')
+
+    # The ledger is append-only, so later events have higher ids
+    last_absolute = (ValuationEvent.objects.filter(vehicle=OuterRef('vehicle'), is_absolute=True)
+                     .order_by('-pk').values('pk')[:1])
+    condition = list(
+        ValuationEvent.objects.filter(vehicle__in=vehicle_ids, source='CONDITION', is_absolute=False)
+        .filter(pk__gt=Coalesce(Subquery(last_absolute), 0))
+        .values('vehicle_id').annotate(total=Sum('amount')).values_list('vehicle_id', 'total').order_by()
+    )
+    if condition:
+        ids, totals = zip(*condition)
+        np.subtract.at(inputs.market_value, inputs.rows_for(ids), np.array(totals, dtype=float))
+
+    # Verified service spend, from the monthly rollups
+    services = list(
+        ServiceCostRollup.objects.filter(vehicle__in=vehicle_ids)
+        .values('vehicle_id').annotate(total=Sum('total')).values_list('vehicle_id', 'total')
+    )
+    if services:
+        ids, totals = zip(*services)
+        np.add.at(inputs.total_investment, inputs.rows_for(ids), np.array(totals, dtype=float))
+
+    upgrades = list(
+        Upgrade.objects.filter(vehicle__in=vehicle_ids, status='INSTALLED')
+        .values('vehicle_id', 'category').annotate(total=Sum('cost'))
+        .values_list('vehicle_id', 'category', 'total').order_by()
+    )
+    if upgrades:
+        ids, categories, totals = zip(*upgrades)
+        column = {category: i for i, category in enumerate(inputs.categories)}
+        totals = np.array(totals, dtype=float)
+        np.add.at(inputs.upgrade_cost, (inputs.rows_for(ids), [column[c] for c in categories]), totals)
+        np.add.at(inputs.total_investment, inputs.rows_for(ids), totals)
+
+    # Latest report per vehicle and area
+    latest = list(
+        ConditionReport.objects.filter(vehicle__in=vehicle_ids)
+        .annotate(recency=Window(RowNumber(), partition_by=[F('vehicle_id'), F('area')],
+                                 order_by=[F('created_at').desc(), F('pk').desc()]))
+        .filter(recency=1)
+        .values_list('vehicle_id', 'area', 'grade')
+    )
+    if latest:
+        ids, areas, grades = zip(*latest)
+        column = {area: i for i, area in enumerate(inputs.areas)}
+        inputs.grades[inputs.rows_for(ids), [column[a] for a in areas]] = grades
+
+    return inputs
+
+
+@replica_read
+def garage_get_valuation(vehicles: QuerySet[Vehicle], scenarios: Optional[Sequence[str]] = None) -> "ValuationResult":
+    """
+    Mod- and condition-adjusted values and equity for every vehicle in
+    `vehicles` under each what-if scenario in VALUATION_SCENARIOS (all of
+    them by default).
+    """
+    from ..utils.valuation import compute_valuations
+
+    available = settings.VALUATION_SCENARIOS
+    selected = {name: available[name] for name in (scenarios or available)}
+    return compute_valuations(garage_get_valuation_inputs(vehicles), settings.VALUATION_MODEL, selected)
@@ -1,9 +1,83 @@
 """DRF Serializers for my_garage API."""
-from rest_framework import serializers
-from my_garage.models import Vehicle, ServiceRecord, Upgrade, ConditionReport
-
+from typing import List, Sequence
 
-class VehicleSerializer(serializers.ModelSerializer):
+from django.conf import settings
+from django.core.exceptions import FieldDoesNotExist
+from django.db.models import Prefetch, QuerySet
+from django.utils.module_loading import import_string
+from rest_framework import serializers
+from my_garage.models import Vehicle, ServiceRecord, Upgrade, ConditionReport, SearchDocument, UploadSession
+from my_garage.utils.vin import VinError, clean_vehicle_vin
+
+
+class FieldsetSerializerMixin:
+    """
+    Sparse fieldsets and expansions for read endpoints. `fields` keeps only
+    the named fields; `expand` replaces each named relation with the nested
+    object, serialized by the class named in Meta.expandable_fields. Both are
+    constructor arguments (`FieldsetViewMixin` passes `?fields=` and
+    `?expand=`). `narrow_queryset` then loads only the columns, joins and
+    prefetches that the remaining fields read.
+    """
+
+    def __init__(self, *args, fields=None, expand=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        expand = list(expand or ())
+        expandable = getattr(self.Meta, 'expandable_fields', {})
+        unknown = sorted(set(expand) - set(expandable))
+        if unknown:
+            raise serializers.ValidationError({'expand': f"Cannot expand: {', '.join(unknown)}."})
+        for name in expand:
+            path, options = expandable[name]
+            self.fields[name] = import_string(path)(read_only=True, **options)
+
+        if fields:
+            unknown = sorted(set(fields) - set(self.fields))
+            if unknown:
+                raise serializers.ValidationError({'fields': f"Unknown field(s): {', '.join(unknown)}."})
+            for name in set(self.fields) - set(fields) - set(expand):
+                self.fields.pop(name)
+
+    def narrow_queryset(self, queryset: QuerySet, required: Sequence[str] = ()) -> QuerySet:
+        """
+        `queryset` limited to the columns and relations the fields read, plus
+        `required` columns. Left unchanged if a field reads something other
+        than model fields (a property, or the whole instance).
+        """
+        model = queryset.model
+        columns, joins, prefetches = ['pk', *required], [], []
+        for field in self.fields.values():
+            if field.source == '*':
+                return queryset
+            name, *rest = field.source.split('.')
+            try:
+                model_field = model._meta.get_field(name)
+            except FieldDoesNotExist:
+                return queryset
+            nested = getattr(field, 'child', field)
+            if model_field.many_to_one or (model_field.one_to_one and model_field.concrete):
+                columns.append(name)
+                if rest or isinstance(nested, serializers.BaseSerializer):
+                    joins.append(name)
+                    if isinstance(nested, FieldsetSerializerMixin):
+                        joins.extend(f"{name}__{join}" for join in nested.related_joins())
+            elif model_field.one_to_many:
+                related = model_field.related_model.objects.all()
+                if isinstance(nested, FieldsetSerializerMixin):
+                    related = nested.narrow_queryset(related, required=[model_field.field.name])
+                prefetches.append(Prefetch(name, queryset=related))
+            elif model_field.concrete and not model_field.is_relation:
+                columns.append(name)
+            else:
+                return queryset
+        return queryset.only(*columns).select_related(None).select_related(*joins).prefetch_related(*prefetches)
+
+    def related_joins(self) -> List[str]:
+        """Relations the fields read through, to `select_related` when this serializer is nested."""
+        return [field.source.split('.')[0] for field in self.fields.values() if '.' in field.source]
+
+
+class VehicleSerializer(FieldsetSerializerMixin, serializers.ModelSerializer):
     """Serializer for Vehicle model."""
 
     owner_username = serializers.CharField(source='owner.username', read_only=True)
@@ -15,9 +89,20 @@ class VehicleSerializer(serializers.ModelSerializer):
             'purchase_price', 'current_market_value', 'mileage', 'created_at'
         ]
         read_only_fields = ['owner', 'created_at']
+        expandable_fields = {
+            'services': ('my_garage.api.serializers.ServiceRecordSerializer', {'many': True}),
+            'upgrades': ('my_garage.api.serializers.UpgradeSerializer', {'many': True}),
+            'condition_reports': ('my_garage.api.serializers.ConditionReportSerializer', {'many': True}),
+        }
 
+    def validate_vin(self, vin):
+        try:
+            return clean_vehicle_vin(vin)
+        except VinError as exc:
+            raise serializers.ValidationError(str(exc))
 
-class ServiceRecordSerializer(serializers.ModelSerializer):
+
+class ServiceRecordSerializer(FieldsetSerializerMixin, serializers.ModelSerializer):
     """Serializer for ServiceRecord model."""
 
     vehicle_display = serializers.CharField(source='vehicle.__str__', read_only=True)
@@ -29,22 +114,106 @@ class ServiceRecordSerializer(serializers.ModelSerializer):
             'category', 'total_cost', 'receipt_image', 'ocr_raw_data', 'is_verified'
         ]
         read_only_fields = ['ocr_raw_data']
+        expandable_fields = {'vehicle': ('my_garage.api.serializers.VehicleSerializer', {})}
 
 
-class UpgradeSerializer(serializers.ModelSerializer):
+class UpgradeSerializer(FieldsetSerializerMixin, serializers.ModelSerializer):
     """Serializer for Upgrade model."""
 
     vehicle_display = serializers.CharField(source='vehicle.__str__', read_only=True)
+    tracked_price = serializers.DecimalField(
+        source='tracked_part.last_price', max_digits=10, decimal_places=2, read_only=True, default=None
+    )
 
     class Meta:
         model = Upgrade
         fields = [
             'id', 'vehicle', 'vehicle_display', 'part_name', 'brand', 'part_number',
-            'status', 'cost', 'installation_date', 'notes'
+            'category', 'status', 'stage', 'cost', 'installation_date', 'notes', 'tracked_price'
         ]
+        expandable_fields = {'vehicle': ('my_garage.api.serializers.VehicleSerializer', {})}
+
+
+class UpgradeTransitionSerializer(serializers.Serializer):
+    """Input for moving many upgrades of one vehicle to a new status."""
+
+    status = serializers.ChoiceField(choices=Upgrade.STATUS_CHOICES)
+    ids = serializers.ListField(child=serializers.IntegerField(), required=False, allow_empty=False, max_length=1000)
+    stage = serializers.IntegerField(required=False, min_value=1)
+    installation_date = serializers.DateField(required=False)
+
+    def validate(self, attrs):
+        if ('ids' in attrs) == ('stage' in attrs):
+            raise serializers.ValidationError("Provide either ids or stage.")
+        return attrs
+
+
+class VinDecodeSerializer(serializers.Serializer):
+    """Input for decoding a batch of VINs."""
+
+    vins = serializers.ListField(child=serializers.CharField(max_length=32), allow_empty=False)
+
+    def validate_vins(self, vins):
+        if len(vins) > settings.VIN_DECODE_BATCH_MAX:
+            raise serializers.ValidationError(f"At most {settings.VIN_DECODE_BATCH_MAX} VINs per request.")
+        return vins
+
+
+class BatchOperationSerializer(serializers.Serializer):
+    """One create, update or delete in a batch request."""
+
+    op = serializers.ChoiceField(choices=['create', 'update', 'delete'])
+    resource = serializers.CharField()
+    id = serializers.IntegerField(required=False)
+    ref = serializers.RegexField(r'^\w{1,50}$', required=False)
+    data = serializers.DictField(required=False, default=dict)
+
+    def validate_resource(self, resource):
+        if resource not in self.context['resources']:
+            raise serializers.ValidationError(f"One of: {', '.join(self.context['resources'])}.")
+        return resource
+
+    def validate(self, attrs):
+        if (attrs['op'] == 'create') == ('id' in attrs):
+            raise serializers.ValidationError("id is required for update and delete, and not allowed for create.")
+        if 'ref' in attrs and attrs['op'] != 'create':
+            raise serializers.ValidationError("Only a create can have a ref.")
+        return attrs
 
 
-class ConditionReportSerializer(serializers.ModelSerializer):
+class BatchSerializer(serializers.Serializer):
+    """
+    Input for a batch request. A `{"$ref": "<ref>"}` value in an operation's
+    data stands for the id of the earlier create with that ref; any other
+    value, including text starting with "$", is passed through unchanged.
+    """
+
+    operations = BatchOperationSerializer(many=True, allow_empty=False)
+
+    @staticmethod
+    def ref_name(value):
+        """The ref that `value` points at, or None if it is plain data."""
+        if isinstance(value, dict) and value.keys() == {'$ref'}:
+            return value['$ref']
+        return None
+
+    def validate_operations(self, operations):
+        if len(operations) > settings.BATCH_MAX_OPERATIONS:
+            raise serializers.ValidationError(f"At most {settings.BATCH_MAX_OPERATIONS} operations per request.")
+        refs = set()
+        for position, operation in enumerate(operations):
+            for value in operation['data'].values():
+                name = self.ref_name(value)
+                if name is not None and name not in refs:
+                    raise serializers.ValidationError(f"Operation {position}: {name!r} is not an earlier ref.")
+            if 'ref' in operation:
+                if operation['ref'] in refs:
+                    raise serializers.ValidationError(f"Operation {position}: duplicate ref {operation['ref']}.")
+                refs.add(operation['ref'])
+        return operations
+
+
+class ConditionReportSerializer(FieldsetSerializerMixin, serializers.ModelSerializer):
     """Serializer for ConditionReport model."""
 
     vehicle_display = serializers.CharField(source='vehicle.__str__', read_only=True)
@@ -56,3 +225,31 @@ class ConditionReportSerializer(serializers.ModelSerializer):
             'grade', 'ai_feedback', 'value_adjustment', 'created_at'
         ]
         read_only_fields = ['created_at']
+        expandable_fields = {'vehicle': ('my_garage.api.serializers.VehicleSerializer', {})}
+
+
+class SearchResultSerializer(serializers.ModelSerializer):
+    """Serializer for ranked search hits."""
+
+    rank = serializers.FloatField(read_only=True)
+
+    class Meta:
+        model = SearchDocument
+        fields = ['kind', 'object_id', 'vehicle', 'vehicle_label', 'title', 'body', 'rank']
+
+
+class UploadSessionSerializer(serializers.ModelSerializer):
+    """Serializer for resumable upload sessions; bytes are sent separately."""
+
+    class Meta:
+        model = UploadSession
+        fields = [
+            'id', 'vehicle', 'purpose', 'filename', 'content_type', 'size',
+            'offset', 'status', 'service_record', 'error', 'created_at'
+        ]
+        read_only_fields = ['offset', 'status', 'service_record', 'error', 'created_at']
+
+    def validate_vehicle(self, vehicle):
+        if vehicle.owner_id != self.context['request'].user.id:
+            raise serializers.ValidationError("Vehicle not found.")
+        return vehicle
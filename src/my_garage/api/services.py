@@ -1,15 +1,59 @@
-import requests
+import datetime
+import hashlib
+import json
+import logging
+import os
+import re
+import uuid
 from django.conf import settings
-from django.db import transaction
-from decimal import Decimal
-from typing import Dict, Any, Optional
+from django.core.cache import cache
+from django.core.files import File
+from django.db import IntegrityError, transaction
+from django.db.models import Count, Exists, F, OuterRef, Sum
+from django.dispatch import Signal
+from django.db.models.functions import TruncMonth
+from django.utils import timezone
+from django.utils.dateparse import parse_date
+from decimal import Decimal, InvalidOperation
+from typing import Dict, Any, List, Optional, Sequence, Tuple
 
-from my_garage.models import Vehicle, ServiceRecord, Upgrade, ConditionReport
+from my_garage.models import (
+    Vehicle,
+    ServiceRecord,
+    Upgrade,
+    ConditionReport,
+    SearchDocument,
+    ServiceCostRollup,
+    ValuationEvent,
+    UploadSession,
+    TrackedPart,
+    PartPricePoint,
+    MarketListing,
+    MarketCohort,
+)
+from .selectors import market_listing_get_price_stats, vehicle_change_stamp_key
+from ..utils import uploads as upload_staging
+from ..utils.db import close_stale_connections
 from ..utils.mongo import get_collection
+from ..utils.ratelimit import acquire as rate_limit_acquire
+from ..utils.storage import supports_direct_access
+from ..utils.vin import VinError, get_vin_index
 
-# Configuration from settings (set via Pixi/env)
-FASTAPI_BASE_URL = settings.FASTAPI_BASE_URL
-MCP_EXECUTE_URL = f"{FASTAPI_BASE_URL}/mcp/execute"
+# FastAPI service endpoints, under settings.FASTAPI_BASE_URL (see _fastapi_url).
+# `requests` is imported by the functions that call them: importing it here
+# would put it on the startup path of every process, since signals import
+# this module.
+MCP_EXECUTE_PATH = "/mcp/execute"
+OCR_PATH = "/ocr/process"
+OCR_BATCH_PATH = "/ocr/process-batch"
+OCR_OBJECT_PATH = "/ocr/process-object"
+OCR_OBJECT_BATCH_PATH = "/ocr/process-batch-objects"
+
+logger = logging.getLogger(__name__)
+
+
+def _fastapi_url(path: str) -> str:
+    return f"{settings.FASTAPI_BASE_URL}{path}"
 
 
 class VehicleServiceError(Exception):
@@ -17,44 +61,234 @@ class VehicleServiceError(Exception):
     pass
 
 
-@transaction.atomic
+class UploadError(Exception):
+    """An upload request that doesn't fit the session's state or limits."""
+    pass
+
+
 def vehicle_update_market_valuation(vehicle: Vehicle) -> Decimal:
     """
-    Triggers the Web MCP agent to find comparable listings and
-    updates the vehicle's current_market_value.
+    Values `vehicle` at the median price of comparable listings (same make
+    and model, within a model year) in the local listings warehouse, after
+    topping up any of those model years that are stale from the Web MCP agent.
+    """
+    year_min, year_max = vehicle.year - 1, vehicle.year + 1
+    market_cohort_refresh(vehicle.make, vehicle.model, year_min, year_max)
+    stats = market_listing_get_price_stats(vehicle.make, vehicle.model, year_min, year_max,
+                                           trim=vehicle.trim, mileage=vehicle.mileage or None)
+    if not stats['count']:
+        vehicle.valuation_updated_at = timezone.now()
+        vehicle.save(update_fields=['valuation_updated_at'])
+        return vehicle.current_market_value
+
+    # Record the new value and stamp the refresh
+    vehicle_record_valuation(vehicle, 'MARKET', stats['median'], absolute=True,
+                             valuation_updated_at=timezone.now())
+    return stats['median']
+
+
+def _market_key(value: Any) -> str:
+    return str(value or '').strip().lower()
+
+
+def market_listing_hash(url: str) -> str:
+    return hashlib.sha256(url.strip().encode()).hexdigest()
+
+
+def market_listing_ingest(listings: Sequence[Dict[str, Any]], now: Optional[datetime.datetime] = None) -> int:
+    """
+    Upserts listings as returned by `search_market_listings`, one row per
+    URL: a listing seen again gets its latest price, mileage and sold date.
+    Listings missing a URL, make, model, year or price are skipped.
+    Returns the number of rows written.
+    """
+    now = now or timezone.now()
+    rows = {}
+    for listing in listings:
+        url = str(listing.get('url') or '').strip()
+        make, model = _market_key(listing.get('make')), _market_key(listing.get('model'))
+        try:
+            year = int(listing['year'])
+            price = Decimal(str(listing['price'])).quantize(Decimal('0.01'))
+            mileage = int(listing['mileage']) if listing.get('mileage') not in (None, '') else None
+            sold_date = parse_date(str(listing['sold_date'])) if listing.get('sold_date') else None
+        except (KeyError, TypeError, ValueError, InvalidOperation):
+            continue
+        if not (url and make and model):
+            continue
+        url_hash = market_listing_hash(url)
+        rows[url_hash] = MarketListing(
+            url_hash=url_hash, url=url[:500], source=str(listing.get('source') or '')[:100],
+            make=make, model=model, year=year, trim=_market_key(listing.get('trim')),
+            mileage=mileage, price=price, sold_date=sold_date, first_seen_at=now, last_seen_at=now,
+        )
+    MarketListing.objects.bulk_create(
+        rows.values(), batch_size=1000, update_conflicts=True, unique_fields=['url_hash'],
+        update_fields=['price', 'mileage', 'sold_date', 'source', 'last_seen_at'],
+    )
+    return len(rows)
+
+
+def market_cohort_refresh(make: str, model: str, year_min: int, year_max: int,
+                          now: Optional[datetime.datetime] = None) -> int:
+    """
+    Tops up the listings warehouse for `make` and `model`: model years from
+    `year_min` to `year_max` not fetched within MARKET_COHORT_TTL are asked
+    of the Web MCP agent in one call (all trims) and the results ingested.
+    Returns the number of listings ingested, 0 when every year was fresh.
     """
+    now = now or timezone.now()
+    fresh = set(MarketCohort.objects.filter(
+        make=_market_key(make), model=_market_key(model), year__range=(year_min, year_max),
+        fetched_at__gte=now - settings.MARKET_COHORT_TTL,
+    ).values_list('year', flat=True))
+    stale = [year for year in range(year_min, year_max + 1) if year not in fresh]
+    if not stale:
+        return 0
+
     payload = {
         "tool_name": "search_market_listings",
-        "arguments": {
-            "make": vehicle.make,
-            "model": vehicle.model,
-            "year_min": vehicle.year - 1,
-            "year_max": vehicle.year + 1,
-            "trim": vehicle.trim
-        }
+        "arguments": {"make": make, "model": model, "year_min": stale[0], "year_max": stale[-1]},
     }
 
+    import requests
+
+    rate_limit_acquire('mcp')
     try:
-        response = requests.post(MCP_EXECUTE_URL, json=payload, timeout=20)
+        response = requests.post(_fastapi_url(MCP_EXECUTE_PATH), json=payload, timeout=20)
         response.raise_for_status()
-        data = response.json()
+        listings = response.json().get('results', [])
+    except requests.RequestException as e:
+        raise VehicleServiceError(f"Failed to reach Valuation Engine: {str(e)}")
 
-        listings = data.get('results', [])
-        if not listings:
-            return vehicle.current_market_value
+    with transaction.atomic():
+        ingested = market_listing_ingest(listings, now)
+        MarketCohort.objects.bulk_create(
+            [MarketCohort(make=_market_key(make), model=_market_key(model), year=year, fetched_at=now)
+             for year in stale],
+            update_conflicts=True, unique_fields=['make', 'model', 'year'], update_fields=['fetched_at'],
+        )
+    return ingested
 
-        # Logic: Calculate median price from listings
-        prices = [Decimal(str(l['price'])) for l in listings]
-        median_price = sorted(prices)[len(prices) // 2]
 
-        # Update and save the vehicle
-        vehicle.current_market_value = median_price
-        vehicle.save(update_fields=['current_market_value'])
+@transaction.atomic
+def vehicle_record_valuation(vehicle: Vehicle, source: str, amount: Decimal, absolute: bool,
+                             **fields: Any) -> ValuationEvent:
+    """
+    Appends a ledger event and applies it to the cached current_market_value
+    in a single UPDATE: `amount` replaces the value if `absolute`, otherwise
+    it is added with an F() expression, so concurrent adjustments can't
+    overwrite each other. Extra `fields` are set in the same UPDATE.
+    `vehicle` is refreshed with the stored values.
+    """
+    vehicles = Vehicle.objects.filter(pk=vehicle.pk)
+    new_value = amount if absolute else F('current_market_value') + amount
+    vehicles.update(current_market_value=new_value, **fields)
+    # The UPDATE holds the row lock, so this is our write and nobody else's
+    value_after = vehicles.values_list('current_market_value', flat=True).get()
 
-        return median_price
+    vehicle.current_market_value = value_after
+    for name, value in fields.items():
+        setattr(vehicle, name, value)
+    vehicle_touch(vehicle.pk)
+    return ValuationEvent.objects.create(
+        vehicle=vehicle, source=source, amount=amount, is_absolute=absolute, value_after=value_after
+    )
+
+
+def vehicle_touch(*vehicle_ids: int) -> None:
+    """
+    Gives the vehicles new change stamps, expiring their cached dashboard and
+    detail fragments. The stamps change once the current transaction commits:
+    before that, a concurrent render would cache the old rows under the new
+    stamp. Save signals call this; services that write with update() or
+    bulk_update() call it themselves.
+    """
+    keys = [vehicle_change_stamp_key(pk) for pk in set(vehicle_ids)]
+    if keys:
+        transaction.on_commit(lambda: cache.set_many(
+            {key: uuid.uuid4().hex for key in keys}, settings.FRAGMENT_CACHE_TIMEOUT))
+
+
+def vehicle_log_valuation_event(vehicle: Vehicle, source: str) -> ValuationEvent:
+    """
+    Records a value that was already saved on `vehicle` (creation, admin or
+    API edits) as an absolute ledger event.
+    """
+    value = vehicle.current_market_value
+    return ValuationEvent.objects.create(
+        vehicle=vehicle, source=source, amount=value, is_absolute=True, value_after=value
+    )
+
+
+def _valuation_lock_key(vehicle_id: int) -> str:
+    return f"valuation:inflight:{vehicle_id}"
+
+
+def vehicle_enqueue_market_valuation(vehicle_id: int, **options: Any) -> Tuple[str, bool]:
+    """
+    Queues a valuation refresh unless one is already queued or running for
+    this vehicle. Returns (task_id, created): the new task's id, or the id of
+    the pending task when the request was coalesced into it.
+
+    The per-vehicle key is claimed with an atomic cache add (SET NX on Redis)
+    and expires after VALUATION_ENQUEUE_LOCK_TTL, so a lost worker can't block
+    refreshes forever. `options` are passed through to apply_async.
+    """
+    from my_garage.tasks import task_update_market_valuation, INTERACTIVE_TASK_OPTIONS
+
+    # Unless told otherwise (e.g. by the bulk refresh) this is a user waiting
+    options = options or INTERACTIVE_TASK_OPTIONS
+    key = _valuation_lock_key(vehicle_id)
+    for _ in range(2):
+        task_id = str(uuid.uuid4())
+        if cache.add(key, task_id, timeout=settings.VALUATION_ENQUEUE_LOCK_TTL):
+            try:
+                task_update_market_valuation.apply_async(args=(vehicle_id,), task_id=task_id, **options)
+            except Exception:
+                cache.delete(key)
+                raise
+            return task_id, True
+
+        existing = cache.get(key)
+        if existing is not None:
+            return existing, False
+        # The lock expired between add() and get(); try to claim it again
+
+    raise VehicleServiceError(f"Could not queue valuation for vehicle {vehicle_id}")
+
+
+def vehicle_release_market_valuation_lock(vehicle_id: int, task_id: str) -> None:
+    """
+    Frees the enqueue key once `task_id` has finished, unless a newer task
+    already owns it.
+    """
+    key = _valuation_lock_key(vehicle_id)
+    if cache.get(key) == task_id:
+        cache.delete(key)
 
-    except requests.RequestException as e:
-        raise VehicleServiceError(f"Failed to reach Valuation Engine: {str(e)}")
+
+def vehicle_decode_vin(vin: str) -> Dict[str, Any]:
+    """
+    Decodes `vin` offline (make, model, engine, model year, check digit);
+    raises VinError if it is malformed. Unknown manufacturers decode to blanks.
+    """
+    return get_vin_index().decode(vin).as_dict()
+
+
+def vehicle_decode_vins(vins: Sequence[str]) -> List[Dict[str, Any]]:
+    """
+    Decodes a batch of VINs, e.g. a fleet import, in order. A malformed VIN
+    yields `{'vin', 'valid': False, 'error'}` instead of failing the batch.
+    """
+    index = get_vin_index()
+    results = []
+    for vin in vins:
+        try:
+            results.append(index.decode(vin).as_dict())
+        except VinError as exc:
+            results.append({'vin': vin, 'valid': False, 'error': str(exc)})
+    return results
 
 
 def service_record_create_from_ocr(vehicle: Vehicle, receipt_image: Any) -> ServiceRecord:
@@ -65,6 +299,7 @@ def service_record_create_from_ocr(vehicle: Vehicle, receipt_image: Any) -> Serv
     # 1. Create the initial record with the image
     record = ServiceRecord.objects.create(
         vehicle=vehicle,
+        date=timezone.localdate(),  # Upload date until the receipt is read
         vendor="Processing...",
         description="Awaiting AI extraction",
         total_cost=0.00,
@@ -75,59 +310,178 @@ def service_record_create_from_ocr(vehicle: Vehicle, receipt_image: Any) -> Serv
     # 2. Trigger Celery task for OCR processing
     # Import locally to avoid circular import with tasks.py
     # Note: This import will work once files are moved to src/my_garage
-    from my_garage.tasks import task_process_receipt_ocr
+    from my_garage.tasks import task_process_receipt_ocr, INTERACTIVE_TASK_OPTIONS
     
     # Use on_commit to ensure DB record exists before task runs
-    transaction.on_commit(lambda: task_process_receipt_ocr.delay(record.id))
+    transaction.on_commit(lambda: task_process_receipt_ocr.apply_async(
+        args=(record.id,), **INTERACTIVE_TASK_OPTIONS))
 
     return record
 
 
+@transaction.atomic
+def service_record_create_batch_from_ocr(vehicle: Vehicle, receipt_images: Sequence[Any]) -> List[ServiceRecord]:
+    """
+    Initializes one service record per receipt and queues a single batch
+    OCR task for all of them.
+    """
+    records = [
+        ServiceRecord.objects.create(
+            vehicle=vehicle,
+            date=timezone.localdate(),
+            vendor="Processing...",
+            description="Awaiting AI extraction",
+            total_cost=0.00,
+            receipt_image=receipt_image,
+            is_verified=False
+        )
+        for receipt_image in receipt_images
+    ]
+
+    from my_garage.tasks import task_process_receipt_ocr_batch, INTERACTIVE_TASK_OPTIONS
+
+    record_ids = [record.id for record in records]
+    transaction.on_commit(lambda: task_process_receipt_ocr_batch.apply_async(
+        args=(record_ids,), **INTERACTIVE_TASK_OPTIONS))
+
+    return records
+
+
+def _service_record_store_ocr_result(record: ServiceRecord, ocr_data: Dict[str, Any]) -> None:
+    """
+    Stores the full OCR document in MongoDB and copies the summary fields
+    onto the service record, marking it verified. The receipt's date
+    replaces the upload date, so the save signals file the cost under the
+    month the work was done.
+    """
+    mongo_doc = ocr_data.copy()
+    mongo_doc['service_record_id'] = record.id
+    mongo_doc['vehicle_id'] = record.vehicle_id
+
+    collection = get_collection('ocr_documents')
+    result = collection.insert_one(mongo_doc)
+
+    # Update record with reference and summary data
+    record.ocr_raw_data = {"mongo_id": str(result.inserted_id)}
+    record.vendor = ocr_data.get('vendor', record.vendor)
+    record.description = ocr_data.get('description', record.description)
+    record.total_cost = Decimal(str(ocr_data.get('total_cost', record.total_cost)))
+    try:
+        receipt_date = parse_date(str(ocr_data.get('date') or ''))
+    except ValueError:  # Well formed but impossible, e.g. 2024-02-30
+        receipt_date = None
+    if receipt_date:
+        record.date = receipt_date
+    record.is_verified = True
+    record.save()
+
+    search_document_set_ocr_text(record, ocr_data.get('line_items') or [])
+
+
+def _ocr_reads_from_storage(record: ServiceRecord) -> bool:
+    return bool(record.receipt_image) and supports_direct_access(record.receipt_image.storage)
+
+
+def _ocr_object_ref(record: ServiceRecord) -> Dict[str, str]:
+    """The receipt's storage key and a presigned URL the OCR service can read it from."""
+    return {'key': record.receipt_image.name, 'url': record.receipt_image.url}
+
+
 def service_record_process_ocr_data(record: ServiceRecord) -> bool:
     """
     Processes OCR data for a service record by calling FastAPI OCR service.
     Returns True if successful, False otherwise.
     """
+    import requests
+
     try:
-        # Call FastAPI OCR endpoint
-        ocr_url = f"{FASTAPI_BASE_URL}/ocr/process"
-        # Ensure file pointer is at start
-        if hasattr(record.receipt_image, 'open'):
-            record.receipt_image.open('rb')
-        
-        files = {'file': record.receipt_image}
+        rate_limit_acquire('ocr')
+        if _ocr_reads_from_storage(record):
+            # The OCR service downloads the image itself
+            response = requests.post(_fastapi_url(OCR_OBJECT_PATH), json=_ocr_object_ref(record), timeout=30)
+        else:
+            # Call FastAPI OCR endpoint
+            ocr_url = _fastapi_url(OCR_PATH)
+            # Ensure file pointer is at start
+            if hasattr(record.receipt_image, 'open'):
+                record.receipt_image.open('rb')
 
-        response = requests.post(ocr_url, files=files, timeout=30)
+            files = {'file': record.receipt_image}
+            response = requests.post(ocr_url, files=files, timeout=30)
         response.raise_for_status()
 
-        ocr_data = response.json()
-
-        # Store heavy OCR data in MongoDB
-        mongo_doc = ocr_data.copy()
-        mongo_doc['service_record_id'] = record.id
-        mongo_doc['vehicle_id'] = record.vehicle_id
-        
-        collection = get_collection('ocr_documents')
-        result = collection.insert_one(mongo_doc)
-
-        # Update record with reference and summary data
-        record.ocr_raw_data = {"mongo_id": str(result.inserted_id)}
-        record.vendor = ocr_data.get('vendor', record.vendor)
-        record.description = ocr_data.get('description', record.description)
-        record.total_cost = Decimal(str(ocr_data.get('total_cost', record.total_cost)))
-        record.is_verified = True
-        record.save()
-
+        _service_record_store_ocr_result(record, response.json())
         return True
 
     except (requests.RequestException, ValueError, KeyError) as e:
-        # Log error and return False
-        import logging
-        logger = logging.getLogger(__name__)
         logger.error(f"OCR processing failed for record {record.id}: {str(e)}")
         return False
 
 
+def _service_record_process_ocr_chunk(records: List[ServiceRecord], outcomes: Dict[int, bool]) -> None:
+    """
+    Posts one request for `records` to the batch OCR endpoint and applies
+    each NDJSON result line as soon as it arrives. Images are sent as
+    multipart files, or as storage references when the OCR service can
+    fetch them itself.
+    """
+    import requests
+
+    by_reference = all(_ocr_reads_from_storage(record) for record in records)
+    if by_reference:
+        request_kwargs = {'json': {'objects': [_ocr_object_ref(record) for record in records]}}
+    else:
+        files = []
+        for record in records:
+            record.receipt_image.open('rb')
+            files.append(('files', (os.path.basename(record.receipt_image.name), record.receipt_image)))
+        request_kwargs = {'files': files}
+
+    try:
+        rate_limit_acquire('ocr', tokens=len(records))
+        url = _fastapi_url(OCR_OBJECT_BATCH_PATH if by_reference else OCR_BATCH_PATH)
+        with requests.post(url, timeout=30, stream=True, **request_kwargs) as response:
+            response.raise_for_status()
+            for line in response.iter_lines():
+                if not line:
+                    continue
+                item = json.loads(line)
+                record = records[item['index']]
+                if not item.get('ok'):
+                    logger.warning(f"OCR failed for record {record.id}: {item.get('error')}")
+                    continue
+                _service_record_store_ocr_result(record, item['result'])
+                outcomes[record.id] = True
+    finally:
+        if not by_reference:
+            for record in records:
+                record.receipt_image.close()
+
+
+def service_record_process_ocr_batch(records: List[ServiceRecord]) -> Dict[int, bool]:
+    """
+    Processes many receipts through the batch OCR endpoint, OCR_BATCH_SIZE
+    images per request. Returns a mapping of record id to success.
+    """
+    import requests
+
+    outcomes = {record.id: False for record in records}
+    pending = [record for record in records if record.receipt_image]
+    batch_size = settings.OCR_BATCH_SIZE
+
+    for start in range(0, len(pending), batch_size):
+        chunk = pending[start:start + batch_size]
+        close_stale_connections()
+        try:
+            _service_record_process_ocr_chunk(chunk, outcomes)
+        except (requests.RequestException, ValueError, KeyError, IndexError) as e:
+            # Results already streamed back for this chunk have been kept
+            ids = [record.id for record in chunk if not outcomes[record.id]]
+            logger.error(f"Batch OCR processing failed for records {ids}: {str(e)}")
+
+    return outcomes
+
+
 @transaction.atomic
 def condition_report_add_ai_grade(
         vehicle: Vehicle,
@@ -150,8 +504,7 @@ def condition_report_add_ai_grade(
     )
 
     # Adjust the vehicle's market value based on the AI's impact assessment
-    vehicle.current_market_value += impact
-    vehicle.save(update_fields=['current_market_value'])
+    vehicle_record_valuation(vehicle, 'CONDITION', impact, absolute=False)
 
     return report
 
@@ -161,7 +514,506 @@ def upgrade_install_part(upgrade: Upgrade, cost: Optional[Decimal] = None) -> Up
     Moves a part from Wishlist/Ordered to Installed and logs final cost.
     """
     upgrade.status = 'INSTALLED'
+    if upgrade.installation_date is None:
+        upgrade.installation_date = timezone.localdate()
     if cost:
         upgrade.cost = cost
-    upgrade.save()
-    return upgrade
\ No newline at end of file
+    upgrade.save(update_fields=['status', 'installation_date', 'cost'])
+    return upgrade
+
+
+@transaction.atomic
+def upgrade_bulk_transition(
+        vehicle: Vehicle,
+        status: str,
+        upgrade_ids: Optional[Sequence[int]] = None,
+        stage: Optional[int] = None,
+        installation_date: Optional[datetime.date] = None
+) -> List[Upgrade]:
+    """
+    Moves the vehicle's upgrades with `upgrade_ids`, or every upgrade in build
+    `stage`, to `status` with one locked read and one bulk UPDATE. Installing
+    stamps `installation_date` (today by default) where none is set yet.
+    Parts already in `status` are left alone. Returns the upgrades changed.
+
+    bulk_update skips save signals; that's safe here because status and
+    installation date aren't part of the search index, and valuations read
+    installed upgrades at query time, so nothing per part needs refreshing.
+    Only the vehicle's cached page fragments are expired.
+    """
+    if (upgrade_ids is None) == (stage is None):
+        raise ValueError("Pass either upgrade_ids or stage")
+    upgrades = Upgrade.objects.select_for_update().filter(vehicle=vehicle).exclude(status=status)
+    if upgrade_ids is not None:
+        upgrades = upgrades.filter(pk__in=upgrade_ids)
+    else:
+        upgrades = upgrades.filter(stage=stage)
+
+    changed = list(upgrades.order_by('pk').only('pk', 'vehicle_id', 'status', 'installation_date'))
+    fields = ['status']
+    if status == 'INSTALLED':
+        fields.append('installation_date')
+        installation_date = installation_date or timezone.localdate()
+    for upgrade in changed:
+        upgrade.status = status
+        if status == 'INSTALLED' and upgrade.installation_date is None:
+            upgrade.installation_date = installation_date
+    Upgrade.objects.bulk_update(changed, fields, batch_size=500)
+    if changed:
+        vehicle_touch(vehicle.pk)
+    return changed
+
+SEARCH_KINDS = {
+    ServiceRecord: 'SERVICE',
+    Upgrade: 'UPGRADE',
+    ConditionReport: 'CONDITION',
+}
+
+
+def _search_document_text(instance: Any) -> Dict[str, str]:
+    """The indexed title/body for a service record, upgrade or condition report."""
+    if isinstance(instance, ServiceRecord):
+        return {'title': instance.vendor, 'body': instance.description}
+    if isinstance(instance, Upgrade):
+        return {
+            'title': instance.part_name,
+            'body': ' '.join(filter(None, [instance.brand, instance.part_number, instance.notes])),
+        }
+    return {'title': instance.get_area_display(), 'body': instance.ai_feedback}
+
+
+def _vehicle_label(vehicle: Vehicle) -> str:
+    return ' '.join(filter(None, [str(vehicle.year), vehicle.make, vehicle.model, vehicle.trim]))
+
+
+def search_document_sync(instance: Any) -> SearchDocument:
+    """
+    Creates or refreshes the search document for a service record, upgrade or
+    condition report. OCR text is left as it was.
+    """
+    vehicle = instance.vehicle
+    document, _ = SearchDocument.objects.update_or_create(
+        kind=SEARCH_KINDS[type(instance)],
+        object_id=instance.pk,
+        defaults={
+            **_search_document_text(instance),
+            'owner_id': vehicle.owner_id,
+            'vehicle_id': vehicle.pk,
+            'vehicle_label': _vehicle_label(vehicle),
+        },
+    )
+    return document
+
+
+def search_document_delete(instance: Any) -> None:
+    """Removes the search document of a deleted record."""
+    SearchDocument.objects.filter(kind=SEARCH_KINDS[type(instance)], object_id=instance.pk).delete()
+
+
+def search_document_set_ocr_text(record: ServiceRecord, line_items: List[Dict[str, Any]]) -> None:
+    """Indexes the line item descriptions extracted from a record's receipt."""
+    descriptions = dict.fromkeys(str(item.get('description', '')).strip() for item in line_items)
+    SearchDocument.objects.filter(kind='SERVICE', object_id=record.pk).update(
+        ocr_text=' '.join(filter(None, descriptions))
+    )
+
+
+def search_document_sync_vehicle(vehicle: Vehicle) -> int:
+    """
+    Carries a vehicle's owner and label over to its search documents.
+    A single UPDATE that touches nothing when neither has changed.
+    """
+    label = _vehicle_label(vehicle)
+    return SearchDocument.objects.filter(vehicle=vehicle).exclude(
+        owner_id=vehicle.owner_id, vehicle_label=label
+    ).update(owner_id=vehicle.owner_id, vehicle_label=label)
+
+
+def search_rebuild_index(batch_size: int = 5000) -> int:
+    """
+    Rebuilds every search document from scratch, e.g. after bulk loads that
+    bypass signals. OCR text only arrives when a receipt is processed, so the
+    existing text is carried over. Returns the number of documents written.
+    """
+    ocr_text = dict(
+        SearchDocument.objects.filter(kind='SERVICE').exclude(ocr_text='').values_list('object_id', 'ocr_text')
+    )
+    labels = {
+        vehicle.pk: (vehicle.owner_id, _vehicle_label(vehicle))
+        for vehicle in Vehicle.objects.only('id', 'owner_id', 'year', 'make', 'model', 'trim').iterator()
+    }
+
+    written = 0
+    with transaction.atomic():
+        SearchDocument.objects.all().delete()
+        for model, kind in SEARCH_KINDS.items():
+            batch = []
+            for instance in model.objects.order_by().iterator(chunk_size=batch_size):
+                owner_id, label = labels[instance.vehicle_id]
+                batch.append(SearchDocument(
+                    kind=kind,
+                    object_id=instance.pk,
+                    owner_id=owner_id,
+                    vehicle_id=instance.vehicle_id,
+                    vehicle_label=label,
+                    ocr_text=ocr_text.get(instance.pk, '') if kind == 'SERVICE' else '',
+                    **_search_document_text(instance),
+                ))
+                if len(batch) >= batch_size:
+                    SearchDocument.objects.bulk_create(batch)
+                    written += len(batch)
+                    batch = []
+            if batch:
+                SearchDocument.objects.bulk_create(batch)
+                written += len(batch)
+    return written
+
+
+def _cost_rollup_apply(vehicle_id: int, month: datetime.date, category: str, amount: Decimal, count: int) -> None:
+    """Adds `amount`/`count` to one rollup bucket with a single UPDATE, creating it on first use."""
+    bucket = ServiceCostRollup.objects.filter(vehicle_id=vehicle_id, month=month, category=category)
+    changes = {'total': F('total') + amount, 'record_count': F('record_count') + count}
+    if bucket.update(**changes):
+        if count < 0:
+            bucket.filter(record_count__lte=0).delete()
+        return
+    if count <= 0:
+        # Nothing to subtract from (e.g. the vehicle is being deleted)
+        return
+    try:
+        with transaction.atomic():
+            ServiceCostRollup.objects.create(
+                vehicle_id=vehicle_id, month=month, category=category, total=amount, record_count=count
+            )
+    except IntegrityError:
+        # A concurrent save created the bucket first
+        bucket.update(**changes)
+
+
+def _cost_rollup_contribution(vehicle_id: int, date: Any, category: str,
+                              total_cost: Any) -> Tuple[Tuple[int, datetime.date, str], Decimal]:
+    date = ServiceRecord._meta.get_field('date').to_python(date)
+    return (vehicle_id, date.replace(day=1), category), Decimal(str(total_cost))
+
+
+def service_record_update_cost_rollup(previous: Optional[Dict[str, Any]], record: Optional[ServiceRecord]) -> None:
+    """
+    Moves a record's contribution between rollup buckets. `previous` holds
+    the record's stored vehicle_id/date/category/total_cost/is_verified
+    before the change (None if new); `record` is None when it was deleted.
+    Only verified records count, matching the build summary.
+    """
+    deltas: Dict[Tuple[int, datetime.date, str], List] = {}
+    if previous and previous['is_verified']:
+        key, amount = _cost_rollup_contribution(
+            previous['vehicle_id'], previous['date'], previous['category'], previous['total_cost'])
+        deltas[key] = [-amount, -1]
+    if record is not None and record.is_verified:
+        key, amount = _cost_rollup_contribution(record.vehicle_id, record.date, record.category, record.total_cost)
+        delta = deltas.setdefault(key, [Decimal('0'), 0])
+        delta[0] += amount
+        delta[1] += 1
+
+    with transaction.atomic():
+        for (vehicle_id, month, category), (amount, count) in deltas.items():
+            if amount or count:
+                _cost_rollup_apply(vehicle_id, month, category, amount, count)
+
+
+def service_cost_rollup_rebuild(vehicle_ids: Optional[Sequence[int]] = None, batch_size: int = 5000) -> int:
+    """
+    Recomputes rollups from the service records (all vehicles by default),
+    e.g. after bulk loads that bypass signals. Returns the number of buckets.
+    """
+    records = ServiceRecord.objects.filter(is_verified=True)
+    rollups = ServiceCostRollup.objects.all()
+    if vehicle_ids is not None:
+        records = records.filter(vehicle_id__in=vehicle_ids)
+        rollups = rollups.filter(vehicle_id__in=vehicle_ids)
+
+    buckets = (
+        records.annotate(month=TruncMonth('date'))
+        .values('vehicle_id', 'month', 'category')
+        .annotate(total=Sum('total_cost'), record_count=Count('id'))
+        .order_by()
+    )
+    with transaction.atomic():
+        rollups.delete()
+        created = ServiceCostRollup.objects.bulk_create(
+            [ServiceCostRollup(**bucket) for bucket in buckets.iterator(chunk_size=batch_size)],
+            batch_size=batch_size,
+        )
+    return len(created)
+
+
+def upload_session_create(owner: Any, vehicle: Vehicle, filename: str, size: int,
+                          content_type: str = '', purpose: str = 'RECEIPT') -> UploadSession:
+    """
+    Opens a resumable upload of `size` bytes. Raises UploadError when the
+    file is larger than UPLOAD_MAX_SIZE.
+    """
+    if size <= 0 or size > settings.UPLOAD_MAX_SIZE:
+        raise UploadError(f"Uploads must be between 1 and {settings.UPLOAD_MAX_SIZE} bytes")
+    session = UploadSession.objects.create(
+        owner=owner, vehicle=vehicle, purpose=purpose, filename=os.path.basename(filename),
+        content_type=content_type, size=size,
+    )
+    upload_staging.create_staging_file(session.pk)
+    return session
+
+
+# The file field each upload purpose ends up in
+UPLOAD_FIELDS = {
+    'RECEIPT': ServiceRecord._meta.get_field('receipt_image'),
+}
+
+
+def upload_session_create_direct(owner: Any, vehicle: Vehicle, filename: str, size: int,
+                                 content_type: str = '', purpose: str = 'RECEIPT') -> Tuple[UploadSession, Dict[str, Any]]:
+    """
+    Opens an upload the client sends straight to media storage. Returns the
+    session and the presigned POST (`url` and form `fields`) to send it with.
+    Raises UploadError when the storage backend can't accept direct uploads
+    or the file is larger than UPLOAD_MAX_SIZE.
+    """
+    field = UPLOAD_FIELDS[purpose]
+    if not supports_direct_access(field.storage):
+        raise UploadError("Direct uploads need S3 media storage; use a chunked upload instead")
+    if size <= 0 or size > settings.UPLOAD_MAX_SIZE:
+        raise UploadError(f"Uploads must be between 1 and {settings.UPLOAD_MAX_SIZE} bytes")
+
+    filename = os.path.basename(filename)
+    # Unique up front: the key can't be adjusted after the client has written it
+    key = field.generate_filename(None, f"{uuid.uuid4().hex}-{filename}")
+    session = UploadSession.objects.create(
+        owner=owner, vehicle=vehicle, purpose=purpose, filename=filename,
+        content_type=content_type, size=size, storage_key=key,
+    )
+    return session, field.storage.presigned_post(key, size, content_type)
+
+
+@transaction.atomic
+def upload_session_append_chunk(session_id: Any, offset: int, stream: Any, length: int) -> UploadSession:
+    """
+    Appends a chunk starting at byte `offset`, streaming it from `stream` to
+    the staging file. The session row is locked for the copy so concurrent
+    retries of the same chunk can't interleave. Raises UploadError when the
+    session isn't accepting data or the chunk doesn't fit, and
+    UploadOffsetMismatch when `offset` isn't where the upload stands.
+    """
+    session = UploadSession.objects.select_for_update().get(pk=session_id)
+    if session.storage_key:
+        raise UploadError("This upload goes straight to storage with its presigned POST")
+    if session.status != 'UPLOADING':
+        raise UploadError(f"Upload is {session.get_status_display().lower()}")
+    if offset != session.offset:
+        raise upload_staging.UploadOffsetMismatch(session.offset, offset)
+    if length > settings.UPLOAD_MAX_CHUNK_SIZE or offset + length > session.size:
+        raise UploadError(
+            f"Chunks are at most {settings.UPLOAD_MAX_CHUNK_SIZE} bytes and may not exceed the declared size"
+        )
+
+    session.offset = upload_staging.append_chunk(session.pk, offset, stream, length)
+    session.save(update_fields=['offset', 'updated_at'])
+    return session
+
+
+@transaction.atomic
+def upload_session_finalize(session_id: Any) -> UploadSession:
+    """
+    Marks a fully received upload for processing and queues the hand-off to
+    its pipeline. Direct uploads are checked in storage and handed off right
+    away, since no bytes need moving. Finalizing twice is a no-op.
+    """
+    session = UploadSession.objects.select_for_update().get(pk=session_id)
+    if session.status != 'UPLOADING':
+        return session
+    if session.storage_key:
+        storage = UPLOAD_FIELDS[session.purpose].storage
+        if not storage.exists(session.storage_key) or storage.size(session.storage_key) != session.size:
+            raise UploadError("The file has not been uploaded to storage yet")
+        session.offset = session.size
+        return upload_session_complete(session)
+    if session.offset != session.size:
+        raise UploadError(f"Upload is incomplete: {session.offset} of {session.size} bytes received")
+
+    session.status = 'PROCESSING'
+    session.save(update_fields=['status', 'updated_at'])
+
+    from my_garage.tasks import task_complete_upload, INTERACTIVE_TASK_OPTIONS
+    transaction.on_commit(lambda: task_complete_upload.apply_async(
+        args=(str(session.pk),), **INTERACTIVE_TASK_OPTIONS))
+    return session
+
+
+def upload_session_complete(session: UploadSession) -> UploadSession:
+    """
+    Moves a finalized upload from staging into media storage through the
+    pipeline for its purpose (receipts: service_record_create_from_ocr).
+    Direct uploads are already stored and are attached by key.
+    """
+    if session.storage_key:
+        with transaction.atomic():
+            session.service_record = service_record_create_from_ocr(session.vehicle, session.storage_key)
+            session.status = 'COMPLETE'
+            session.save(update_fields=['offset', 'service_record', 'status', 'updated_at'])
+        return session
+
+    path = upload_staging.staging_path(session.pk)
+    with transaction.atomic(), open(path, 'rb') as staged:
+        record = service_record_create_from_ocr(session.vehicle, File(staged, name=session.filename))
+        session.service_record = record
+        session.status = 'COMPLETE'
+        session.save(update_fields=['service_record', 'status', 'updated_at'])
+    upload_staging.delete_staging_file(session.pk)
+    return session
+
+
+def upload_session_fail(session: UploadSession, error: str) -> None:
+    session.status = 'FAILED'
+    session.error = error
+    session.save(update_fields=['status', 'error', 'updated_at'])
+    upload_staging.delete_staging_file(session.pk)
+
+
+def upload_session_purge_abandoned(max_age: Optional[datetime.timedelta] = None) -> int:
+    """
+    Deletes uploads that received no data for `max_age` (UPLOAD_SESSION_TTL by
+    default) and their staged bytes. Returns how many were removed.
+    """
+    cutoff = timezone.now() - (max_age or settings.UPLOAD_SESSION_TTL)
+    abandoned = UploadSession.objects.filter(status='UPLOADING', updated_at__lt=cutoff)
+    session_ids = []
+    for session_id, purpose, key in abandoned.values_list('pk', 'purpose', 'storage_key'):
+        if key:
+            UPLOAD_FIELDS[purpose].storage.delete(key)
+        else:
+            upload_staging.delete_staging_file(session_id)
+        session_ids.append(session_id)
+    UploadSession.objects.filter(pk__in=session_ids).delete()
+    return len(session_ids)
+
+
+# Sent once per tracked part whose price changed, with `part`, `previous`
+# (None on the first observation) and `price`.
+part_price_changed = Signal()
+
+
+def tracked_part_key(brand: str, part_number: str) -> Tuple[str, str]:
+    """
+    The identity of a part across users: "Brembo"/"gt-4 / 123" and
+    "BREMBO"/"GT4123" are the same part.
+    """
+    return ' '.join(brand.split()).upper(), re.sub(r'[^0-9A-Za-z]', '', part_number).upper()
+
+
+def tracked_part_get_or_create(brand: str, part_number: str, name: str = '') -> Optional[TrackedPart]:
+    """The shared TrackedPart for a brand/part number, or None if there's no part number to track."""
+    brand_key, number_key = tracked_part_key(brand, part_number)
+    if not number_key:
+        return None
+    try:
+        part, _ = TrackedPart.objects.get_or_create(
+            brand=brand_key, part_number=number_key,
+            defaults={'name': name, 'check_interval': settings.PART_PRICE_INITIAL_INTERVAL},
+        )
+    except IntegrityError:
+        # Another request created it between our lookup and insert
+        part = TrackedPart.objects.get(brand=brand_key, part_number=number_key)
+    return part
+
+
+def tracked_part_link_upgrades(batch_size: int = 1000) -> int:
+    """
+    Links wishlist upgrades that aren't linked yet (bulk-created rows skip
+    the save signal) to their tracked parts. Returns how many were linked.
+    """
+    pending = (Upgrade.objects.filter(status='WISHLIST', tracked_part__isnull=True)
+               .exclude(part_number='').only('pk', 'vehicle_id', 'brand', 'part_number', 'part_name'))
+    parts: Dict[Tuple[str, str], Optional[TrackedPart]] = {}
+    linked = []
+    for upgrade in pending.iterator(chunk_size=batch_size):
+        key = tracked_part_key(upgrade.brand, upgrade.part_number)
+        if key not in parts:
+            parts[key] = tracked_part_get_or_create(upgrade.brand, upgrade.part_number, upgrade.part_name)
+        if parts[key] is not None:
+            upgrade.tracked_part = parts[key]
+            linked.append(upgrade)
+    Upgrade.objects.bulk_update(linked, ['tracked_part'], batch_size=batch_size)
+    # Wishlists show the tracked price
+    vehicle_touch(*{upgrade.vehicle_id for upgrade in linked})
+    return len(linked)
+
+
+def _tracked_part_fetch_prices(parts: Sequence[TrackedPart]) -> Dict[Tuple[str, str], Optional[Decimal]]:
+    """Asks the Web MCP for the current lowest price of each part in one call."""
+    payload = {
+        "tool_name": "search_part_prices",
+        "arguments": {"parts": [{"brand": p.brand, "part_number": p.part_number} for p in parts]},
+    }
+    import requests
+
+    rate_limit_acquire('mcp')
+    response = requests.post(_fastapi_url(MCP_EXECUTE_PATH), json=payload, timeout=30)
+    response.raise_for_status()
+    prices = {}
+    for item in response.json().get('results', []):
+        price = item.get('lowest_price')
+        prices[(item['brand'], item['part_number'])] = Decimal(str(price)).quantize(Decimal('0.01')) if price else None
+    return prices
+
+
+def tracked_part_apply_price(part: TrackedPart, price: Optional[Decimal], now: datetime.datetime) -> bool:
+    """
+    Reschedules `part` after a poll that returned `price` (None: no offers).
+    Only a changed price is recorded (as a PartPricePoint) and announced;
+    the caller saves `last_price` and the schedule fields. Returns True if
+    the price changed.
+    """
+    changed = price is not None and price != part.last_price
+    if changed:
+        interval = part.check_interval / 2
+    else:
+        interval = part.check_interval * 1.5
+    part.check_interval = min(max(interval, settings.PART_PRICE_MIN_INTERVAL), settings.PART_PRICE_MAX_INTERVAL)
+    part.last_checked_at = now
+    part.next_check_at = now + part.check_interval
+    if changed:
+        previous, part.last_price = part.last_price, price
+        PartPricePoint.objects.create(part=part, price=price, observed_at=now)
+        part_price_changed.send(sender=TrackedPart, part=part, previous=previous, price=price)
+    return changed
+
+
+def tracked_part_poll_due(limit: Optional[int] = None, now: Optional[datetime.datetime] = None) -> Dict[str, int]:
+    """
+    Polls every tracked part that is due and still on someone's wishlist,
+    PART_PRICE_BATCH_SIZE parts per MCP call, so the cost scales with
+    distinct parts rather than wishlist rows. Returns poll/change counts.
+    """
+    import requests
+
+    now = now or timezone.now()
+    watched = Upgrade.objects.filter(tracked_part=OuterRef('pk'), status='WISHLIST')
+    due = list(
+        TrackedPart.objects.filter(Exists(watched), next_check_at__lte=now)
+        .order_by('next_check_at')[:limit or settings.PART_PRICE_POLL_LIMIT]
+    )
+
+    stats = {'polled': 0, 'changed': 0, 'failed': 0}
+    batch_size = settings.PART_PRICE_BATCH_SIZE
+    for start in range(0, len(due), batch_size):
+        batch = due[start:start + batch_size]
+        close_stale_connections()
+        try:
+            prices = _tracked_part_fetch_prices(batch)
+        except (requests.RequestException, ValueError, KeyError) as e:
+            logger.error(f"Price poll failed for {len(batch)} parts: {e}")
+            stats['failed'] += len(batch)
+            continue
+        with transaction.atomic():
+            for part in batch:
+                stats['changed'] += tracked_part_apply_price(part, prices.get((part.brand, part.part_number)), now)
+            TrackedPart.objects.bulk_update(batch, ['last_price', 'check_interval', 'last_checked_at', 'next_check_at'])
+        stats['polled'] += len(batch)
+    return stats
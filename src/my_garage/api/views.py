@@ -1,22 +1,95 @@
 """DRF ViewSets for my_garage API."""
-from rest_framework import viewsets, status
+import datetime
+import json
+import time
+
+from rest_framework import mixins, viewsets, status
 from rest_framework.decorators import action
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated
+from django.conf import settings
+from django.db import transaction
+from django.http import Http404, JsonResponse, StreamingHttpResponse
+from django.utils import timezone
+from rest_framework.exceptions import APIException
+from rest_framework.views import APIView
 
-from my_garage.models import Vehicle, ServiceRecord, Upgrade, ConditionReport
+from my_garage.models import Vehicle, ServiceRecord, Upgrade, ConditionReport, SearchDocument, UploadSession
+from my_garage.utils.events import get_event_bus, user_channel
+from my_garage.utils.routing import replica_reads
+from my_garage.utils.uploads import UploadOffsetMismatch
+from my_garage.utils.vin import VinError
 from .serializers import (
+    BatchSerializer,
     VehicleSerializer,
     ServiceRecordSerializer,
     UpgradeSerializer,
     ConditionReportSerializer,
+    SearchResultSerializer,
+    UploadSessionSerializer,
+    UpgradeTransitionSerializer,
+    VinDecodeSerializer,
+)
+from .services import (
+    UploadError,
+    upload_session_append_chunk,
+    upload_session_create,
+    upload_session_create_direct,
+    upload_session_finalize,
+    upgrade_bulk_transition,
+    vehicle_decode_vin,
+    vehicle_decode_vins,
+    vehicle_enqueue_market_valuation,
 )
-from .services import vehicle_update_market_valuation
-from .selectors import vehicle_get_build_summary
-from ..tasks import task_update_market_valuation
+from .selectors import (
+    vehicle_get_build_summary,
+    vehicle_get_cost_history,
+    vehicle_get_valuation_history,
+    tracked_part_get_price_history,
+    market_listing_get_price_stats,
+    garage_get_valuation,
+    search_documents,
+)
+
+
+class FieldsetViewMixin:
+    """
+    `?fields=id,make,year` and `?expand=vehicle` on list and retrieve (see
+    FieldsetSerializerMixin), with the queryset narrowed to match.
+    Other actions always see every field.
+    """
+
+    fieldset_actions = ('list', 'retrieve')
+
+    def _fieldset(self):
+        if self.action not in self.fieldset_actions:
+            return {}
+        params = self.request.query_params
+        return {
+            key: [name.strip() for value in params.getlist(key) for name in value.split(',') if name.strip()]
+            for key in ('fields', 'expand') if key in params
+        }
 
+    def get_serializer(self, *args, **kwargs):
+        kwargs.update(self._fieldset())
+        return super().get_serializer(*args, **kwargs)
 
-class VehicleViewSet(viewsets.ModelViewSet):
+    def filter_queryset(self, queryset):
+        queryset = super().filter_queryset(queryset)
+        if self.action in self.fieldset_actions:
+            queryset = self.get_serializer().narrow_queryset(queryset)
+        return queryset
+
+
+class ReplicaListMixin:
+    """Lets `list` read from a replica (see my_garage.utils.routing)."""
+
+    def list(self, request, *args, **kwargs):
+        with replica_reads():
+            return super().list(request, *args, **kwargs)
+
+
+class VehicleViewSet(FieldsetViewMixin, ReplicaListMixin, viewsets.ModelViewSet):
     """ViewSet for Vehicle CRUD operations."""
 
     queryset = Vehicle.objects.all()
@@ -39,10 +112,13 @@ class VehicleViewSet(viewsets.ModelViewSet):
         """Refresh market valuation for a vehicle."""
         vehicle = self.get_object()
         try:
-            # Trigger background task
-            task_update_market_valuation.delay(vehicle.id)
+            # Trigger background task (coalesced with any pending refresh)
+            task_id, created = vehicle_enqueue_market_valuation(vehicle.id)
             return Response({
-                'message': 'Valuation update queued successfully'
+                'message': ('Valuation update queued successfully' if created
+                            else 'Valuation update already in progress'),
+                'task_id': task_id,
+                'already_queued': not created,
             })
         except Exception as e:
             return Response(
@@ -50,18 +126,123 @@ class VehicleViewSet(viewsets.ModelViewSet):
                 status=status.HTTP_500_INTERNAL_SERVER_ERROR
             )
 
+    @staticmethod
+    def _build_summary_json(vehicle_id):
+        summary = vehicle_get_build_summary(vehicle_id)
+        # Convert Decimal to string for JSON
+        return {k: str(v) if isinstance(v, type(summary['equity'])) else v
+                for k, v in summary.items() if k != 'vehicle'}
+
     @action(detail=True, methods=['get'])
     def build_summary(self, request, pk=None):
         """Get comprehensive build summary."""
         vehicle = self.get_object()
-        summary = vehicle_get_build_summary(vehicle.id)
-        # Convert Decimal to string for JSON
-        summary_json = {k: str(v) if isinstance(v, type(summary['equity'])) else v
-                       for k, v in summary.items() if k != 'vehicle'}
-        return Response(summary_json)
+        return Response(self._build_summary_json(vehicle.id))
+
+    @action(detail=True, methods=['get'])
+    def market(self, request, pk=None):
+        """
+        Prices of comparable listings (same make and model, within a model
+        year) from the local listings warehouse, as used for the valuation.
+        """
+        vehicle = self.get_object()
+        return Response(market_listing_get_price_stats(
+            vehicle.make, vehicle.model, vehicle.year - 1, vehicle.year + 1,
+            trim=vehicle.trim, mileage=vehicle.mileage or None,
+        ))
+
+    @action(detail=True, methods=['post'], url_path='upgrades/transition')
+    def transition_upgrades(self, request, pk=None):
+        """
+        Move many upgrades to a status at once, e.g. install a whole build
+        stage: `{"status": "INSTALLED", "stage": 2}` or `{"status": "ORDERED",
+        "ids": [4, 7]}`. Responds with the changed upgrades and the new build summary.
+        """
+        vehicle = self.get_object()
+        serializer = UpgradeTransitionSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        data = serializer.validated_data
 
+        changed = upgrade_bulk_transition(
+            vehicle, data['status'], upgrade_ids=data.get('ids'), stage=data.get('stage'),
+            installation_date=data.get('installation_date'),
+        )
+        return Response({
+            'updated': [upgrade.pk for upgrade in changed],
+            'build_summary': self._build_summary_json(vehicle.id),
+        })
 
-class ServiceRecordViewSet(viewsets.ModelViewSet):
+    @action(detail=True, methods=['get'])
+    def cost_history(self, request, pk=None):
+        """
+        Verified service spend over time for charts:
+        `?start=2015-01&end=2024-12&category=REPAIR&granularity=year`.
+        """
+        vehicle = self.get_object()
+        params = request.query_params
+        granularity = params.get('granularity', 'month')
+        categories = params.getlist('category')
+        valid_categories = {choice for choice, _ in ServiceRecord.CATEGORY_CHOICES}
+        try:
+            start, end = (datetime.datetime.strptime(params[key], '%Y-%m').date() if params.get(key) else None
+                          for key in ('start', 'end'))
+        except ValueError:
+            return Response({'error': 'start and end must be YYYY-MM'}, status=status.HTTP_400_BAD_REQUEST)
+        if granularity not in ('month', 'year') or not valid_categories.issuperset(categories):
+            return Response(
+                {'error': 'granularity must be month or year, and category a service category'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        history = vehicle_get_cost_history(vehicle, start, end, categories, granularity)
+        period_format = '%Y' if granularity == 'year' else '%Y-%m'
+        return Response({
+            'granularity': granularity,
+            'series': [
+                {
+                    'period': row['period'].strftime(period_format),
+                    'category': row['category'],
+                    'total': f"{row['total']:.2f}",
+                    'count': row['count'],
+                }
+                for row in history
+            ],
+        })
+
+    @action(detail=True, methods=['get'])
+    def valuation_history(self, request, pk=None):
+        """
+        Market value over time for charts:
+        `?start=2024-01-01&end=2024-12-31&points=100`. Long ranges are
+        downsampled to at most `points` values.
+        """
+        vehicle = self.get_object()
+        params = request.query_params
+        try:
+            start, end = (datetime.datetime.strptime(params[key], '%Y-%m-%d') if params.get(key) else None
+                          for key in ('start', 'end'))
+            points = int(params.get('points', 100))
+        except ValueError:
+            return Response({'error': 'start and end must be YYYY-MM-DD, points an integer'},
+                            status=status.HTTP_400_BAD_REQUEST)
+        if not 2 <= points <= 1000:
+            return Response({'error': 'points must be between 2 and 1000'}, status=status.HTTP_400_BAD_REQUEST)
+
+        tz = timezone.get_current_timezone()
+        if start:
+            start = timezone.make_aware(start, tz)
+        if end:
+            end = timezone.make_aware(end, tz) + datetime.timedelta(days=1, microseconds=-1)
+        history = vehicle_get_valuation_history(vehicle, start, end, points)
+        return Response({
+            'series': [
+                {'at': row['created_at'], 'value': f"{row['value_after']:.2f}", 'source': row['source']}
+                for row in history
+            ],
+        })
+
+
+class ServiceRecordViewSet(FieldsetViewMixin, ReplicaListMixin, viewsets.ModelViewSet):
     """ViewSet for ServiceRecord CRUD operations."""
 
     queryset = ServiceRecord.objects.all()
@@ -75,10 +256,10 @@ class ServiceRecordViewSet(viewsets.ModelViewSet):
         return self.queryset.filter(vehicle__owner=self.request.user)
 
 
-class UpgradeViewSet(viewsets.ModelViewSet):
+class UpgradeViewSet(FieldsetViewMixin, ReplicaListMixin, viewsets.ModelViewSet):
     """ViewSet for Upgrade CRUD operations."""
 
-    queryset = Upgrade.objects.all()
+    queryset = Upgrade.objects.select_related('vehicle', 'tracked_part')
     serializer_class = UpgradeSerializer
     permission_classes = [IsAuthenticated]
     filterset_fields = ['vehicle', 'status']
@@ -88,8 +269,29 @@ class UpgradeViewSet(viewsets.ModelViewSet):
         """Filter to show only upgrades for user's vehicles."""
         return self.queryset.filter(vehicle__owner=self.request.user)
 
+    @action(detail=True, methods=['get'])
+    def price_history(self, request, pk=None):
+        """Tracked price changes for a wishlist part: `?days=90`."""
+        upgrade = self.get_object()
+        if upgrade.tracked_part_id is None:
+            return Response({'tracked': False, 'points': []})
+        try:
+            days = int(request.query_params.get('days', 90))
+        except ValueError:
+            return Response({'error': 'days must be an integer'}, status=status.HTTP_400_BAD_REQUEST)
+
+        since = timezone.now() - datetime.timedelta(days=max(days, 1))
+        points = tracked_part_get_price_history(upgrade.tracked_part_id, since)
+        part = upgrade.tracked_part
+        return Response({
+            'tracked': True,
+            'current_price': f"{part.last_price:.2f}" if part.last_price is not None else None,
+            'next_check_at': part.next_check_at,
+            'points': [{'price': f"{p['price']:.2f}", 'at': p['observed_at']} for p in points],
+        })
+
 
-class ConditionReportViewSet(viewsets.ModelViewSet):
+class ConditionReportViewSet(FieldsetViewMixin, ReplicaListMixin, viewsets.ModelViewSet):
     """ViewSet for ConditionReport CRUD operations."""
 
     queryset = ConditionReport.objects.all()
@@ -101,3 +303,281 @@ class ConditionReportViewSet(viewsets.ModelViewSet):
     def get_queryset(self):
         """Filter to show only reports for user's vehicles."""
         return self.queryset.filter(vehicle__owner=self.request.user)
+
+
+class SearchView(APIView):
+    """
+    Ranked full-text search across the user's service records, upgrades and
+    condition reports: `GET /api/search/?q=brake pads&kind=SERVICE&limit=20`.
+    """
+
+    permission_classes = [IsAuthenticated]
+    max_limit = 100
+
+    def get(self, request):
+        query = request.query_params.get('q', '').strip()
+        kinds = [k.upper() for k in request.query_params.getlist('kind')]
+        valid_kinds = {choice for choice, _ in SearchDocument.KIND_CHOICES}
+        if any(kind not in valid_kinds for kind in kinds):
+            return Response(
+                {'error': f"kind must be one of {', '.join(sorted(valid_kinds))}"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        try:
+            limit = min(max(int(request.query_params.get('limit', 20)), 1), self.max_limit)
+        except ValueError:
+            return Response({'error': 'limit must be an integer'}, status=status.HTTP_400_BAD_REQUEST)
+
+        results = search_documents(request.user, query, kinds, limit) if query else []
+        return Response({
+            'query': query,
+            'results': SearchResultSerializer(results, many=True).data,
+        })
+
+
+class GarageValuationView(APIView):
+    """
+    Mod- and condition-adjusted valuation of the user's garage under each
+    what-if scenario: `GET /api/valuations/?scenario=baseline&vehicle=3`.
+    """
+
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request):
+        scenarios = request.query_params.getlist('scenario')
+        unknown = set(scenarios) - set(settings.VALUATION_SCENARIOS)
+        if unknown:
+            return Response(
+                {'error': f"Unknown scenario(s): {', '.join(sorted(unknown))}"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        vehicles = Vehicle.objects.filter(owner=request.user)
+        vehicle_ids = request.query_params.getlist('vehicle')
+        if vehicle_ids:
+            if not all(v.isdigit() for v in vehicle_ids):
+                return Response({'error': 'vehicle must be an id'}, status=status.HTTP_400_BAD_REQUEST)
+            vehicles = vehicles.filter(pk__in=vehicle_ids)
+
+        result = garage_get_valuation(vehicles, scenarios)
+        return Response({
+            'scenarios': list(result.scenarios),
+            'totals': result.totals(),
+            'vehicles': result.rows(),
+        })
+
+
+class VinDecodeView(APIView):
+    """
+    Offline VIN decoding: `GET /api/vins/decode/?vin=JHMAP1140YT000001` for
+    one VIN, or `POST {"vins": [...]}` with up to VIN_DECODE_BATCH_MAX VINs
+    for a fleet import, answered in order with per-VIN errors.
+    """
+
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request):
+        try:
+            return Response(vehicle_decode_vin(request.query_params.get('vin', '')))
+        except VinError as exc:
+            return Response({'error': str(exc)}, status=status.HTTP_400_BAD_REQUEST)
+
+    def post(self, request):
+        serializer = VinDecodeSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        return Response({'results': vehicle_decode_vins(serializer.validated_data['vins'])})
+
+
+class BatchView(APIView):
+    """
+    Several creates, updates and deletes in one request, e.g. an offline
+    garage sync: `POST /api/batch/` with
+    `{"operations": [{"op": "create", "resource": "vehicles", "ref": "car", "data": {...}},
+    {"op": "create", "resource": "service-records", "data": {"vehicle": {"$ref": "car"}, ...}},
+    {"op": "update", "resource": "upgrades", "id": 7, "data": {"status": "INSTALLED"}},
+    {"op": "delete", "resource": "condition-reports", "id": 3}]}`.
+
+    Operations run in order through the resource's viewset, with the same
+    validation, permissions and ownership rules as separate requests
+    (updates are partial). They run in one transaction: either all are
+    committed (200), or none are and the results stop at the operation that
+    failed (400).
+    """
+
+    permission_classes = [IsAuthenticated]
+    resources = {
+        'vehicles': VehicleViewSet,
+        'service-records': ServiceRecordViewSet,
+        'upgrades': UpgradeViewSet,
+        'condition-reports': ConditionReportViewSet,
+    }
+    actions = {'create': 'create', 'update': 'partial_update', 'delete': 'destroy'}
+
+    def post(self, request):
+        serializer = BatchSerializer(data=request.data, context={'resources': self.resources})
+        serializer.is_valid(raise_exception=True)
+
+        results, refs = [], {}
+        with transaction.atomic():
+            for operation in serializer.validated_data['operations']:
+                result = self._run(request, operation, refs)
+                results.append(result)
+                if result['status'] >= 400:
+                    transaction.set_rollback(True)
+                    return Response({'committed': False, 'results': results}, status=status.HTTP_400_BAD_REQUEST)
+        return Response({'committed': True, 'results': results})
+
+    def _run(self, request, operation, refs):
+        viewset = self.resources[operation['resource']](
+            request=request, args=(), kwargs={'pk': operation.get('id')}, format_kwarg=None,
+            action=self.actions[operation['op']],
+        )
+        data = {}
+        for key, value in operation['data'].items():
+            name = BatchSerializer.ref_name(value)
+            data[key] = value if name is None else refs[name]
+        try:
+            viewset.check_permissions(request)
+            if operation['op'] == 'create':
+                serializer = viewset.get_serializer(data=data)
+                serializer.is_valid(raise_exception=True)
+                viewset.perform_create(serializer)
+                if 'ref' in operation:
+                    refs[operation['ref']] = serializer.instance.pk
+                return {'status': status.HTTP_201_CREATED, 'data': serializer.data}
+
+            instance = viewset.get_object()
+            if operation['op'] == 'update':
+                serializer = viewset.get_serializer(instance, data=data, partial=True)
+                serializer.is_valid(raise_exception=True)
+                viewset.perform_update(serializer)
+                return {'status': status.HTTP_200_OK, 'data': serializer.data}
+            viewset.perform_destroy(instance)
+            return {'status': status.HTTP_204_NO_CONTENT}
+        except Http404:
+            return {'status': status.HTTP_404_NOT_FOUND, 'errors': {'detail': 'Not found.'}}
+        except APIException as exc:
+            return {'status': exc.status_code, 'errors': exc.detail}
+
+
+async def _event_stream(user_id):
+    subscription = await get_event_bus().subscribe(user_channel(user_id))
+    deadline = time.monotonic() + settings.EVENTS_STREAM_MAX_SECONDS
+    try:
+        yield f"retry: {settings.EVENTS_RETRY_MS}\n\n"
+        while (remaining := deadline - time.monotonic()) > 0:
+            message = await subscription.get(timeout=min(settings.EVENTS_KEEPALIVE_SECONDS, remaining))
+            if message is None:
+                # Keeps proxies from closing an idle connection
+                yield ": keep-alive\n\n"
+                continue
+            event = json.loads(message)
+            yield f"event: {event['event']}\ndata: {json.dumps(event['data'])}\n\n"
+    finally:
+        await subscription.close()
+
+
+async def event_stream(request):
+    """
+    Server-sent events for the signed-in user: `ocr.completed` when a
+    receipt's OCR finishes and `valuation.updated` when a market valuation
+    refresh lands, in place of polling the record or the build summary.
+    Needs the ASGI app (see my_garage.utils.events).
+    """
+    user = await request.auser()
+    if not user.is_authenticated:
+        return JsonResponse({'detail': 'Authentication credentials were not provided.'},
+                            status=status.HTTP_403_FORBIDDEN)
+    return StreamingHttpResponse(
+        _event_stream(user.pk), content_type='text/event-stream',
+        # No caching, and no buffering by nginx, which would hold events back
+        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'},
+    )
+
+
+class UploadSessionViewSet(mixins.CreateModelMixin, mixins.RetrieveModelMixin, viewsets.GenericViewSet):
+    """
+    Resumable chunked uploads, modelled on the tus protocol:
+
+    1. `POST /api/uploads/` with `vehicle`, `filename` and `size` opens a session.
+    2. `PATCH /api/uploads/<id>/` with `Upload-Offset: <n>` and
+       `Content-Type: application/offset+octet-stream` appends the body.
+       A 409 means the offset was wrong; resume from the `Upload-Offset` it returns.
+    3. `HEAD /api/uploads/<id>/` reports the current `Upload-Offset` after a dropped connection.
+    4. `POST /api/uploads/<id>/finalize/` hands the file to the OCR pipeline.
+
+    With S3 media storage, `POST /api/uploads/direct/` instead returns a
+    presigned POST for sending the file straight to the bucket, then finalize.
+    """
+
+    queryset = UploadSession.objects.all()
+    serializer_class = UploadSessionSerializer
+    permission_classes = [IsAuthenticated]
+    chunk_content_type = 'application/offset+octet-stream'
+
+    def get_queryset(self):
+        """Filter to show only the user's uploads."""
+        return self.queryset.filter(owner=self.request.user)
+
+    @staticmethod
+    def _offset_headers(session):
+        return {'Upload-Offset': str(session.offset), 'Upload-Length': str(session.size), 'Cache-Control': 'no-store'}
+
+    def create(self, request, *args, **kwargs):
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        try:
+            session = upload_session_create(owner=request.user, **serializer.validated_data)
+        except UploadError as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        headers = {'Location': request.build_absolute_uri(f"{session.pk}/"), **self._offset_headers(session)}
+        return Response(self.get_serializer(session).data, status=status.HTTP_201_CREATED, headers=headers)
+
+    @action(detail=False, methods=['post'])
+    def direct(self, request):
+        """Open an upload that goes straight to media storage."""
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        try:
+            session, upload = upload_session_create_direct(owner=request.user, **serializer.validated_data)
+        except UploadError as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        return Response({**self.get_serializer(session).data, 'upload': upload}, status=status.HTTP_201_CREATED)
+
+    def retrieve(self, request, *args, **kwargs):
+        session = self.get_object()
+        return Response(self.get_serializer(session).data, headers=self._offset_headers(session))
+
+    def partial_update(self, request, *args, **kwargs):
+        """Streams the request body onto the upload without buffering it."""
+        session = self.get_object()
+        if request.content_type.split(';')[0].strip() != self.chunk_content_type:
+            return Response({'error': f"Content-Type must be {self.chunk_content_type}"},
+                            status=status.HTTP_415_UNSUPPORTED_MEDIA_TYPE)
+        try:
+            offset = int(request.headers['Upload-Offset'])
+            length = int(request.headers['Content-Length'])
+        except (KeyError, ValueError):
+            return Response({'error': 'Upload-Offset and Content-Length headers are required'},
+                            status=status.HTTP_400_BAD_REQUEST)
+
+        try:
+            session = upload_session_append_chunk(session.pk, offset, request.stream, length)
+        except UploadOffsetMismatch as e:
+            session.refresh_from_db()
+            return Response({'error': str(e)}, status=status.HTTP_409_CONFLICT, headers=self._offset_headers(session))
+        except UploadError as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        return Response(status=status.HTTP_204_NO_CONTENT, headers=self._offset_headers(session))
+
+    @action(detail=True, methods=['post'])
+    def finalize(self, request, pk=None):
+        """Queue the completed upload for processing."""
+        session = self.get_object()
+        try:
+            session = upload_session_finalize(session.pk)
+        except UploadError as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST,
+                            headers=self._offset_headers(session))
+        session.refresh_from_db()
+        return Response(self.get_serializer(session).data, status=status.HTTP_202_ACCEPTED)
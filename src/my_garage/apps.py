@@ -11,4 +11,21 @@ class MyGarageConfig(AppConfig):
 
     def ready(self):
         """Import signal handlers when app is ready."""
-        pass
+        from django.db.models.signals import post_migrate
+        from my_garage import signals  # noqa: F401
+
+        post_migrate.connect(install_search_index, sender=self)
+
+
+def install_search_index(sender, using, **kwargs):
+    """
+    Ensures the full-text index exists. Migration 0003 creates it; this also
+    covers databases built without migrations, such as the test database.
+    """
+    from django.db import connections
+    from my_garage.utils.search import TABLE, install_search_schema
+
+    connection = connections[using]
+    # Not there when migrating backwards past 0003
+    if TABLE in connection.introspection.table_names():
+        install_search_schema(connection)
@@ -0,0 +1,5 @@
+"""
+Reproducible benchmark suite.
+
+Run with ``python manage.py run_benchmarks``; see that command for options.
+"""
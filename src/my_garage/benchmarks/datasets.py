@@ -0,0 +1,136 @@
+"""Seeded data generators for the benchmark suite."""
+import datetime
+import itertools
+import random
+from dataclasses import dataclass, field
+from decimal import Decimal
+from typing import Dict, List
+
+import factory.random
+from django.utils import timezone
+
+from my_garage.api.services import search_rebuild_index, service_cost_rollup_rebuild
+from my_garage.models import Vehicle, ServiceRecord, Upgrade, ConditionReport, ValuationEvent
+from my_garage.tests.factories import (
+    UserFactory,
+    VehicleFactory,
+    ServiceRecordFactory,
+    UpgradeFactory,
+    ConditionReportFactory,
+)
+
+# Fixed seed so every run (and every commit) benchmarks identical data
+DEFAULT_SEED = 20240101
+
+# Rows are built from a pool of factory instances and re-parented, which keeps
+# seeding a million records in the minutes range instead of hours.
+TEMPLATE_POOL_SIZE = 1000
+BATCH_SIZE = 5000
+# A year of weekly market refreshes per vehicle in the valuation ledger
+VALUATION_WEEKS = 52
+
+
+@dataclass(frozen=True)
+class Scale:
+    """A named dataset size."""
+    name: str
+    vehicles: int
+    services_per_vehicle: int
+    upgrades_per_vehicle: int
+    reports_per_vehicle: int
+
+    @property
+    def service_records(self) -> int:
+        return self.vehicles * self.services_per_vehicle
+
+
+SCALES: Dict[str, Scale] = {
+    '1': Scale('1', vehicles=1, services_per_vehicle=50, upgrades_per_vehicle=10, reports_per_vehicle=4),
+    '100': Scale('100', vehicles=100, services_per_vehicle=100, upgrades_per_vehicle=10, reports_per_vehicle=4),
+    '10k': Scale('10k', vehicles=10_000, services_per_vehicle=100, upgrades_per_vehicle=5, reports_per_vehicle=4),
+}
+
+
+@dataclass
+class Dataset:
+    """Handles to the seeded rows that scenarios operate on."""
+    scale: Scale
+    owner: object
+    vehicle_ids: List[int] = field(default_factory=list)
+
+    @property
+    def sample_vehicle_id(self) -> int:
+        return self.vehicle_ids[len(self.vehicle_ids) // 2]
+
+
+def _bulk_children(model, factory_class, vehicle_ids: List[int], per_vehicle: int) -> None:
+    """Creates `per_vehicle` rows of `model` for each vehicle in batches."""
+    if per_vehicle <= 0:
+        return
+    pool = factory_class.build_batch(TEMPLATE_POOL_SIZE, vehicle=None)
+    templates = itertools.cycle(pool)
+    field_names = [
+        f.attname for f in model._meta.concrete_fields
+        if not f.primary_key and f.attname != 'vehicle_id'
+    ]
+
+    batch = []
+    for v_id in vehicle_ids:
+        for _ in range(per_vehicle):
+            template = next(templates)
+            row = model(vehicle_id=v_id, **{name: getattr(template, name) for name in field_names})
+            batch.append(row)
+            if len(batch) >= BATCH_SIZE:
+                model.objects.bulk_create(batch)
+                batch = []
+    if batch:
+        model.objects.bulk_create(batch)
+
+
+def _seed_valuation_history(vehicle_ids: List[int], weeks: int) -> None:
+    """A baseline event `weeks` ago per vehicle, then a weekly random walk up to its current value."""
+    rng = random.Random(DEFAULT_SEED)
+    now = timezone.now()
+    values = dict(Vehicle.objects.filter(pk__in=vehicle_ids).values_list('pk', 'current_market_value'))
+    batch = []
+    for v_id in vehicle_ids:
+        value = values[v_id]
+        for week in range(weeks, -1, -1):
+            batch.append(ValuationEvent(
+                vehicle_id=v_id, source='MARKET' if week < weeks else 'BASELINE', amount=value,
+                is_absolute=True, value_after=value, created_at=now - datetime.timedelta(weeks=week),
+            ))
+            value = max(Decimal('0.00'), value + Decimal(rng.randint(-50000, 50000)) / 100)
+        batch[-1].amount = batch[-1].value_after = values[v_id]
+        if len(batch) >= BATCH_SIZE:
+            ValuationEvent.objects.bulk_create(batch)
+            batch = []
+    if batch:
+        ValuationEvent.objects.bulk_create(batch)
+
+
+def seed_dataset(scale: Scale, seed: int = DEFAULT_SEED) -> Dataset:
+    """
+    Populates the current database with a reproducible garage of the given scale.
+    All vehicles belong to a single owner so API list endpoints see the full table.
+    """
+    factory.random.reseed_random(seed)
+
+    owner = UserFactory(username=f"bench-{scale.name}")
+    vehicles = VehicleFactory.build_batch(scale.vehicles, owner=owner)
+    for start in range(0, len(vehicles), BATCH_SIZE):
+        Vehicle.objects.bulk_create(vehicles[start:start + BATCH_SIZE])
+    vehicle_ids = list(
+        Vehicle.objects.filter(owner=owner).order_by('id').values_list('id', flat=True)
+    )
+
+    _bulk_children(ServiceRecord, ServiceRecordFactory, vehicle_ids, scale.services_per_vehicle)
+    _bulk_children(Upgrade, UpgradeFactory, vehicle_ids, scale.upgrades_per_vehicle)
+    _bulk_children(ConditionReport, ConditionReportFactory, vehicle_ids, scale.reports_per_vehicle)
+    # bulk_create skips the signals that maintain the search index, rollups and valuation ledger
+    search_rebuild_index(batch_size=BATCH_SIZE)
+    service_cost_rollup_rebuild(batch_size=BATCH_SIZE)
+    _seed_valuation_history(vehicle_ids, VALUATION_WEEKS)
+
+    return Dataset(scale=scale, owner=owner, vehicle_ids=vehicle_ids)
+
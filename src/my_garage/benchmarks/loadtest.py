@@ -0,0 +1,120 @@
+"""
+End-to-end load generator for the Django/Celery side.
+
+Unlike the benchmark scenarios this talks to a *running* FastAPI service
+(normally the stand-in from `fastapi_services.main`) and, when a broker is
+configured, real Celery workers — so the numbers include HTTP, queueing and
+the stand-in's simulated latency and backpressure.
+"""
+import statistics
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Any, Callable, Dict, List
+
+from django.core.files.base import ContentFile
+from django.db import close_old_connections
+
+from my_garage.models import Vehicle, ServiceRecord
+from my_garage.tasks import task_process_receipt_ocr, task_update_market_valuation
+
+TASK_TIMEOUT_SECONDS = 300
+
+# Results are joined from plain threads; in eager mode Celery would otherwise
+# mistake them for a task waiting on a subtask.
+JOIN_KWARGS = {'timeout': TASK_TIMEOUT_SECONDS, 'disable_sync_subtasks': False}
+
+
+class TaskReportedFailure(Exception):
+    """A task completed but returned False (e.g. OCR extracted nothing)."""
+
+
+def _percentile(sorted_samples: List[float], pct: float) -> float:
+    index = min(len(sorted_samples) - 1, int(round(pct / 100 * (len(sorted_samples) - 1))))
+    return sorted_samples[index]
+
+
+def _prepare_valuation_jobs(vehicle_ids: List[int], count: int) -> List[Callable[[], Any]]:
+    return [
+        (lambda v_id=vehicle_ids[i % len(vehicle_ids)]:
+            task_update_market_valuation.apply_async(args=(v_id,)).get(**JOIN_KWARGS))
+        for i in range(count)
+    ]
+
+
+def _prepare_ocr_jobs(vehicle: Vehicle, count: int, image_bytes: int) -> List[Callable[[], Any]]:
+    jobs = []
+    for i in range(count):
+        record = ServiceRecord(
+            vehicle=vehicle,
+            date='2024-01-01',
+            vendor='Processing...',
+            description='Load test receipt',
+            total_cost=0,
+            is_verified=False,
+        )
+        # Vary the payload so the stand-in returns distinct receipts
+        payload = i.to_bytes(4, 'big') * (image_bytes // 4)
+        record.receipt_image.save(f"loadtest-{i}.jpg", ContentFile(payload), save=False)
+        record.save()
+        jobs.append(lambda r_id=record.id:
+                    task_process_receipt_ocr.apply_async(args=(r_id,)).get(**JOIN_KWARGS))
+    return jobs
+
+
+def _run_job(job: Callable[[], Any]) -> float:
+    start = time.perf_counter()
+    try:
+        if job() is False:
+            raise TaskReportedFailure()
+    finally:
+        # Worker threads each hold their own DB connection
+        close_old_connections()
+    return (time.perf_counter() - start) * 1000
+
+
+def run_load(jobs: List[Callable[[], Any]], concurrency: int) -> Dict[str, Any]:
+    """Runs `jobs` on `concurrency` threads and summarises throughput and latency."""
+    latencies: List[float] = []
+    errors: Dict[str, int] = {}
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        futures = [pool.submit(_run_job, job) for job in jobs]
+        for future in as_completed(futures):
+            try:
+                latencies.append(future.result())
+            except Exception as exc:
+                key = type(exc).__name__
+                errors[key] = errors.get(key, 0) + 1
+    elapsed = time.perf_counter() - started
+
+    latencies.sort()
+    summary: Dict[str, Any] = {
+        'requests': len(jobs),
+        'concurrency': concurrency,
+        'succeeded': len(latencies),
+        'errors': errors,
+        'elapsed_s': round(elapsed, 3),
+        'throughput_rps': round(len(latencies) / elapsed, 2) if elapsed else 0.0,
+    }
+    if latencies:
+        summary.update({
+            'p50_ms': round(_percentile(latencies, 50), 2),
+            'p95_ms': round(_percentile(latencies, 95), 2),
+            'p99_ms': round(_percentile(latencies, 99), 2),
+            'mean_ms': round(statistics.fmean(latencies), 2),
+        })
+    return summary
+
+
+def load_test_valuations(count: int, concurrency: int) -> Dict[str, Any]:
+    """Fires `count` valuation refreshes spread over all vehicles."""
+    vehicle_ids = list(Vehicle.objects.order_by('id').values_list('id', flat=True)[:count])
+    if not vehicle_ids:
+        raise ValueError("No vehicles to value; seed some data first.")
+    return run_load(_prepare_valuation_jobs(vehicle_ids, count), concurrency)
+
+
+def load_test_ocr(vehicle: Vehicle, count: int, concurrency: int, image_bytes: int = 256 * 1024) -> Dict[str, Any]:
+    """Uploads `count` synthetic receipts to `vehicle` and processes them through the OCR task."""
+    return run_load(_prepare_ocr_jobs(vehicle, count, image_bytes), concurrency)
@@ -0,0 +1,128 @@
+"""
+Queue isolation harness for the Celery routing in CELERY_TASK_QUEUES/ROUTES.
+
+Spins up in-process workers on an in-memory broker with the project's queue
+and route configuration, fills the bulk queue with a valuation backlog and
+measures how long interactive OCR tasks wait behind it. Tasks are stand-ins
+registered under the real task names that just sleep (valuations, which wait
+on web searches, for longer than OCR), so the numbers isolate queueing from
+the work itself.
+"""
+import threading
+import time
+from contextlib import ExitStack
+from typing import Any, Dict, List, Sequence
+
+from celery import Celery
+from celery.contrib.testing.worker import start_worker
+from django.conf import settings
+
+from config.celery_app import app as celery_app
+from my_garage.tasks import BULK_TASK_OPTIONS, INTERACTIVE_TASK_OPTIONS
+from .loadtest import _percentile
+
+INTERACTIVE_TASK = 'my_garage.tasks.task_process_receipt_ocr'
+BULK_TASK = 'my_garage.update_valuation'
+
+# Which queues each worker consumes in each layout. Every entry is started
+# `concurrency` times as a solo-pool worker: the thread pool stalls on the
+# in-memory transport's polling, which would swamp the queueing we measure.
+LAYOUTS = {
+    'dedicated': [['interactive', 'default'], ['bulk']],
+    'shared': [['interactive', 'default', 'bulk'], ['interactive', 'default', 'bulk']],
+}
+
+
+def build_harness_app(interactive_seconds: float, bulk_seconds: float,
+                      completed: Dict[str, float]) -> Celery:
+    """A throwaway Celery app with the project's queues/routes and sleeping stand-in tasks."""
+    app = Celery('my_garage_queue_harness', broker='memory://', backend='cache+memory://', set_as_current=False)
+    app.conf.update(
+        task_queues=settings.CELERY_TASK_QUEUES,
+        task_routes=settings.CELERY_TASK_ROUTES,
+        task_default_queue=settings.CELERY_TASK_DEFAULT_QUEUE,
+        worker_prefetch_multiplier=settings.CELERY_WORKER_PREFETCH_MULTIPLIER,
+        broker_transport_options={'polling_interval': 0.005},
+        task_always_eager=False,
+    )
+    lock = threading.Lock()
+
+    def stand_in(seconds):
+        def run(self, *args):
+            time.sleep(seconds)
+            with lock:
+                completed[self.request.id] = time.perf_counter()
+        return run
+
+    # Registered eagerly so the project's shared tasks, added when the app is
+    # finalized, don't take these names
+    for name, seconds in ((INTERACTIVE_TASK, interactive_seconds), (BULK_TASK, bulk_seconds)):
+        app.task(bind=True, name=name, shared=False, lazy=False)(stand_in(seconds))
+    return app
+
+
+def _wait_for(task_ids: Sequence[str], completed: Dict[str, float], timeout: float) -> None:
+    deadline = time.monotonic() + timeout
+    while not all(task_id in completed for task_id in task_ids):
+        if time.monotonic() > deadline:
+            raise TimeoutError(f"{sum(t not in completed for t in task_ids)} tasks did not finish in {timeout}s")
+        time.sleep(0.005)
+
+
+def _purge(app: Celery) -> None:
+    # In-memory queues are shared by every connection in the process
+    with app.connection_for_write() as connection:
+        for queue in app.conf.task_queues:
+            connection.default_channel.queue_purge(queue.name)
+
+
+def measure_layout(layout: str, backlog: int, probes: int, interactive_seconds: float = 0.01,
+                   bulk_seconds: float = 0.1, concurrency: int = 2, timeout: float = 60.0) -> Dict[str, Any]:
+    """
+    Queues `backlog` bulk valuations, then `probes` interactive OCR tasks, and
+    reports the probes' submit-to-completion latency with workers arranged as
+    in LAYOUTS[layout]. Whatever is left of the backlog is discarded.
+    """
+    completed: Dict[str, float] = {}
+    app = build_harness_app(interactive_seconds, bulk_seconds, completed)
+    _purge(app)
+    try:
+        with ExitStack() as stack:
+            for queues in LAYOUTS[layout]:
+                for _ in range(concurrency):
+                    stack.enter_context(start_worker(
+                        app, pool='solo', concurrency=1, queues=queues,
+                        perform_ping_check=False, loglevel='WARNING',
+                    ))
+
+            for i in range(backlog):
+                app.send_task(BULK_TASK, args=(i,), **BULK_TASK_OPTIONS)
+            submitted = {}
+            for i in range(probes):
+                task_id = app.send_task(INTERACTIVE_TASK, args=(i,), **INTERACTIVE_TASK_OPTIONS).id
+                submitted[task_id] = time.perf_counter()
+
+            _wait_for(list(submitted), completed, timeout)
+            latencies = sorted((completed[t] - submitted[t]) * 1000 for t in submitted)
+    finally:
+        _purge(app)
+        # start_worker makes the harness app current; hand it back to the project
+        celery_app.set_current()
+        celery_app.set_default()
+
+    return {
+        'layout': layout,
+        'backlog': backlog,
+        'probes': probes,
+        'p50_ms': round(_percentile(latencies, 50), 2),
+        'p95_ms': round(_percentile(latencies, 95), 2),
+        'max_ms': round(latencies[-1], 2),
+    }
+
+
+def compare_layouts(backlog: int, probes: int, **kwargs: Any) -> List[Dict[str, Any]]:
+    """Interactive latency with no backlog, then behind a backlog for each layout."""
+    results = [dict(measure_layout('dedicated', 0, probes, **kwargs), layout='idle')]
+    for layout in LAYOUTS:
+        results.append(measure_layout(layout, backlog, probes, **kwargs))
+    return results
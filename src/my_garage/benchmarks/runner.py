@@ -0,0 +1,128 @@
+"""Timing loop and JSON report for the benchmark suite."""
+import datetime
+import fnmatch
+import platform
+import statistics
+import subprocess
+import time
+from typing import Any, Callable, Dict, Iterable, List, Optional
+
+import django
+from django.conf import settings
+from django.db import connection
+from django.test.utils import override_settings
+
+from config.celery_app import app as celery_app
+from .datasets import Scale, seed_dataset
+from .scenarios import SCENARIOS
+from .stubs import stub_external_services
+
+
+def time_callable(func: Callable[[], object], repeat: int, warmup: int = 1) -> Dict[str, float]:
+    """Runs `func` `warmup + repeat` times and returns timing stats in milliseconds."""
+    for _ in range(warmup):
+        func()
+
+    samples: List[float] = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        samples.append((time.perf_counter() - start) * 1000)
+
+    return {
+        'repeat': repeat,
+        'min_ms': round(min(samples), 4),
+        'median_ms': round(statistics.median(samples), 4),
+        'mean_ms': round(statistics.fmean(samples), 4),
+        'max_ms': round(max(samples), 4),
+        'stdev_ms': round(statistics.stdev(samples), 4) if len(samples) > 1 else 0.0,
+    }
+
+
+def select_scenarios(patterns: Optional[Iterable[str]] = None) -> List[str]:
+    """Returns scenario names matching any of the glob `patterns` (all if empty)."""
+    names = sorted(SCENARIOS)
+    patterns = list(patterns or [])
+    if not patterns:
+        return names
+    return [n for n in names if any(fnmatch.fnmatch(n, p) for p in patterns)]
+
+
+def run_scale(scale: Scale, scenario_names: List[str], repeat: int) -> Dict[str, Any]:
+    """
+    Seeds `scale` into the current database and times each scenario against it.
+    Celery runs eagerly and the FastAPI/Mongo backends are stubbed so results
+    reflect Django, ORM and task overhead only. Client-side rate limits are
+    lifted for the same reason.
+    """
+    seed_start = time.perf_counter()
+    dataset = seed_dataset(scale)
+    seed_seconds = time.perf_counter() - seed_start
+
+    previous_eager = celery_app.conf.task_always_eager
+    celery_app.conf.task_always_eager = True
+    results: Dict[str, Any] = {}
+    try:
+        with stub_external_services(), override_settings(EXTERNAL_SERVICE_RATE_LIMITS={}):
+            for name in scenario_names:
+                func = SCENARIOS[name](dataset)
+                results[name] = time_callable(func, repeat=repeat)
+    finally:
+        celery_app.conf.task_always_eager = previous_eager
+
+    return {
+        'dataset': {
+            'vehicles': scale.vehicles,
+            'service_records': scale.service_records,
+            'seed_seconds': round(seed_seconds, 2),
+        },
+        'scenarios': results,
+    }
+
+
+def git_revision() -> str:
+    """Short hash of HEAD, or 'unknown' outside a git checkout."""
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'],
+            cwd=settings.BASE_DIR, capture_output=True, text=True, check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return 'unknown'
+
+
+def build_report(results_by_scale: Dict[str, Any]) -> Dict[str, Any]:
+    """Wraps per-scale results with the environment metadata needed to compare runs."""
+    return {
+        'meta': {
+            'revision': git_revision(),
+            'created_at': datetime.datetime.now(datetime.timezone.utc).isoformat(timespec='seconds'),
+            'python': platform.python_version(),
+            'django': django.get_version(),
+            'database': connection.vendor,
+            'machine': platform.machine(),
+        },
+        'scales': results_by_scale,
+    }
+
+
+def compare_reports(baseline: Dict[str, Any], current: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """
+    Lists median timing changes between two reports, keyed by scale and scenario.
+    `ratio` > 1 means the current run is slower.
+    """
+    rows = []
+    for scale_name, scale_data in current.get('scales', {}).items():
+        old_scenarios = baseline.get('scales', {}).get(scale_name, {}).get('scenarios', {})
+        for name, stats in scale_data['scenarios'].items():
+            old = old_scenarios.get(name)
+            if not old or not old['median_ms']:
+                continue
+            rows.append({
+                'scale': scale_name,
+                'scenario': name,
+                'baseline_ms': old['median_ms'],
+                'current_ms': stats['median_ms'],
+                'ratio': round(stats['median_ms'] / old['median_ms'], 3),
+            })
+    return rows
@@ -0,0 +1,308 @@
+"""
+Benchmark scenarios.
+
+Each scenario receives the seeded `Dataset` and returns a zero-argument
+callable; the runner times repeated invocations of that callable.
+"""
+import datetime
+from typing import Callable, Dict, List
+
+import numpy as np
+from django.conf import settings
+
+from django.contrib.auth import get_user_model
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.handlers.wsgi import WSGIHandler
+from django.core.signals import request_finished, request_started
+from django.db import DEFAULT_DB_ALIAS, connections
+from django.test import Client
+from django.test.utils import override_settings
+from rest_framework.test import APIClient
+
+from my_garage.models import Vehicle, ServiceRecord, Upgrade, ConditionReport
+from my_garage.api.selectors import vehicle_get_build_summary, garage_get_valuation, search_documents
+from my_garage.api.services import vehicle_touch
+from my_garage.utils.valuation import ValuationInputs, compute_valuations
+from my_garage.utils.vin import YEAR_CODES, check_digit, get_vin_index
+from my_garage.tasks import (
+    task_process_receipt_ocr,
+    task_process_receipt_ocr_batch,
+    task_bulk_valuation_refresh,
+)
+from .datasets import Dataset
+
+Scenario = Callable[[Dataset], Callable[[], object]]
+
+SCENARIOS: Dict[str, Scenario] = {}
+
+
+def scenario(name: str) -> Callable[[Scenario], Scenario]:
+    """Registers a scenario under a stable, dotted name used as the JSON key."""
+    def decorator(func: Scenario) -> Scenario:
+        SCENARIOS[name] = func
+        return func
+    return decorator
+
+
+def _api_client(dataset: Dataset) -> APIClient:
+    client = APIClient()
+    client.force_authenticate(user=dataset.owner)
+    return client
+
+
+def _get_ok(client: APIClient, url: str) -> Callable[[], object]:
+    def run():
+        response = client.get(url)
+        assert response.status_code == 200, f"{url} returned {response.status_code}"
+        return response
+    return run
+
+
+@scenario('db.connect')
+def bench_db_connect(dataset: Dataset):
+    # What each request or task paid when connections weren't reused
+    def run():
+        connection = connections.create_connection(DEFAULT_DB_ALIAS)
+        try:
+            with connection.cursor() as cursor:
+                cursor.execute("SELECT 1")
+        finally:
+            connection.close()
+    return run
+
+
+@scenario('db.request_cycle')
+def bench_db_request_cycle(dataset: Dataset):
+    # One query between the signals Django closes expired connections on, so
+    # with CONN_MAX_AGE (or a pool) this stays far below db.connect
+    vehicle_id = dataset.sample_vehicle_id
+
+    def run():
+        request_started.send(sender=WSGIHandler)
+        try:
+            return Vehicle.objects.filter(pk=vehicle_id).exists()
+        finally:
+            request_finished.send(sender=WSGIHandler)
+    return run
+
+
+@scenario('selectors.vehicle_get_build_summary')
+def bench_build_summary(dataset: Dataset):
+    vehicle_id = dataset.sample_vehicle_id
+    return lambda: vehicle_get_build_summary(vehicle_id)
+
+
+def _register_viewset_scenarios(prefix: str, model, owner_filter: str) -> None:
+    @scenario(f"api.{prefix}.list")
+    def bench_list(dataset: Dataset):
+        return _get_ok(_api_client(dataset), f"/api/{prefix}/")
+
+    @scenario(f"api.{prefix}.detail")
+    def bench_detail(dataset: Dataset):
+        if model is None:
+            pk = dataset.sample_vehicle_id
+        else:
+            pk = model.objects.filter(**{owner_filter: dataset.owner}).values_list('pk', flat=True).first()
+        return _get_ok(_api_client(dataset), f"/api/{prefix}/{pk}/")
+
+
+_register_viewset_scenarios('vehicles', None, 'owner')
+_register_viewset_scenarios('service-records', ServiceRecord, 'vehicle__owner')
+_register_viewset_scenarios('upgrades', Upgrade, 'vehicle__owner')
+_register_viewset_scenarios('condition-reports', ConditionReport, 'vehicle__owner')
+
+
+@scenario('api.batch.update_20')
+def bench_batch_endpoint(dataset: Dataset):
+    # What an offline sync sends instead of twenty PATCH requests
+    client = _api_client(dataset)
+    ids = ServiceRecord.objects.filter(vehicle_id=dataset.sample_vehicle_id).values_list('pk', flat=True)[:20]
+    payload = {'operations': [
+        {'op': 'update', 'resource': 'service-records', 'id': pk, 'data': {'is_verified': True}} for pk in ids
+    ]}
+
+    def run():
+        response = client.post('/api/batch/', payload, format='json')
+        assert response.status_code == 200, f"/api/batch/ returned {response.status_code}"
+        return response
+    return run
+
+
+@scenario('api.vehicles.build_summary')
+def bench_build_summary_endpoint(dataset: Dataset):
+    return _get_ok(_api_client(dataset), f"/api/vehicles/{dataset.sample_vehicle_id}/build_summary/")
+
+
+@scenario('api.vehicles.cost_history')
+def bench_cost_history_endpoint(dataset: Dataset):
+    return _get_ok(_api_client(dataset), f"/api/vehicles/{dataset.sample_vehicle_id}/cost_history/")
+
+
+@scenario('api.vehicles.valuation_history')
+def bench_valuation_history_endpoint(dataset: Dataset):
+    # Fewer points than seeded weeks, so the downsampling path is measured
+    return _get_ok(_api_client(dataset), f"/api/vehicles/{dataset.sample_vehicle_id}/valuation_history/?points=20")
+
+
+def _admin_client() -> Client:
+    admin_user, _ = get_user_model().objects.get_or_create(
+        username='bench-admin', defaults={'is_staff': True, 'is_superuser': True})
+    client = Client()
+    client.force_login(admin_user)
+    return client
+
+
+def _register_admin_scenario(model_name: str, query: str = '') -> None:
+    name = f"admin.{model_name}.changelist" + ('.filtered' if query else '')
+
+    @scenario(name)
+    def bench_changelist(dataset: Dataset):
+        return _get_ok(_admin_client(), f"/admin/my_garage/{model_name}/{query}")
+
+
+for _model_name in ('vehicle', 'servicerecord', 'upgrade', 'conditionreport'):
+    _register_admin_scenario(_model_name)
+# A filter matching most rows: the count of a filtered result is the costly one
+_register_admin_scenario('servicerecord', '?category__exact=MAINTENANCE')
+
+
+def _page_client(dataset: Dataset) -> Client:
+    client = Client()
+    client.force_login(dataset.owner)
+    return client
+
+
+@scenario('views.garage_dashboard')
+def bench_dashboard(dataset: Dataset):
+    # At --scale 100 this is a 100-vehicle garage with every card fragment cached
+    run = _get_ok(_page_client(dataset), '/garage/')
+    run()
+    return run
+
+
+@scenario('views.garage_dashboard.cold')
+def bench_dashboard_cold(dataset: Dataset):
+    # Every vehicle changed since the last visit, so every card renders again
+    client = _page_client(dataset)
+
+    def run():
+        vehicle_touch(*dataset.vehicle_ids)
+        response = client.get('/garage/')
+        assert response.status_code == 200, f"/garage/ returned {response.status_code}"
+        return response
+    return run
+
+
+@scenario('views.vehicle_detail')
+def bench_vehicle_detail(dataset: Dataset):
+    run = _get_ok(_page_client(dataset), f"/garage/{dataset.sample_vehicle_id}/")
+    run()
+    return run
+
+
+@scenario('selectors.garage_get_valuation')
+def bench_garage_valuation(dataset: Dataset):
+    vehicles = Vehicle.objects.filter(owner=dataset.owner)
+    return lambda: garage_get_valuation(vehicles)
+
+
+@scenario('valuation.compute_valuations.100k')
+def bench_compute_valuations(dataset: Dataset):
+    # The vectorized pass alone, on synthetic inputs independent of the scale
+    rng = np.random.default_rng(0)
+    n = 100_000
+    inputs = ValuationInputs.empty(
+        np.arange(n), [c for c, _ in Upgrade.CATEGORY_CHOICES], [a for a, _ in ConditionReport.AREA_CHOICES]
+    )
+    inputs.market_value[:] = rng.uniform(5_000, 120_000, n)
+    inputs.total_investment[:] = rng.uniform(5_000, 150_000, n)
+    inputs.upgrade_cost[:] = rng.uniform(0, 3_000, inputs.upgrade_cost.shape)
+    inputs.grades[:] = rng.uniform(1, 10, inputs.grades.shape)
+    return lambda: compute_valuations(inputs, settings.VALUATION_MODEL, settings.VALUATION_SCENARIOS)
+
+
+def _sample_vins(n: int) -> List[str]:
+    """`n` well-formed VINs over the dataset's manufacturers, with valid check digits."""
+    rng = np.random.default_rng(0)
+    prefixes = ['JHMAP114', 'JN1AZ34D', 'WBSBL934', '1G1YY22G', '5YJ3E1EA', 'ZFFAA000', 'KMHXX000']
+    vins = []
+    for i in range(n):
+        vin = f"{prefixes[i % len(prefixes)]}0{YEAR_CODES[rng.integers(len(YEAR_CODES))]}A{rng.integers(10**6):06d}"
+        vins.append(vin[:8] + check_digit(vin) + vin[9:])
+    return vins
+
+
+@scenario('vin.decode.5000')
+def bench_vin_decode(dataset: Dataset):
+    index = get_vin_index()
+    vins = _sample_vins(5000)
+    return lambda: [index.decode(vin) for vin in vins]
+
+
+@scenario('api.vins.decode')
+def bench_vin_decode_endpoint(dataset: Dataset):
+    client = _api_client(dataset)
+    payload = {'vins': _sample_vins(settings.VIN_DECODE_BATCH_MAX)}
+
+    def run():
+        response = client.post('/api/vins/decode/', payload, format='json')
+        assert response.status_code == 200, f"/api/vins/decode/ returned {response.status_code}"
+        return response
+    return run
+
+
+def _search_term(dataset: Dataset) -> str:
+    # A word that occurs in the data, so the search has results to rank
+    description = ServiceRecord.objects.filter(vehicle_id=dataset.sample_vehicle_id).values_list(
+        'description', flat=True).first()
+    return max(description.split(), key=len).strip('.').lower()
+
+
+@scenario('selectors.search_documents')
+def bench_search(dataset: Dataset):
+    term = _search_term(dataset)
+    return lambda: search_documents(dataset.owner, term)
+
+
+@scenario('api.search')
+def bench_search_endpoint(dataset: Dataset):
+    return _get_ok(_api_client(dataset), f"/api/search/?q={_search_term(dataset)}")
+
+
+def _receipt_record(dataset: Dataset, n: int = 0) -> ServiceRecord:
+    return ServiceRecord.objects.create(
+        vehicle_id=dataset.sample_vehicle_id,
+        date='2024-01-01',
+        vendor='Processing...',
+        description='Awaiting AI extraction',
+        total_cost=0,
+        receipt_image=SimpleUploadedFile(f"bench-{n}.jpg", b'\xff\xd8\xff' + b'0' * 2048),
+        is_verified=False,
+    )
+
+
+@scenario('tasks.task_process_receipt_ocr')
+def bench_ocr_task(dataset: Dataset):
+    record = _receipt_record(dataset)
+
+    def run():
+        return task_process_receipt_ocr.apply(args=(record.id,)).get()
+    return run
+
+
+@scenario('tasks.task_process_receipt_ocr_batch')
+def bench_ocr_batch_task(dataset: Dataset):
+    record_ids = [_receipt_record(dataset, n).id for n in range(16)]
+
+    def run():
+        return task_process_receipt_ocr_batch.apply(args=(record_ids,)).get()
+    return run
+
+
+@scenario('tasks.task_bulk_valuation_refresh')
+def bench_bulk_refresh(dataset: Dataset):
+    def run():
+        # Treat every vehicle as stale so each iteration revalues the whole garage
+        with override_settings(VALUATION_FRESHNESS_WINDOW=datetime.timedelta(0)):
+            return task_bulk_valuation_refresh.apply().get()
+    return run
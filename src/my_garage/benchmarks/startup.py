@@ -0,0 +1,117 @@
+"""
+Process start-up cost of the project's entry points.
+
+Each target is imported in a fresh interpreter under `python -X importtime`,
+which reports wall time, resident memory and where the import time went. Heavy
+client libraries are imported by the code that uses them, not at start-up;
+DEFERRED_MODULES lists what each entry point must not load.
+"""
+import json
+import os
+import subprocess
+import sys
+from collections import defaultdict
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional
+
+from django.conf import settings
+
+STARTUP_TARGETS = {
+    # manage.py commands such as migrate
+    'setup': "import django; django.setup()",
+    'worker': ("import django; django.setup(); from config.celery_app import app; "
+               "app.loader.import_default_modules()"),
+    'web': "from config.wsgi import application; import config.urls",
+}
+
+_CLIENTS = ('pymongo', 'bson', 'numpy', 'boto3')
+DEFERRED_MODULES = {
+    'setup': ('requests',) + _CLIENTS,
+    'worker': ('requests',) + _CLIENTS,
+    # DRF imports requests itself
+    'web': _CLIENTS,
+}
+
+# Resident memory once started: /proc where available, since a child's
+# ru_maxrss on Linux also counts the parent it was forked from
+_CHILD = """
+import json, os, sys, time
+start = time.perf_counter()
+{code}
+seconds = time.perf_counter() - start
+try:
+    with open('/proc/self/statm') as statm:
+        rss_kb = int(statm.read().split()[1]) * os.sysconf('SC_PAGE_SIZE') // 1024
+except OSError:
+    try:
+        import resource
+        rss_kb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        if sys.platform == 'darwin':
+            rss_kb //= 1024
+    except ImportError:
+        rss_kb = None
+print(json.dumps({{'seconds': seconds, 'rss_kb': rss_kb, 'modules': sorted(sys.modules)}}))
+"""
+
+
+@dataclass
+class ImportRecord:
+    """One line of `-X importtime` output."""
+    name: str
+    self_us: int
+    cumulative_us: int
+    depth: int
+
+
+def parse_importtime(output: str) -> List[ImportRecord]:
+    """Parses `-X importtime` stderr, ignoring any other lines."""
+    records = []
+    for line in output.splitlines():
+        if not line.startswith('import time:') or 'imported package' in line:
+            continue
+        self_us, cumulative_us, name = line[len('import time:'):].split('|', 2)
+        depth = (len(name) - len(name.lstrip()) - 1) // 2
+        records.append(ImportRecord(name.strip(), int(self_us), int(cumulative_us), depth))
+    return records
+
+
+def measure_startup(target: str, top: int = 15, env: Optional[Dict[str, str]] = None) -> Dict[str, Any]:
+    """
+    Starts `target` (a key of STARTUP_TARGETS) in a new interpreter with the
+    current settings module and reports its start-up time, resident memory, total
+    import time, the slowest top-level imports and self time per package.
+    """
+    child_env = {
+        **os.environ,
+        'DJANGO_SETTINGS_MODULE': os.environ.get('DJANGO_SETTINGS_MODULE', settings.SETTINGS_MODULE),
+        'PYTHONPATH': os.pathsep.join(filter(None, [str(settings.BASE_DIR / 'src'), os.environ.get('PYTHONPATH')])),
+        **(env or {}),
+    }
+    completed = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', _CHILD.format(code=STARTUP_TARGETS[target])],
+        capture_output=True, text=True, env=child_env, cwd=settings.BASE_DIR,
+    )
+    if completed.returncode != 0:
+        raise RuntimeError(f"Starting {target!r} failed:\n{completed.stderr[-2000:]}")
+    child = json.loads(completed.stdout.strip().splitlines()[-1])
+    records = parse_importtime(completed.stderr)
+
+    by_package: Dict[str, int] = defaultdict(int)
+    for record in records:
+        by_package[record.name.split('.')[0]] += record.self_us
+    roots = sorted((r for r in records if r.depth == 0), key=lambda r: r.cumulative_us, reverse=True)
+    loaded = set(child['modules'])
+
+    return {
+        'target': target,
+        'seconds': round(child['seconds'], 4),
+        'rss_mb': round(child['rss_kb'] / 1024, 1) if child['rss_kb'] else None,
+        'import_ms': round(sum(r.cumulative_us for r in roots) / 1000, 1),
+        'modules': len(loaded),
+        'deferred_loaded': [name for name in DEFERRED_MODULES[target] if name in loaded],
+        'slowest_imports': [{'module': r.name, 'ms': round(r.cumulative_us / 1000, 1)} for r in roots[:top]],
+        'packages': [
+            {'package': name, 'ms': round(us / 1000, 1)}
+            for name, us in sorted(by_package.items(), key=lambda item: item[1], reverse=True)[:top]
+        ],
+    }
@@ -0,0 +1,141 @@
+"""In-process stand-ins for the FastAPI OCR/MCP service and MongoDB."""
+import contextlib
+import itertools
+import json as jsonlib
+from typing import Any, Dict, Iterator, Optional
+from unittest import mock
+
+from bson import ObjectId
+
+from my_garage.utils import mongo
+
+
+class StubResponse:
+    """Minimal `requests.Response` replacement."""
+
+    def __init__(self, payload: Any, status_code: int = 200):
+        self._payload = payload
+        self.status_code = status_code
+
+    def raise_for_status(self) -> None:
+        if self.status_code >= 400:
+            import requests
+            raise requests.HTTPError(f"{self.status_code} from stub service")
+
+    def json(self) -> Dict[str, Any]:
+        return self._payload
+
+    def iter_lines(self) -> Iterator[bytes]:
+        """NDJSON body: one line per item of a list payload."""
+        for item in self._payload:
+            yield jsonlib.dumps(item).encode()
+
+    def __enter__(self) -> 'StubResponse':
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        return None
+
+
+class StubFastAPI:
+    """
+    Answers `requests.post` calls for the OCR and `/mcp/execute` endpoints with
+    deterministic synthetic payloads, so benchmarks measure our side only.
+    """
+
+    def __init__(self, listings_per_search: int = 25):
+        self.listings_per_search = listings_per_search
+        self.calls = 0
+        self._counter = itertools.count()
+
+    def post(self, url: str, json: Optional[Dict[str, Any]] = None, files=None, **kwargs) -> StubResponse:
+        self.calls += 1
+        n = next(self._counter)
+        if url.endswith('/ocr/process'):
+            return StubResponse(self._receipt(n))
+        if url.endswith('/ocr/process-batch'):
+            return StubResponse([
+                {'index': i, 'filename': name, 'ok': True, 'result': self._receipt(n + i)}
+                for i, (_, (name, _file)) in enumerate(files)
+            ])
+        if url.endswith('/mcp/execute'):
+            arguments = (json or {}).get('arguments', {})
+            year_min = int(arguments.get('year_min') or 2000)
+            years = int(arguments.get('year_max') or year_min) - year_min + 1
+            base = 20000 + (n % 100) * 50
+            return StubResponse({
+                'results': [
+                    {'price': base + i * 125, 'url': f"https://stub.example/listing/{n}/{i}",
+                     'make': arguments.get('make', ''), 'model': arguments.get('model', ''),
+                     'year': year_min + i % years, 'mileage': 10000 + i * 1000}
+                    for i in range(self.listings_per_search)
+                ]
+            })
+        return StubResponse({'detail': 'Not Found'}, status_code=404)
+
+    @staticmethod
+    def _receipt(n: int) -> Dict[str, Any]:
+        return {
+            'vendor': f"Stub Motors #{n % 50}",
+            'description': 'Oil change, filter, 5W-30 synthetic',
+            'total_cost': 89.99 + (n % 10),
+            'line_items': [
+                {'description': '5W-30 Synthetic Oil', 'amount': 54.99},
+                {'description': 'Oil filter', 'amount': 12.00},
+                {'description': 'Labor', 'amount': 23.00},
+            ],
+        }
+
+
+class InMemoryCollection:
+    """Just enough of a pymongo Collection for the OCR pipeline."""
+
+    def __init__(self):
+        self.documents: Dict[ObjectId, Dict[str, Any]] = {}
+
+    def insert_one(self, document: Dict[str, Any]):
+        oid = ObjectId()
+        self.documents[oid] = {**document, '_id': oid}
+        return mock.Mock(inserted_id=oid)
+
+    def find_one(self, query: Dict[str, Any]):
+        doc = self.documents.get(query.get('_id'))
+        return dict(doc) if doc else None
+
+
+class InMemoryMongoClient:
+    """Dict-of-dicts replacement for `pymongo.MongoClient`."""
+
+    def __init__(self):
+        self._dbs: Dict[str, Dict[str, InMemoryCollection]] = {}
+
+    def __getitem__(self, db_name: str) -> Dict[str, InMemoryCollection]:
+        db = self._dbs.setdefault(db_name, {})
+        return _AutoCollections(db)
+
+
+class _AutoCollections:
+    def __init__(self, store: Dict[str, InMemoryCollection]):
+        self._store = store
+
+    def __getitem__(self, name: str) -> InMemoryCollection:
+        return self._store.setdefault(name, InMemoryCollection())
+
+
+@contextlib.contextmanager
+def in_memory_mongo() -> Iterator[InMemoryMongoClient]:
+    """Swaps the shared Mongo client for an in-memory one."""
+    previous_client = mongo._client
+    mongo._client = InMemoryMongoClient()
+    try:
+        yield mongo._client
+    finally:
+        mongo._client = previous_client
+
+
+@contextlib.contextmanager
+def stub_external_services(listings_per_search: int = 25) -> Iterator[StubFastAPI]:
+    """Routes outbound HTTP and Mongo traffic to in-process stand-ins."""
+    stub = StubFastAPI(listings_per_search=listings_per_search)
+    with in_memory_mongo(), mock.patch('requests.post', side_effect=stub.post):
+        yield stub
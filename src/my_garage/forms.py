@@ -1,6 +1,7 @@
 """Django forms for my_garage."""
 from django import forms
 from my_garage.models import Vehicle, ServiceRecord, Upgrade
+from my_garage.utils.vin import VinError, clean_vehicle_vin
 
 
 class VehicleForm(forms.ModelForm):
@@ -23,6 +24,12 @@ class VehicleForm(forms.ModelForm):
             'purchase_price': 'Original purchase price in USD',
         }
 
+    def clean_vin(self):
+        try:
+            return clean_vehicle_vin(self.cleaned_data.get('vin'))
+        except VinError as exc:
+            raise forms.ValidationError(str(exc))
+
 
 class ServiceRecordForm(forms.ModelForm):
     """Form for creating service records."""
@@ -48,17 +55,20 @@ class UpgradeForm(forms.ModelForm):
 
     class Meta:
         model = Upgrade
-        fields = ['part_name', 'brand', 'part_number', 'status', 'cost', 'installation_date', 'notes']
+        fields = ['part_name', 'brand', 'part_number', 'category', 'status', 'stage', 'cost', 'installation_date', 'notes']
         widgets = {
             'part_name': forms.TextInput(attrs={'class': 'form-control'}),
             'brand': forms.TextInput(attrs={'class': 'form-control'}),
             'part_number': forms.TextInput(attrs={'class': 'form-control'}),
+            'category': forms.Select(attrs={'class': 'form-control'}),
             'status': forms.Select(attrs={'class': 'form-control'}),
+            'stage': forms.NumberInput(attrs={'class': 'form-control', 'min': 1}),
             'cost': forms.NumberInput(attrs={'class': 'form-control', 'step': '0.01'}),
             'installation_date': forms.DateInput(attrs={'type': 'date', 'class': 'form-control'}),
             'notes': forms.Textarea(attrs={'rows': 3, 'class': 'form-control'}),
         }
         help_texts = {
             'part_number': 'Manufacturer part number (optional)',
+            'stage': 'Build stage this part belongs to (optional)',
             'installation_date': 'Date installed (leave blank if not yet installed)',
         }
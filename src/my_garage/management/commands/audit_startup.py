@@ -0,0 +1,55 @@
+"""Report start-up time, memory and import cost for web, worker and management processes."""
+import json
+import statistics
+
+from django.core.management.base import BaseCommand, CommandError
+
+from my_garage.benchmarks.startup import STARTUP_TARGETS, measure_startup
+
+
+class Command(BaseCommand):
+    help = (
+        "Start each entry point in fresh interpreters under `python -X importtime` and "
+        "report median start-up time and RSS, the slowest imports, and any client "
+        "library that should have been imported lazily."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--target', action='append', choices=sorted(STARTUP_TARGETS), dest='targets',
+            help="Entry point to measure (repeatable). Defaults to all.",
+        )
+        parser.add_argument('--runs', type=int, default=3, help="Fresh starts per target.")
+        parser.add_argument('--top', type=int, default=15, help="Imports and packages listed per target.")
+        parser.add_argument('--json', action='store_true', help="Print the full report as JSON.")
+
+    def handle(self, *args, **options):
+        if options['runs'] < 1 or options['top'] < 1:
+            raise CommandError("--runs and --top must be at least 1.")
+
+        report = {}
+        for target in options['targets'] or sorted(STARTUP_TARGETS):
+            try:
+                runs = [measure_startup(target, top=options['top']) for _ in range(options['runs'])]
+            except RuntimeError as exc:
+                raise CommandError(str(exc))
+            result = runs[-1]
+            result['seconds'] = round(statistics.median(r['seconds'] for r in runs), 4)
+            if result['rss_mb'] is not None:
+                result['rss_mb'] = statistics.median(r['rss_mb'] for r in runs)
+            report[target] = result
+
+        if options['json']:
+            self.stdout.write(json.dumps(report, indent=2))
+            return
+
+        for target, result in report.items():
+            self.stdout.write(
+                f"{target}: {result['seconds'] * 1000:.0f} ms, {result['rss_mb']} MB RSS, "
+                f"{result['modules']} modules ({result['import_ms']:.0f} ms importing)"
+            )
+            for entry in result['slowest_imports']:
+                self.stdout.write(f"  {entry['module']:<50} {entry['ms']:>8.1f} ms")
+            if result['deferred_loaded']:
+                self.stdout.write(self.style.WARNING(
+                    f"  imported at start-up but should be lazy: {', '.join(result['deferred_loaded'])}"))
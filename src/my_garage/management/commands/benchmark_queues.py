@@ -0,0 +1,32 @@
+"""Measure interactive task latency behind a bulk backlog for each worker layout."""
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+
+from my_garage.benchmarks.queues import compare_layouts
+
+
+class Command(BaseCommand):
+    help = (
+        "Run in-process Celery workers on an in-memory broker with the project's queue "
+        "routing and compare interactive latency with dedicated vs shared workers."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--backlog', type=int, default=500, help="Bulk valuations queued first.")
+        parser.add_argument('--probes', type=int, default=20, help="Interactive OCR tasks measured.")
+        parser.add_argument('--interactive-ms', type=float, default=10.0, help="Simulated OCR task duration.")
+        parser.add_argument('--bulk-ms', type=float, default=100.0, help="Simulated valuation task duration.")
+        parser.add_argument('--concurrency', type=int, default=2, help="Workers started per queue assignment.")
+
+    def handle(self, *args, **options):
+        if options['probes'] < 1 or options['backlog'] < 0 or options['concurrency'] < 1:
+            raise CommandError("--probes and --concurrency must be positive and --backlog non-negative.")
+
+        results = compare_layouts(
+            options['backlog'], options['probes'],
+            interactive_seconds=options['interactive_ms'] / 1000,
+            bulk_seconds=options['bulk_ms'] / 1000,
+            concurrency=options['concurrency'],
+        )
+        self.stdout.write(json.dumps(results, indent=2))
@@ -0,0 +1,14 @@
+"""Compile the VIN dataset into the memory-mapped index used for decoding."""
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from my_garage.utils.vin import build_index
+
+
+class Command(BaseCommand):
+    help = "Rebuild VIN_INDEX_PATH from VIN_DATASET_PATH (otherwise done on first decode after a change)."
+
+    def handle(self, *args, **options):
+        count = build_index(settings.VIN_DATASET_PATH, settings.VIN_INDEX_PATH)
+        size = settings.VIN_INDEX_PATH.stat().st_size
+        self.stdout.write(self.style.SUCCESS(f"Indexed {count} VIN prefixes into {settings.VIN_INDEX_PATH} ({size} bytes)."))
@@ -0,0 +1,50 @@
+"""Drive OCR or valuation traffic through Celery against a running FastAPI service."""
+import contextlib
+import json
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from my_garage.models import Vehicle
+from my_garage.benchmarks.loadtest import load_test_ocr, load_test_valuations
+from my_garage.benchmarks.stubs import in_memory_mongo
+
+
+class Command(BaseCommand):
+    help = (
+        "Load-test the Django/Celery side end-to-end against the FastAPI service at "
+        "FASTAPI_BASE_URL (start the stand-in with `pixi run fastapi`)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('target', choices=['ocr', 'valuation'])
+        parser.add_argument('--count', type=int, default=100, help="Number of tasks to run.")
+        parser.add_argument('--concurrency', type=int, default=8, help="Tasks in flight at once.")
+        parser.add_argument('--vehicle', type=int, help="Vehicle id receiving OCR test receipts.")
+        parser.add_argument('--image-kb', type=int, default=256, help="Synthetic receipt size for OCR.")
+        parser.add_argument(
+            '--in-memory-mongo', action='store_true',
+            help="Store OCR documents in process memory instead of MongoDB (eager Celery only).",
+        )
+
+    def handle(self, *args, **options):
+        if options['count'] < 1 or options['concurrency'] < 1:
+            raise CommandError("--count and --concurrency must be positive.")
+
+        self.stderr.write(f"Target: {settings.FASTAPI_BASE_URL} ({options['target']})")
+        mongo = in_memory_mongo() if options['in_memory_mongo'] else contextlib.nullcontext()
+        try:
+            with mongo:
+                if options['target'] == 'valuation':
+                    summary = load_test_valuations(options['count'], options['concurrency'])
+                else:
+                    if not options['vehicle']:
+                        raise CommandError("--vehicle is required for the ocr target.")
+                    vehicle = Vehicle.objects.get(pk=options['vehicle'])
+                    summary = load_test_ocr(
+                        vehicle, options['count'], options['concurrency'], options['image_kb'] * 1024
+                    )
+        except (ValueError, Vehicle.DoesNotExist) as e:
+            raise CommandError(str(e))
+
+        self.stdout.write(json.dumps(summary, indent=2, sort_keys=True))
@@ -0,0 +1,15 @@
+"""Rebuild the monthly service cost rollups from the service records."""
+from django.core.management.base import BaseCommand
+
+from my_garage.api.services import service_cost_rollup_rebuild
+
+
+class Command(BaseCommand):
+    help = "Recompute ServiceCostRollup buckets (needed after bulk imports that bypass signals)."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--vehicle', type=int, action='append', help="Only rebuild these vehicle ids.")
+
+    def handle(self, *args, **options):
+        buckets = service_cost_rollup_rebuild(options['vehicle'])
+        self.stdout.write(self.style.SUCCESS(f"Wrote {buckets} rollup buckets."))
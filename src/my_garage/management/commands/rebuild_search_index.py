@@ -0,0 +1,18 @@
+"""Rebuild the full-text search index from the records it covers."""
+from django.core.management.base import BaseCommand
+from django.db import connection
+
+from my_garage.api.services import search_rebuild_index
+from my_garage.utils.search import install_search_schema
+
+
+class Command(BaseCommand):
+    help = "Recreate every SearchDocument (needed after bulk imports that bypass signals)."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=5000)
+
+    def handle(self, *args, **options):
+        install_search_schema(connection)
+        written = search_rebuild_index(batch_size=options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(f"Indexed {written} documents."))
@@ -0,0 +1,89 @@
+"""Run the benchmark suite against throwaway databases and write a JSON report."""
+import json
+import tempfile
+from pathlib import Path
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test.utils import override_settings, setup_test_environment, teardown_test_environment
+
+from my_garage.benchmarks.datasets import SCALES
+from my_garage.benchmarks.runner import (
+    build_report,
+    compare_reports,
+    git_revision,
+    run_scale,
+    select_scenarios,
+)
+
+
+class Command(BaseCommand):
+    help = (
+        "Seed each requested scale into a fresh test database, time the selectors, "
+        "API endpoints and Celery pipelines, and write the results as JSON."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--scale', action='append', choices=sorted(SCALES), dest='scales',
+            help="Dataset scale to run (repeatable). Defaults to 1 and 100.",
+        )
+        parser.add_argument(
+            '--scenario', action='append', dest='patterns', default=[],
+            help="Glob of scenario names to run, e.g. 'api.*' (repeatable).",
+        )
+        parser.add_argument('--repeat', type=int, default=10, help="Timed iterations per scenario.")
+        parser.add_argument(
+            '--output', type=Path,
+            help="Report path. Defaults to benchmarks/<git revision>.json in the project root.",
+        )
+        parser.add_argument('--compare', type=Path, help="Previous report to diff median timings against.")
+        parser.add_argument('--list', action='store_true', help="List scenario names and exit.")
+
+    def handle(self, *args, **options):
+        scenario_names = select_scenarios(options['patterns'])
+        if options['list']:
+            for name in scenario_names:
+                self.stdout.write(name)
+            return
+        if not scenario_names:
+            raise CommandError("No scenarios match the given --scenario patterns.")
+        if options['repeat'] < 1:
+            raise CommandError("--repeat must be at least 1.")
+
+        scales = [SCALES[name] for name in (options['scales'] or ['1', '100'])]
+        results = {}
+
+        setup_test_environment()
+        try:
+            with tempfile.TemporaryDirectory() as media_root, override_settings(MEDIA_ROOT=media_root):
+                for scale in scales:
+                    self.stdout.write(f"Scale {scale.name}: {scale.vehicles} vehicles, "
+                                      f"{scale.service_records} service records")
+                    # A fresh database per scale keeps row counts exact and teardown cheap
+                    old_name = connection.creation.create_test_db(verbosity=0, autoclobber=True)
+                    try:
+                        results[scale.name] = run_scale(scale, scenario_names, options['repeat'])
+                    finally:
+                        connection.creation.destroy_test_db(old_name, verbosity=0)
+
+                    for name, stats in results[scale.name]['scenarios'].items():
+                        self.stdout.write(f"  {name:<45} median {stats['median_ms']:>10.3f} ms")
+        finally:
+            teardown_test_environment()
+
+        report = build_report(results)
+        output = options['output'] or Path(settings.BASE_DIR) / 'benchmarks' / f"{git_revision()}.json"
+        output.parent.mkdir(parents=True, exist_ok=True)
+        output.write_text(json.dumps(report, indent=2, sort_keys=True) + "\n")
+        self.stdout.write(self.style.SUCCESS(f"Wrote {output}"))
+
+        if options['compare']:
+            baseline = json.loads(options['compare'].read_text())
+            for row in compare_reports(baseline, report):
+                flag = self.style.ERROR if row['ratio'] > 1.1 else self.style.SUCCESS
+                self.stdout.write(flag(
+                    f"  [{row['scale']}] {row['scenario']:<45} "
+                    f"{row['baseline_ms']:>10.3f} -> {row['current_ms']:>10.3f} ms (x{row['ratio']})"
+                ))
@@ -0,0 +1,47 @@
+# Generated by Django 5.2.18 on 2026-10-19 04:28
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+from my_garage.utils.search import install_search_schema, uninstall_search_schema
+
+
+def install_index(apps, schema_editor):
+    install_search_schema(schema_editor.connection)
+
+
+def uninstall_index(apps, schema_editor):
+    uninstall_search_schema(schema_editor.connection)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('my_garage', '0002_vehicle_valuation_updated_at'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SearchDocument',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(choices=[('SERVICE', 'Service Record'), ('UPGRADE', 'Upgrade'), ('CONDITION', 'Condition Report')], max_length=20)),
+                ('object_id', models.PositiveBigIntegerField()),
+                ('title', models.CharField(max_length=255)),
+                ('body', models.TextField(blank=True)),
+                ('ocr_text', models.TextField(blank=True)),
+                ('vehicle_label', models.CharField(blank=True, max_length=255)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('owner', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to=settings.AUTH_USER_MODEL)),
+                ('vehicle', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='search_documents', to='my_garage.vehicle')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['owner', 'kind'], name='my_garage_s_owner_i_d7f88f_idx')],
+                'constraints': [models.UniqueConstraint(fields=('kind', 'object_id'), name='unique_search_document')],
+            },
+        ),
+        # Existing rows are indexed by `manage.py rebuild_search_index`
+        migrations.RunPython(install_index, uninstall_index),
+    ]
@@ -0,0 +1,47 @@
+# Generated by Django 5.2.18 on 2026-10-19 04:30
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import Count, Sum
+from django.db.models.functions import TruncMonth
+
+
+def backfill_rollups(apps, schema_editor):
+    ServiceRecord = apps.get_model('my_garage', 'ServiceRecord')
+    ServiceCostRollup = apps.get_model('my_garage', 'ServiceCostRollup')
+    buckets = (
+        ServiceRecord.objects.filter(is_verified=True)
+        .annotate(month=TruncMonth('date'))
+        .values('vehicle_id', 'month', 'category')
+        .annotate(total=Sum('total_cost'), record_count=Count('id'))
+        .order_by()
+    )
+    ServiceCostRollup.objects.bulk_create(
+        (ServiceCostRollup(**bucket) for bucket in buckets.iterator()), batch_size=5000
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('my_garage', '0003_searchdocument'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ServiceCostRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('month', models.DateField()),
+                ('category', models.CharField(choices=[('MAINTENANCE', 'Maintenance'), ('REPAIR', 'Repair'), ('UPGRADE', 'Performance Upgrade')], max_length=20)),
+                ('total', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('record_count', models.IntegerField(default=0)),
+                ('vehicle', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='cost_rollups', to='my_garage.vehicle')),
+            ],
+            options={
+                'ordering': ['month', 'category'],
+                'constraints': [models.UniqueConstraint(fields=('vehicle', 'month', 'category'), name='unique_cost_rollup_bucket')],
+            },
+        ),
+        migrations.RunPython(backfill_rollups, migrations.RunPython.noop),
+    ]
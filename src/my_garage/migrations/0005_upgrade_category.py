@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-19 04:32
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('my_garage', '0004_servicecostrollup'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='upgrade',
+            name='category',
+            field=models.CharField(choices=[('ENGINE', 'Engine/Power'), ('DRIVETRAIN', 'Drivetrain'), ('SUSPENSION', 'Suspension'), ('BRAKES', 'Brakes'), ('WHEELS', 'Wheels/Tires'), ('EXTERIOR', 'Exterior/Aero'), ('INTERIOR', 'Interior'), ('ELECTRONICS', 'Electronics'), ('OTHER', 'Other')], default='OTHER', max_length=20),
+        ),
+    ]
@@ -0,0 +1,46 @@
+# Generated by Django 5.2.18 on 2026-10-19 04:35
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.db import migrations, models
+from django.db.models.functions import Coalesce
+
+
+def seed_baselines(apps, schema_editor):
+    """Starts each vehicle's ledger at its current value."""
+    Vehicle = apps.get_model('my_garage', 'Vehicle')
+    ValuationEvent = apps.get_model('my_garage', 'ValuationEvent')
+    vehicles = Vehicle.objects.annotate(as_of=Coalesce('valuation_updated_at', 'created_at')).values_list(
+        'pk', 'current_market_value', 'as_of')
+    ValuationEvent.objects.bulk_create(
+        (ValuationEvent(vehicle_id=pk, source='BASELINE', amount=value, is_absolute=True,
+                        value_after=value, created_at=as_of)
+         for pk, value, as_of in vehicles.iterator()),
+        batch_size=5000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('my_garage', '0005_upgrade_category'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ValuationEvent',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('source', models.CharField(choices=[('BASELINE', 'Initial Value'), ('MARKET', 'Market Comparables'), ('CONDITION', 'Condition Report'), ('MANUAL', 'Manual Edit')], max_length=10)),
+                ('amount', models.DecimalField(decimal_places=2, max_digits=12)),
+                ('is_absolute', models.BooleanField()),
+                ('value_after', models.DecimalField(decimal_places=2, max_digits=12)),
+                ('created_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('vehicle', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='valuation_events', to='my_garage.vehicle')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['vehicle', 'created_at'], name='my_garage_v_vehicle_54bdaf_idx')],
+            },
+        ),
+        migrations.RunPython(seed_baselines, migrations.RunPython.noop),
+    ]
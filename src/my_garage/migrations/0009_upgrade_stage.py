@@ -0,0 +1,22 @@
+# Generated by Django 5.2.18 on 2026-10-19 04:43
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('my_garage', '0008_uploadsession_storage_key'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='upgrade',
+            name='stage',
+            field=models.PositiveSmallIntegerField(blank=True, null=True),
+        ),
+        migrations.AddIndex(
+            model_name='upgrade',
+            index=models.Index(fields=['vehicle', 'stage'], name='my_garage_u_vehicle_eb74de_idx'),
+        ),
+    ]
@@ -0,0 +1,49 @@
+# Generated by Django 5.2.18 on 2026-10-19 04:45
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('my_garage', '0009_upgrade_stage'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TrackedPart',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('brand', models.CharField(max_length=100)),
+                ('part_number', models.CharField(max_length=100)),
+                ('name', models.CharField(blank=True, max_length=255)),
+                ('last_price', models.DecimalField(blank=True, decimal_places=2, max_digits=10, null=True)),
+                ('last_checked_at', models.DateTimeField(blank=True, null=True)),
+                ('next_check_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('check_interval', models.DurationField()),
+            ],
+            options={
+                'indexes': [models.Index(fields=['next_check_at'], name='my_garage_t_next_ch_be35ed_idx')],
+                'constraints': [models.UniqueConstraint(fields=('brand', 'part_number'), name='unique_tracked_part')],
+            },
+        ),
+        migrations.AddField(
+            model_name='upgrade',
+            name='tracked_part',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='upgrades', to='my_garage.trackedpart'),
+        ),
+        migrations.CreateModel(
+            name='PartPricePoint',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('price', models.DecimalField(decimal_places=2, max_digits=10)),
+                ('observed_at', models.DateTimeField()),
+                ('part', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='price_points', to='my_garage.trackedpart')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['part', 'observed_at'], name='my_garage_p_part_id_85a27a_idx')],
+            },
+        ),
+    ]
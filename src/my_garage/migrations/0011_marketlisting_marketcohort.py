@@ -0,0 +1,48 @@
+# Generated by Django 5.2.18 on 2026-10-19 05:04
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('my_garage', '0010_trackedpart_partpricepoint'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='MarketCohort',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('make', models.CharField(max_length=50)),
+                ('model', models.CharField(max_length=50)),
+                ('year', models.PositiveIntegerField()),
+                ('fetched_at', models.DateTimeField()),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('make', 'model', 'year'), name='unique_market_cohort')],
+            },
+        ),
+        migrations.CreateModel(
+            name='MarketListing',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('url_hash', models.CharField(max_length=64, unique=True)),
+                ('url', models.URLField(max_length=500)),
+                ('source', models.CharField(blank=True, max_length=100)),
+                ('make', models.CharField(max_length=50)),
+                ('model', models.CharField(max_length=50)),
+                ('year', models.PositiveIntegerField()),
+                ('trim', models.CharField(blank=True, max_length=100)),
+                ('mileage', models.PositiveIntegerField(blank=True, null=True)),
+                ('price', models.DecimalField(decimal_places=2, max_digits=12)),
+                ('sold_date', models.DateField(blank=True, null=True)),
+                ('first_seen_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('last_seen_at', models.DateTimeField(default=django.utils.timezone.now)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['make', 'model', 'year', 'mileage'], name='my_garage_m_make_432fd9_idx'), models.Index(fields=['make', 'model', 'sold_date'], name='my_garage_m_make_d4c1ba_idx')],
+            },
+        ),
+    ]
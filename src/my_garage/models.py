@@ -1,4 +1,7 @@
+import uuid
+
 from django.db import models
+from django.utils import timezone
 from django.conf import settings
 from django.core.validators import MinValueValidator, MaxValueValidator
 
@@ -19,6 +22,7 @@ class Vehicle(models.Model):
     # Financials
     purchase_price = models.DecimalField(max_digits=12, decimal_places=2, null=True, blank=True)
     current_market_value = models.DecimalField(max_digits=12, decimal_places=2, default=0.00)
+    valuation_updated_at = models.DateTimeField(null=True, blank=True)
 
     # Metadata
     mileage = models.PositiveIntegerField(default=0)
@@ -60,17 +64,38 @@ class Upgrade(models.Model):
         ('ORDERED', 'Ordered'),
         ('INSTALLED', 'Installed'),
     ]
+    CATEGORY_CHOICES = [
+        ('ENGINE', 'Engine/Power'),
+        ('DRIVETRAIN', 'Drivetrain'),
+        ('SUSPENSION', 'Suspension'),
+        ('BRAKES', 'Brakes'),
+        ('WHEELS', 'Wheels/Tires'),
+        ('EXTERIOR', 'Exterior/Aero'),
+        ('INTERIOR', 'Interior'),
+        ('ELECTRONICS', 'Electronics'),
+        ('OTHER', 'Other'),
+    ]
 
     vehicle = models.ForeignKey(Vehicle, on_delete=models.CASCADE, related_name="upgrades")
     part_name = models.CharField(max_length=255)
     brand = models.CharField(max_length=100, blank=True)
     part_number = models.CharField(max_length=100, blank=True)
+    category = models.CharField(max_length=20, choices=CATEGORY_CHOICES, default='OTHER')
     status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='WISHLIST')
+    stage = models.PositiveSmallIntegerField(null=True, blank=True)  # Build roadmap stage (1 = Stage 1), if planned
+    tracked_part = models.ForeignKey(
+        'TrackedPart', on_delete=models.SET_NULL, null=True, blank=True, related_name="upgrades"
+    )  # Shared price tracking, set from brand + part_number
 
     cost = models.DecimalField(max_digits=10, decimal_places=2, default=0.00)
     installation_date = models.DateField(null=True, blank=True)
     notes = models.TextField(blank=True)
 
+    class Meta:
+        indexes = [
+            models.Index(fields=['vehicle', 'stage']),
+        ]
+
 
 class ConditionReport(models.Model):
     """Stores AI-graded assessments of the car's visual state."""
@@ -91,3 +116,212 @@ class ConditionReport(models.Model):
     value_adjustment = models.DecimalField(max_digits=10, decimal_places=2, default=0.00)
 
     created_at = models.DateTimeField(auto_now_add=True)
+
+
+class SearchDocument(models.Model):
+    """
+    Searchable text for service records, upgrades and condition reports.
+    Rows are kept in sync by signals; the full-text index over them is
+    database specific (see utils/search.py).
+    """
+    KIND_CHOICES = [
+        ('SERVICE', 'Service Record'),
+        ('UPGRADE', 'Upgrade'),
+        ('CONDITION', 'Condition Report'),
+    ]
+
+    kind = models.CharField(max_length=20, choices=KIND_CHOICES)
+    object_id = models.PositiveBigIntegerField()
+    owner = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name="+")
+    vehicle = models.ForeignKey(Vehicle, on_delete=models.CASCADE, related_name="search_documents")
+
+    title = models.CharField(max_length=255)
+    body = models.TextField(blank=True)
+    ocr_text = models.TextField(blank=True)  # Line items extracted from the receipt
+    vehicle_label = models.CharField(max_length=255, blank=True)
+
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['kind', 'object_id'], name='unique_search_document'),
+        ]
+        indexes = [
+            models.Index(fields=['owner', 'kind']),
+        ]
+
+
+class ServiceCostRollup(models.Model):
+    """
+    Verified service spend per vehicle, calendar month and category.
+    Maintained incrementally by signals so cost charts never scan history.
+    """
+    vehicle = models.ForeignKey(Vehicle, on_delete=models.CASCADE, related_name="cost_rollups")
+    month = models.DateField()  # First day of the month
+    category = models.CharField(max_length=20, choices=ServiceRecord.CATEGORY_CHOICES)
+
+    total = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    record_count = models.IntegerField(default=0)
+
+    class Meta:
+        ordering = ['month', 'category']
+        constraints = [
+            models.UniqueConstraint(fields=['vehicle', 'month', 'category'], name='unique_cost_rollup_bucket'),
+        ]
+
+
+class ValuationEvent(models.Model):
+    """
+    Append-only ledger of changes to a vehicle's market value.
+    `Vehicle.current_market_value` is the cached result of replaying it;
+    `value_after` stores that result per row so history reads never replay.
+    """
+    SOURCE_CHOICES = [
+        ('BASELINE', 'Initial Value'),
+        ('MARKET', 'Market Comparables'),
+        ('CONDITION', 'Condition Report'),
+        ('MANUAL', 'Manual Edit'),
+    ]
+
+    vehicle = models.ForeignKey(Vehicle, on_delete=models.CASCADE, related_name="valuation_events")
+    source = models.CharField(max_length=10, choices=SOURCE_CHOICES)
+    amount = models.DecimalField(max_digits=12, decimal_places=2)  # New value, or the change if not absolute
+    is_absolute = models.BooleanField()
+    value_after = models.DecimalField(max_digits=12, decimal_places=2)
+    created_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['vehicle', 'created_at']),
+        ]
+
+
+class UploadSession(models.Model):
+    """
+    A resumable upload: created with the final size, filled by appending
+    chunks at the current offset, then finalized and handed to the pipeline
+    for its purpose. Chunks are staged on disk as they arrive, so no request
+    holds the whole file. With S3 media storage the client can instead
+    upload to `storage_key` with a presigned POST and Django never sees the bytes.
+    """
+    PURPOSE_CHOICES = [
+        ('RECEIPT', 'Service Receipt'),
+    ]
+    STATUS_CHOICES = [
+        ('UPLOADING', 'Uploading'),
+        ('PROCESSING', 'Processing'),
+        ('COMPLETE', 'Complete'),
+        ('FAILED', 'Failed'),
+    ]
+
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    owner = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name="upload_sessions")
+    vehicle = models.ForeignKey(Vehicle, on_delete=models.CASCADE, related_name="upload_sessions")
+    purpose = models.CharField(max_length=20, choices=PURPOSE_CHOICES, default='RECEIPT')
+    filename = models.CharField(max_length=255)
+    content_type = models.CharField(max_length=100, blank=True)
+    size = models.PositiveBigIntegerField()  # Total bytes declared up front
+    offset = models.PositiveBigIntegerField(default=0)  # Bytes received so far
+    storage_key = models.CharField(max_length=255, blank=True)  # Set when the client uploads straight to storage
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='UPLOADING')
+    service_record = models.ForeignKey(
+        ServiceRecord, on_delete=models.SET_NULL, null=True, blank=True, related_name="+"
+    )
+    error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['status', 'updated_at']),
+        ]
+
+    def __str__(self):
+        return f"{self.filename} ({self.offset}/{self.size})"
+
+
+class TrackedPart(models.Model):
+    """
+    One distinct part (brand + part number) whose price is polled from the
+    Web MCP on behalf of every wishlist upgrade that references it.
+    `check_interval` shrinks when the price moves and grows while it holds.
+    """
+    brand = models.CharField(max_length=100)
+    part_number = models.CharField(max_length=100)  # Normalized: upper case, letters and digits only
+    name = models.CharField(max_length=255, blank=True)
+    last_price = models.DecimalField(max_digits=10, decimal_places=2, null=True, blank=True)
+    last_checked_at = models.DateTimeField(null=True, blank=True)
+    next_check_at = models.DateTimeField(default=timezone.now)
+    check_interval = models.DurationField()
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['brand', 'part_number'], name='unique_tracked_part'),
+        ]
+        indexes = [
+            models.Index(fields=['next_check_at']),
+        ]
+
+    def __str__(self):
+        return f"{self.brand} {self.part_number}"
+
+
+class PartPricePoint(models.Model):
+    """A price change of a tracked part; the price holds until the next point."""
+    part = models.ForeignKey(TrackedPart, on_delete=models.CASCADE, related_name="price_points")
+    price = models.DecimalField(max_digits=10, decimal_places=2)
+    observed_at = models.DateTimeField()
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['part', 'observed_at']),
+        ]
+
+
+class MarketListing(models.Model):
+    """
+    A comparable listing found by the Web MCP agent, kept so valuations are
+    computed from local data. One row per listing URL (`url_hash` is its
+    SHA-256); make, model and trim are stored lower case.
+    """
+    url_hash = models.CharField(max_length=64, unique=True)
+    url = models.URLField(max_length=500)
+    source = models.CharField(max_length=100, blank=True)
+    make = models.CharField(max_length=50)
+    model = models.CharField(max_length=50)
+    year = models.PositiveIntegerField()
+    trim = models.CharField(max_length=100, blank=True)
+    mileage = models.PositiveIntegerField(null=True, blank=True)
+    price = models.DecimalField(max_digits=12, decimal_places=2)
+    sold_date = models.DateField(null=True, blank=True)
+    first_seen_at = models.DateTimeField(default=timezone.now)
+    last_seen_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        indexes = [
+            # Comparables: equal make/model, then year and mileage ranges
+            models.Index(fields=['make', 'model', 'year', 'mileage']),
+            models.Index(fields=['make', 'model', 'sold_date']),
+        ]
+
+    def __str__(self):
+        return f"{self.year} {self.make} {self.model} ({self.price})"
+
+
+class MarketCohort(models.Model):
+    """
+    When the listings of one make/model/year were last fetched from the Web
+    MCP agent; cohorts older than MARKET_COHORT_TTL are topped up on demand.
+    """
+    make = models.CharField(max_length=50)
+    model = models.CharField(max_length=50)
+    year = models.PositiveIntegerField()
+    fetched_at = models.DateTimeField()
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['make', 'model', 'year'], name='unique_market_cohort'),
+        ]
+
+    def __str__(self):
+        return f"{self.year} {self.make} {self.model}"
@@ -0,0 +1,130 @@
+"""Signal handlers keeping derived tables (search index, cost rollups, valuation ledger, price tracking) and cached page fragments in sync."""
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from my_garage.api.services import (
+    SEARCH_KINDS,
+    part_price_changed,
+    search_document_delete,
+    search_document_sync,
+    search_document_sync_vehicle,
+    service_record_update_cost_rollup,
+    tracked_part_get_or_create,
+    tracked_part_key,
+    vehicle_log_valuation_event,
+    vehicle_touch,
+)
+from my_garage.models import ServiceRecord, TrackedPart, Upgrade, Vehicle
+
+# Vehicle fields that appear in search documents
+VEHICLE_LABEL_FIELDS = {'owner', 'owner_id', 'year', 'make', 'model', 'trim'}
+
+
+def index_record(sender, instance, raw=False, **kwargs):
+    """Re-indexes a service record, upgrade or condition report after it is saved."""
+    if not raw:
+        search_document_sync(instance)
+
+
+def unindex_record(sender, instance, **kwargs):
+    """Drops a deleted record from the index."""
+    search_document_delete(instance)
+
+
+for model in SEARCH_KINDS:
+    post_save.connect(index_record, sender=model, dispatch_uid=f"search_index_{model.__name__}")
+    post_delete.connect(unindex_record, sender=model, dispatch_uid=f"search_unindex_{model.__name__}")
+
+
+@receiver(post_save, sender=Vehicle, dispatch_uid="search_index_vehicle")
+def reindex_vehicle(sender, instance, created, raw=False, update_fields=None, **kwargs):
+    """Propagates owner/label changes; valuation saves (update_fields) skip this."""
+    if created or raw:
+        return
+    if update_fields is not None and not VEHICLE_LABEL_FIELDS & set(update_fields):
+        return
+    search_document_sync_vehicle(instance)
+
+
+ROLLUP_FIELDS = ('vehicle_id', 'date', 'category', 'total_cost', 'is_verified')
+
+
+@receiver(pre_save, sender=ServiceRecord, dispatch_uid="cost_rollup_capture")
+def capture_cost_rollup_state(sender, instance, raw=False, **kwargs):
+    """Remembers the stored values the record contributed to its rollup bucket."""
+    if raw or instance.pk is None:
+        instance._rollup_previous = None
+    else:
+        instance._rollup_previous = sender.objects.filter(pk=instance.pk).values(*ROLLUP_FIELDS).first()
+
+
+@receiver(post_save, sender=ServiceRecord, dispatch_uid="cost_rollup_update")
+def update_cost_rollup(sender, instance, raw=False, **kwargs):
+    if not raw:
+        service_record_update_cost_rollup(getattr(instance, '_rollup_previous', None), instance)
+
+
+@receiver(post_delete, sender=ServiceRecord, dispatch_uid="cost_rollup_delete")
+def remove_from_cost_rollup(sender, instance, **kwargs):
+    previous = {field: getattr(instance, field) for field in ROLLUP_FIELDS}
+    service_record_update_cost_rollup(previous, None)
+
+
+@receiver(pre_save, sender=Vehicle, dispatch_uid="valuation_capture")
+def capture_market_value(sender, instance, raw=False, update_fields=None, **kwargs):
+    """Remembers the stored value when a save may overwrite current_market_value."""
+    instance._valuation_previous = None
+    if raw or instance.pk is None:
+        return
+    if update_fields is not None and 'current_market_value' not in update_fields:
+        return
+    instance._valuation_previous = (
+        sender.objects.filter(pk=instance.pk).values_list('current_market_value', flat=True).first()
+    )
+
+
+@receiver(post_save, sender=Vehicle, dispatch_uid="valuation_log")
+def log_market_value(sender, instance, created, raw=False, **kwargs):
+    """
+    Records values written directly with save() (forms, admin, the API).
+    Services go through vehicle_record_valuation, which updates without save().
+    """
+    if raw:
+        return
+    if created:
+        vehicle_log_valuation_event(instance, 'BASELINE')
+        return
+    previous = getattr(instance, '_valuation_previous', None)
+    if previous is not None and previous != instance.current_market_value:
+        vehicle_log_valuation_event(instance, 'MANUAL')
+
+
+@receiver(pre_save, sender=Upgrade, dispatch_uid="tracked_part_link")
+def link_tracked_part(sender, instance, raw=False, update_fields=None, **kwargs):
+    """
+    Points wishlist upgrades at the shared TrackedPart for their brand/part
+    number. Partial saves are left to tracked_part_link_upgrades.
+    """
+    if raw or update_fields is not None or instance.status != 'WISHLIST':
+        return
+    part = instance.tracked_part if instance.tracked_part_id else None
+    if part is None or (part.brand, part.part_number) != tracked_part_key(instance.brand, instance.part_number):
+        instance.tracked_part = tracked_part_get_or_create(instance.brand, instance.part_number, instance.part_name)
+
+
+def touch_vehicle(sender, instance, raw=False, **kwargs):
+    """Expires the cached fragments of the vehicle a saved or deleted row belongs to."""
+    if not raw:
+        vehicle_touch(instance.pk if sender is Vehicle else instance.vehicle_id)
+
+
+for model in (Vehicle, *SEARCH_KINDS):
+    post_save.connect(touch_vehicle, sender=model, dispatch_uid=f"fragment_touch_{model.__name__}")
+    post_delete.connect(touch_vehicle, sender=model, dispatch_uid=f"fragment_untouch_{model.__name__}")
+
+
+@receiver(part_price_changed, sender=TrackedPart, dispatch_uid="fragment_touch_price")
+def touch_wishlist_vehicles(sender, part, **kwargs):
+    """Wishlists show the tracked price of their parts."""
+    wishlists = Upgrade.objects.filter(tracked_part=part, status='WISHLIST')
+    vehicle_touch(*wishlists.values_list('vehicle_id', flat=True).distinct())
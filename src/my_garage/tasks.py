@@ -1,16 +1,30 @@
 import logging
 from config.celery_app import app as celery_app
+from django.conf import settings
 from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
 from django.core.exceptions import ObjectDoesNotExist
 from decimal import Decimal
+from typing import List
 
 # Import the service layer logic
 from .api.services import (
     vehicle_update_market_valuation,
     VehicleServiceError,
-    service_record_process_ocr_data
+    vehicle_enqueue_market_valuation,
+    vehicle_release_market_valuation_lock,
+    service_record_process_ocr_data,
+    service_record_process_ocr_batch,
+    upload_session_complete,
+    upload_session_fail,
+    upload_session_purge_abandoned,
+    tracked_part_link_upgrades,
+    tracked_part_poll_due,
 )
-from my_garage.models import Vehicle, ServiceRecord
+from my_garage.models import Vehicle, ServiceRecord, UploadSession
+from my_garage.utils.events import publish_user_event
+from my_garage.utils.ratelimit import RateLimitExceeded
 
 logger = logging.getLogger(__name__)
 
@@ -22,6 +36,18 @@ RETRY_KWARGS = {
     'backoff': True,
 }
 
+# Delivery options for work a user is waiting on vs. scheduled fan-out
+# (queues are declared in CELERY_TASK_QUEUES).
+INTERACTIVE_TASK_OPTIONS = {'queue': 'interactive', 'priority': settings.TASK_PRIORITY_INTERACTIVE}
+BULK_TASK_OPTIONS = {'queue': 'bulk', 'priority': settings.TASK_PRIORITY_BULK}
+
+
+def _publish_ocr_completed(record: ServiceRecord, success: bool) -> None:
+    """Tells the owner's open event streams that OCR of `record` has finished."""
+    publish_user_event(record.vehicle.owner_id, 'ocr.completed', {
+        'record_id': record.id, 'vehicle_id': record.vehicle_id, 'success': success,
+    })
+
 
 @celery_app.task(bind=True, **RETRY_KWARGS)
 def task_process_receipt_ocr(self, record_id: int):
@@ -35,6 +61,7 @@ def task_process_receipt_ocr(self, record_id: int):
 
         # Delegate to Service Layer
         success = service_record_process_ocr_data(record)
+        _publish_ocr_completed(record, success)
 
         if not success:
             logger.warning(f"OCR failed for record {record_id}, no data extracted.")
@@ -45,30 +72,78 @@ def task_process_receipt_ocr(self, record_id: int):
 
     except ServiceRecord.DoesNotExist:
         logger.error(f"ServiceRecord {record_id} not found.")
+    except RateLimitExceeded as exc:
+        raise self.retry(exc=exc, countdown=exc.retry_after)
     except Exception as exc:
         logger.error(f"Transient error in OCR for {record_id}: {exc}")
         raise self.retry(exc=exc)
 
 
+@celery_app.task(bind=True, **RETRY_KWARGS)
+def task_process_receipt_ocr_batch(self, record_ids: List[int]):
+    """
+    Background task to process many receipts in one request to the
+    FastAPI batch OCR endpoint.
+    """
+    try:
+        records = list(ServiceRecord.objects.select_related('vehicle').filter(pk__in=record_ids))
+        missing = set(record_ids) - {record.id for record in records}
+        if missing:
+            logger.error(f"ServiceRecords {sorted(missing)} not found.")
+        logger.info(f"Processing batch OCR for {len(records)} records...")
+
+        outcomes = service_record_process_ocr_batch(records)
+        for record in records:
+            if record.id in outcomes:
+                _publish_ocr_completed(record, outcomes[record.id])
+
+        succeeded = sum(outcomes.values())
+        if succeeded < len(outcomes):
+            failed = [r_id for r_id, ok in outcomes.items() if not ok]
+            logger.warning(f"Batch OCR failed for records {failed}, no data extracted.")
+
+        logger.info(f"Successfully processed {succeeded}/{len(outcomes)} records")
+        return succeeded
+
+    except RateLimitExceeded as exc:
+        raise self.retry(exc=exc, countdown=exc.retry_after)
+    except Exception as exc:
+        logger.error(f"Transient error in batch OCR for {record_ids}: {exc}")
+        raise self.retry(exc=exc)
+
+
 @celery_app.task(bind=True, name="my_garage.update_valuation", **RETRY_KWARGS)
 def task_update_market_valuation(self, vehicle_id: int):
     """
     Updates the current market value of a vehicle using the Web MCP agent.
     """
+    retrying = False
     try:
         vehicle = Vehicle.objects.get(pk=vehicle_id)
 
         # Trigger Service Layer
         new_value = vehicle_update_market_valuation(vehicle)
+        publish_user_event(vehicle.owner_id, 'valuation.updated', {
+            'vehicle_id': vehicle.id, 'current_market_value': new_value,
+            'valuation_updated_at': vehicle.valuation_updated_at,
+        })
 
         logger.info(f"Valuation updated for {vehicle}: {new_value}")
         return str(new_value)
 
     except Vehicle.DoesNotExist:
         logger.error(f"Vehicle {vehicle_id} not found.")
+    except RateLimitExceeded as e:
+        retrying = self.request.retries < self.max_retries
+        raise self.retry(exc=e, countdown=e.retry_after)
     except VehicleServiceError as e:
         logger.warning(f"Valuation failed for vehicle {vehicle_id}: {e}")
+        retrying = self.request.retries < self.max_retries
         raise self.retry(exc=e)
+    finally:
+        # A pending retry still counts as in flight, so duplicates stay blocked
+        if not retrying:
+            vehicle_release_market_valuation_lock(vehicle_id, self.request.id)
 
 
 @celery_app.task(name="my_garage.bulk_refresh")
@@ -76,15 +151,74 @@ def task_bulk_valuation_refresh():
     """
     Daily/Weekly periodic task to refresh all vehicle values.
     Designed to be run by Celery Beat.
+    Vehicles valued within VALUATION_FRESHNESS_WINDOW are skipped, and vehicles
+    with a refresh already queued or running are not queued twice.
     """
+    cutoff = timezone.now() - settings.VALUATION_FRESHNESS_WINDOW
+    stale = Vehicle.objects.filter(
+        Q(valuation_updated_at__isnull=True) | Q(valuation_updated_at__lt=cutoff)
+    )
     # Use .iterator() to keep memory usage low for large garages
-    vehicle_ids = Vehicle.objects.values_list('id', flat=True).iterator()
+    vehicle_ids = stale.values_list('id', flat=True).iterator()
     count = 0
+    in_flight = 0
 
     for v_id in vehicle_ids:
-        # IMPORTANT: Use delay_on_commit if calling from inside a transaction
-        # Otherwise, standard .delay() is fine for a background manager.
-        task_update_market_valuation.delay(v_id)
-        count += 1
+        _, created = vehicle_enqueue_market_valuation(v_id, **BULK_TASK_OPTIONS)
+        if created:
+            count += 1
+        else:
+            in_flight += 1
+
+    return f"Queued refresh for {count} vehicles ({in_flight} already in flight)."
 
-    return f"Queued refresh for {count} vehicles."
+
+@celery_app.task(bind=True, **RETRY_KWARGS)
+def task_complete_upload(self, session_id: str):
+    """
+    Hands a finalized resumable upload to its pipeline, off the web worker:
+    copying a large file into media storage can take a while.
+    """
+    try:
+        session = UploadSession.objects.select_related('vehicle').get(pk=session_id, status='PROCESSING')
+    except UploadSession.DoesNotExist:
+        logger.error(f"UploadSession {session_id} not found or not awaiting processing.")
+        return None
+
+    try:
+        upload_session_complete(session)
+    except FileNotFoundError:
+        logger.error(f"Staged bytes for upload {session_id} are missing.")
+        upload_session_fail(session, "Uploaded data was lost; please upload the file again.")
+        return None
+    except Exception as exc:
+        logger.error(f"Transient error completing upload {session_id}: {exc}")
+        if self.request.retries >= self.max_retries:
+            upload_session_fail(session, "Upload could not be processed.")
+        raise self.retry(exc=exc)
+
+    return session.service_record_id
+
+
+@celery_app.task(name="my_garage.purge_uploads")
+def task_purge_abandoned_uploads():
+    """Periodic cleanup of uploads that stopped receiving chunks."""
+    purged = upload_session_purge_abandoned()
+    logger.info(f"Purged {purged} abandoned uploads")
+    return purged
+
+
+@celery_app.task(bind=True, name="my_garage.poll_part_prices", max_retries=3)
+def task_poll_part_prices(self):
+    """
+    Periodic wishlist price check: links new wishlist rows to tracked parts,
+    then polls the parts that are due. Most runs poll few or none.
+    """
+    try:
+        linked = tracked_part_link_upgrades()
+        stats = tracked_part_poll_due()
+    except RateLimitExceeded as exc:
+        # Parts polled so far are rescheduled; the rest are still due
+        raise self.retry(exc=exc, countdown=exc.retry_after)
+    logger.info(f"Linked {linked} wishlist upgrades; price poll: {stats}")
+    return stats
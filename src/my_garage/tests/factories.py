@@ -0,0 +1,82 @@
+"""factory-boy factories for my_garage models."""
+import datetime
+from decimal import Decimal
+
+import factory
+from factory import fuzzy
+from django.contrib.auth import get_user_model
+
+from my_garage.models import Vehicle, ServiceRecord, Upgrade, ConditionReport
+
+
+class UserFactory(factory.django.DjangoModelFactory):
+    """Factory for garage owners."""
+
+    class Meta:
+        model = get_user_model()
+        django_get_or_create = ('username',)
+
+    username = factory.Sequence(lambda n: f"owner{n}")
+    email = factory.LazyAttribute(lambda o: f"{o.username}@example.com")
+    password = factory.django.Password('testpass')
+
+
+class VehicleFactory(factory.django.DjangoModelFactory):
+    """Factory for Vehicle."""
+
+    class Meta:
+        model = Vehicle
+
+    owner = factory.SubFactory(UserFactory)
+    make = fuzzy.FuzzyChoice(['Toyota', 'Nissan', 'Honda', 'Mazda', 'BMW', 'Porsche'])
+    model = fuzzy.FuzzyChoice(['Supra', 'Skyline', 'NSX', 'RX-7', 'M3', '911'])
+    year = fuzzy.FuzzyInteger(1985, 2024)
+    trim = fuzzy.FuzzyChoice(['', 'Base', 'Turbo', 'Sport'])
+    vin = None
+    purchase_price = fuzzy.FuzzyDecimal(5000, 90000)
+    current_market_value = fuzzy.FuzzyDecimal(5000, 120000)
+    mileage = fuzzy.FuzzyInteger(0, 250000)
+
+
+class ServiceRecordFactory(factory.django.DjangoModelFactory):
+    """Factory for ServiceRecord."""
+
+    class Meta:
+        model = ServiceRecord
+
+    vehicle = factory.SubFactory(VehicleFactory)
+    date = fuzzy.FuzzyDate(datetime.date(2005, 1, 1), datetime.date(2025, 12, 31))
+    vendor = factory.Faker('company')
+    description = factory.Faker('sentence', nb_words=8)
+    category = fuzzy.FuzzyChoice([c[0] for c in ServiceRecord.CATEGORY_CHOICES])
+    total_cost = fuzzy.FuzzyDecimal(20, 4000)
+    is_verified = True
+
+
+class UpgradeFactory(factory.django.DjangoModelFactory):
+    """Factory for Upgrade."""
+
+    class Meta:
+        model = Upgrade
+
+    vehicle = factory.SubFactory(VehicleFactory)
+    part_name = factory.Faker('catch_phrase')
+    brand = fuzzy.FuzzyChoice(['HKS', 'Greddy', 'Tein', 'Brembo', 'Recaro', 'BBS'])
+    part_number = factory.Sequence(lambda n: f"PN-{n:06d}")
+    category = fuzzy.FuzzyChoice([c[0] for c in Upgrade.CATEGORY_CHOICES])
+    status = fuzzy.FuzzyChoice([c[0] for c in Upgrade.STATUS_CHOICES])
+    cost = fuzzy.FuzzyDecimal(50, 6000)
+
+
+class ConditionReportFactory(factory.django.DjangoModelFactory):
+    """Factory for ConditionReport."""
+
+    class Meta:
+        model = ConditionReport
+
+    vehicle = factory.SubFactory(VehicleFactory)
+    area = fuzzy.FuzzyChoice([c[0] for c in ConditionReport.AREA_CHOICES])
+    photo = 'condition_checks/sample.jpg'
+    grade = fuzzy.FuzzyFloat(1.0, 10.0)
+    ai_feedback = factory.Faker('sentence', nb_words=12)
+    value_adjustment = Decimal('0.00')
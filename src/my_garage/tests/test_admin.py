@@ -0,0 +1,49 @@
+"""Tests for the admin's large-table settings."""
+from unittest import mock
+
+import pytest
+
+from my_garage.admin import OwnerFilter
+from my_garage.models import ServiceRecord
+from my_garage.tests.factories import ServiceRecordFactory, VehicleFactory
+from my_garage.utils import pagination
+
+
+@pytest.mark.django_db
+def test_changelist_queries_do_not_grow_with_rows(admin_client, django_assert_max_num_queries):
+    """Vehicles are joined in, not fetched per row, and only the filtered total is counted."""
+    vehicle = VehicleFactory()
+    ServiceRecordFactory.create_batch(3, vehicle=vehicle)
+    admin_client.get('/admin/my_garage/servicerecord/')
+    ServiceRecordFactory.create_batch(20)
+
+    with django_assert_max_num_queries(6):
+        response = admin_client.get('/admin/my_garage/servicerecord/?category__exact=MAINTENANCE')
+    assert response.status_code == 200
+
+
+@pytest.mark.django_db
+def test_owner_filter_lists_only_the_selected_owner(admin_client):
+    vehicle = VehicleFactory()
+    VehicleFactory.create_batch(2)
+
+    response = admin_client.get(f"/admin/my_garage/vehicle/?owner={vehicle.owner.pk}")
+
+    assert response.status_code == 200
+    assert list(response.context['cl'].result_list) == [vehicle]
+    owner_filter = next(f for f in response.context['cl'].filter_specs if isinstance(f, OwnerFilter))
+    assert [value for value, _ in owner_filter.lookup_choices] == [str(vehicle.owner.pk)]
+
+
+@pytest.mark.django_db
+def test_estimated_count_uses_planner_estimate_only_for_large_results(settings):
+    ServiceRecordFactory.create_batch(3)
+    queryset = ServiceRecord.objects.all()
+    # Other backends always count exactly
+    assert pagination.estimated_count(queryset, threshold=0) == 3
+
+    postgres = mock.MagicMock(vendor='postgresql')
+    with mock.patch.object(pagination, 'connections', {'default': postgres}), \
+            mock.patch.object(pagination, 'planner_estimate', return_value=2_000_000):
+        assert pagination.estimated_count(queryset, threshold=1_000_000) == 2_000_000
+        assert pagination.estimated_count(queryset, threshold=5_000_000) == 3
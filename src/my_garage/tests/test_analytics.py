@@ -0,0 +1,87 @@
+"""Tests for the monthly service cost rollups."""
+import datetime
+from decimal import Decimal
+
+import pytest
+from rest_framework.test import APIClient
+
+from my_garage.api import services
+from my_garage.api.selectors import vehicle_get_cost_history
+from my_garage.models import ServiceCostRollup
+from my_garage.tests.factories import ServiceRecordFactory, VehicleFactory
+
+
+def _rollups(vehicle):
+    return {
+        (r.month, r.category): (r.total, r.record_count)
+        for r in ServiceCostRollup.objects.filter(vehicle=vehicle)
+    }
+
+
+@pytest.mark.django_db
+def test_rollups_follow_verification_edits_and_deletes():
+    vehicle = VehicleFactory()
+    jan = datetime.date(2024, 1, 1)
+    record = ServiceRecordFactory(vehicle=vehicle, date=datetime.date(2024, 1, 20), category='REPAIR',
+                                  total_cost=Decimal('100.00'), is_verified=False)
+    ServiceRecordFactory(vehicle=vehicle, date=datetime.date(2024, 1, 5), category='REPAIR',
+                         total_cost=Decimal('50.00'))
+    assert _rollups(vehicle) == {(jan, 'REPAIR'): (Decimal('50.00'), 1)}
+
+    record.is_verified = True
+    record.save()
+    assert _rollups(vehicle) == {(jan, 'REPAIR'): (Decimal('150.00'), 2)}
+
+    # Moving a record to another month/category moves its contribution
+    record.date = datetime.date(2024, 3, 2)
+    record.category = 'MAINTENANCE'
+    record.total_cost = Decimal('80.00')
+    record.save()
+    assert _rollups(vehicle) == {
+        (jan, 'REPAIR'): (Decimal('50.00'), 1),
+        (datetime.date(2024, 3, 1), 'MAINTENANCE'): (Decimal('80.00'), 1),
+    }
+
+    record.delete()
+    assert _rollups(vehicle) == {(jan, 'REPAIR'): (Decimal('50.00'), 1)}
+
+
+@pytest.mark.django_db
+def test_rebuild_matches_incremental_rollups():
+    vehicle = VehicleFactory()
+    ServiceRecordFactory.create_batch(40, vehicle=vehicle)
+    incremental = _rollups(vehicle)
+
+    ServiceCostRollup.objects.all().delete()
+    services.service_cost_rollup_rebuild()
+
+    assert _rollups(vehicle) == incremental
+
+
+@pytest.mark.django_db
+def test_cost_history_by_year_and_range():
+    vehicle = VehicleFactory()
+    for month, cost in [(1, '10.00'), (6, '20.00'), (12, '30.00')]:
+        ServiceRecordFactory(vehicle=vehicle, date=datetime.date(2023, month, 1), category='MAINTENANCE',
+                             total_cost=Decimal(cost))
+
+    by_year = vehicle_get_cost_history(vehicle, granularity='year')
+    assert [(r['period'], r['total'], r['count']) for r in by_year] == [
+        (datetime.date(2023, 1, 1), Decimal('60.00'), 3)
+    ]
+    ranged = vehicle_get_cost_history(vehicle, start=datetime.date(2023, 6, 15), end=datetime.date(2023, 6, 1))
+    assert [r['total'] for r in ranged] == [Decimal('20.00')]
+
+
+@pytest.mark.django_db
+def test_cost_history_endpoint():
+    record = ServiceRecordFactory(date=datetime.date(2022, 5, 9), category='UPGRADE', total_cost=Decimal('12.50'))
+    client = APIClient()
+    client.force_authenticate(user=record.vehicle.owner)
+    url = f"/api/vehicles/{record.vehicle_id}/cost_history/"
+
+    response = client.get(url, {'start': '2022-01', 'category': 'UPGRADE'})
+
+    assert response.status_code == 200
+    assert response.data['series'] == [{'period': '2022-05', 'category': 'UPGRADE', 'total': '12.50', 'count': 1}]
+    assert client.get(url, {'start': 'May 2022'}).status_code == 400
@@ -0,0 +1,72 @@
+"""Tests for the batch API."""
+import pytest
+from rest_framework.test import APIClient
+
+from my_garage.models import ConditionReport, ServiceRecord, Upgrade, Vehicle
+from my_garage.tests.factories import ConditionReportFactory, UpgradeFactory, VehicleFactory
+
+
+@pytest.fixture
+def client_for():
+    def make(user):
+        client = APIClient()
+        client.force_authenticate(user=user)
+        return client
+    return make
+
+
+@pytest.mark.django_db
+def test_batch_runs_operations_in_order_with_refs(client_for):
+    upgrade = UpgradeFactory(status='ORDERED')
+    report = ConditionReportFactory(vehicle=upgrade.vehicle)
+    client = client_for(upgrade.vehicle.owner)
+
+    response = client.post('/api/batch/', {'operations': [
+        {'op': 'create', 'resource': 'vehicles', 'ref': 'car', 'data': {'make': 'Mazda', 'model': 'MX-5', 'year': 1991}},
+        {'op': 'create', 'resource': 'service-records', 'data': {
+            'vehicle': {'$ref': 'car'}, 'date': '2024-03-01', 'vendor': 'Shop', 'description': '$640 timing belt',
+            'category': 'MAINTENANCE', 'total_cost': '640.00'}},
+        {'op': 'update', 'resource': 'upgrades', 'id': upgrade.pk, 'data': {'status': 'INSTALLED'}},
+        {'op': 'delete', 'resource': 'condition-reports', 'id': report.pk},
+    ]}, format='json')
+
+    assert response.status_code == 200 and response.data['committed']
+    assert [result['status'] for result in response.data['results']] == [201, 201, 200, 204]
+    car = Vehicle.objects.get(pk=response.data['results'][0]['data']['id'])
+    assert car.owner == upgrade.vehicle.owner
+    record = ServiceRecord.objects.get()
+    assert record.vehicle == car and record.description == '$640 timing belt'
+    assert Upgrade.objects.get(pk=upgrade.pk).status == 'INSTALLED'
+    assert not ConditionReport.objects.exists()
+
+
+@pytest.mark.django_db
+def test_batch_is_all_or_nothing(client_for):
+    mine, theirs = VehicleFactory(), VehicleFactory()
+    client = client_for(mine.owner)
+
+    response = client.post('/api/batch/', {'operations': [
+        {'op': 'update', 'resource': 'vehicles', 'id': mine.pk, 'data': {'mileage': 99999}},
+        {'op': 'delete', 'resource': 'vehicles', 'id': theirs.pk},
+        {'op': 'update', 'resource': 'vehicles', 'id': mine.pk, 'data': {'mileage': 1}},
+    ]}, format='json')
+
+    assert response.status_code == 400 and not response.data['committed']
+    assert [result['status'] for result in response.data['results']] == [200, 404]
+    mine.refresh_from_db()
+    assert mine.mileage != 99999 and Vehicle.objects.filter(pk=theirs.pk).exists()
+
+
+@pytest.mark.django_db
+def test_batch_validates_operations(client_for, settings):
+    settings.BATCH_MAX_OPERATIONS = 2
+    client = client_for(VehicleFactory().owner)
+    delete = {'op': 'delete', 'resource': 'vehicles', 'id': 1}
+
+    for operations in (
+        [delete] * 3,
+        [{'op': 'delete', 'resource': 'uploads', 'id': 1}],
+        [{'op': 'update', 'resource': 'vehicles', 'data': {}}],
+        [{'op': 'create', 'resource': 'service-records', 'data': {'vehicle': {'$ref': 'car'}}}],
+    ):
+        assert client.post('/api/batch/', {'operations': operations}, format='json').status_code == 400
@@ -0,0 +1,66 @@
+"""Smoke tests for the benchmark suite."""
+import pytest
+
+from my_garage.benchmarks.datasets import Scale
+from my_garage.benchmarks.queues import measure_layout
+from my_garage.benchmarks.runner import compare_reports, run_scale, select_scenarios
+from my_garage.benchmarks.startup import STARTUP_TARGETS, measure_startup, parse_importtime
+from my_garage.models import ServiceRecord
+
+TINY = Scale('tiny', vehicles=2, services_per_vehicle=3, upgrades_per_vehicle=2, reports_per_vehicle=1)
+
+
+@pytest.mark.django_db
+def test_run_scale_times_every_scenario(settings, tmp_path):
+    """Every registered scenario runs against a seeded dataset."""
+    settings.MEDIA_ROOT = tmp_path
+    names = select_scenarios()
+    result = run_scale(TINY, names, repeat=2)
+
+    assert result['dataset']['service_records'] == 6
+    assert set(result['scenarios']) == set(names)
+    assert all(stats['repeat'] == 2 for stats in result['scenarios'].values())
+    # The stubbed OCR run verifies the benchmark record
+    assert ServiceRecord.objects.filter(vendor__startswith='Stub Motors').exists()
+
+
+def test_select_scenarios_filters_by_glob():
+    """Scenario patterns behave like shell globs."""
+    names = select_scenarios(['api.vehicles.*'])
+    assert names and all(n.startswith('api.vehicles.') for n in names)
+
+
+def test_compare_reports_reports_median_ratio():
+    """Regression ratios are current / baseline medians."""
+    baseline = {'scales': {'1': {'scenarios': {'a': {'median_ms': 2.0}}}}}
+    current = {'scales': {'1': {'scenarios': {'a': {'median_ms': 3.0}, 'b': {'median_ms': 1.0}}}}}
+    assert compare_reports(baseline, current) == [
+        {'scale': '1', 'scenario': 'a', 'baseline_ms': 2.0, 'current_ms': 3.0, 'ratio': 1.5},
+    ]
+
+
+def test_dedicated_workers_keep_interactive_latency_low():
+    """A bulk backlog delays interactive tasks on shared workers but not dedicated ones."""
+    options = dict(backlog=20, probes=4, interactive_seconds=0.005, bulk_seconds=0.1, concurrency=1)
+    dedicated = measure_layout('dedicated', **options)
+    shared = measure_layout('shared', **options)
+
+    assert dedicated['p95_ms'] < shared['p95_ms']
+
+
+@pytest.mark.parametrize('target', sorted(STARTUP_TARGETS))
+def test_startup_leaves_client_libraries_to_first_use(target):
+    """Mongo, numpy, boto3 (and outside web, requests) stay off every process's start-up path."""
+    result = measure_startup(target, top=5)
+
+    assert result['deferred_loaded'] == []
+    assert result['import_ms'] > 0 and len(result['slowest_imports']) == 5
+
+
+def test_parse_importtime_reads_nesting():
+    records = parse_importtime(
+        "import time: self [us] | cumulative | imported package\n"
+        "import time:       120 |        120 |   requests.compat\n"
+        "import time:       400 |        520 | requests\n"
+    )
+    assert [(r.name, r.depth, r.cumulative_us) for r in records] == [('requests.compat', 1, 120), ('requests', 0, 520)]
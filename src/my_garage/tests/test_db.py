@@ -0,0 +1,36 @@
+"""Tests for database connection reuse."""
+from unittest import mock
+
+from django.db import connections
+
+from config.settings.base import _connection_settings
+from my_garage.utils import db
+
+
+def test_connection_settings_choose_persistent_connections_or_a_pool(monkeypatch):
+    monkeypatch.setenv('WORKER_DB_CONN_MAX_AGE', '900')
+    assert _connection_settings('WORKER_DB', default_max_age=600) == {
+        'CONN_MAX_AGE': 900, 'CONN_HEALTH_CHECKS': True, 'OPTIONS': {}}
+
+    monkeypatch.setenv('WORKER_DB_POOL_MAX_SIZE', '8')
+    pooled = _connection_settings('WORKER_DB', default_max_age=600)
+    assert pooled['CONN_MAX_AGE'] == 0
+    assert pooled['OPTIONS']['pool'] == {'min_size': 1, 'max_size': 8, 'timeout': 10.0}
+
+
+def test_worker_settings_replace_the_web_ones():
+    database = connections.settings['default']
+    with mock.patch.dict(database, {'CONN_MAX_AGE': 60, 'OPTIONS': {'pool': {'max_size': 4}, 'sslmode': 'require'}}):
+        db.apply_connection_settings({'CONN_MAX_AGE': 600, 'CONN_HEALTH_CHECKS': True, 'OPTIONS': {}})
+
+        assert database['CONN_MAX_AGE'] == 600 and database['CONN_HEALTH_CHECKS'] is True
+        assert database['OPTIONS'] == {'sslmode': 'require'}
+
+
+def test_close_stale_connections_skips_open_transactions():
+    idle, in_transaction = mock.Mock(in_atomic_block=False), mock.Mock(in_atomic_block=True)
+    with mock.patch.object(db.connections, 'all', return_value=[idle, in_transaction]):
+        db.close_stale_connections()
+
+    idle.close_if_unusable_or_obsolete.assert_called_once_with()
+    in_transaction.close_if_unusable_or_obsolete.assert_not_called()
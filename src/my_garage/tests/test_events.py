@@ -0,0 +1,50 @@
+"""Tests for server-sent events."""
+from unittest import mock
+
+import pytest
+from asgiref.sync import async_to_sync, sync_to_async
+from django.test import AsyncClient
+
+from my_garage.tasks import task_process_receipt_ocr, task_update_market_valuation
+from my_garage.tests.factories import ServiceRecordFactory, UserFactory, VehicleFactory
+from my_garage.utils.events import publish_user_event
+
+
+@pytest.mark.django_db(transaction=True)
+def test_event_stream_delivers_the_users_events(settings):
+    settings.EVENTS_KEEPALIVE_SECONDS = 0.05
+    user, other = UserFactory(), UserFactory()
+
+    async def listen():
+        client = AsyncClient()
+        assert (await client.get('/api/events/')).status_code == 403
+        await client.aforce_login(user)
+        response = await client.get('/api/events/')
+        assert response['Content-Type'] == 'text/event-stream'
+        stream = aiter(response.streaming_content)
+        assert await anext(stream) == b'retry: 3000\n\n'
+
+        await sync_to_async(publish_user_event)(other.pk, 'ocr.completed', {'record_id': 1})
+        await sync_to_async(publish_user_event)(user.pk, 'valuation.updated', {'vehicle_id': 2})
+        assert await anext(stream) == b'event: valuation.updated\ndata: {"vehicle_id": 2}\n\n'
+        assert await anext(stream) == b': keep-alive\n\n'
+        await stream.aclose()
+
+    async_to_sync(listen)()
+
+
+@pytest.mark.django_db
+def test_tasks_publish_completion_events():
+    record = ServiceRecordFactory()
+    vehicle = VehicleFactory()
+
+    with mock.patch('my_garage.tasks.publish_user_event') as publish, \
+            mock.patch('my_garage.tasks.service_record_process_ocr_data', return_value=True), \
+            mock.patch('my_garage.tasks.vehicle_update_market_valuation', return_value=vehicle.current_market_value):
+        task_process_receipt_ocr.apply(args=(record.pk,))
+        task_update_market_valuation.apply(args=(vehicle.pk,))
+
+    (ocr_owner, ocr_event, ocr_data), (owner, event, data) = [call.args for call in publish.call_args_list]
+    assert (ocr_owner, ocr_event) == (record.vehicle.owner_id, 'ocr.completed')
+    assert ocr_data == {'record_id': record.pk, 'vehicle_id': record.vehicle_id, 'success': True}
+    assert (owner, event, data['vehicle_id']) == (vehicle.owner_id, 'valuation.updated', vehicle.pk)
@@ -0,0 +1,62 @@
+"""Tests for sparse fieldsets and expansions on the API."""
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+
+from my_garage.tests.factories import ServiceRecordFactory, UpgradeFactory, VehicleFactory
+
+
+@pytest.fixture
+def garage():
+    vehicle = VehicleFactory()
+    for _ in range(3):
+        ServiceRecordFactory(vehicle=vehicle)
+        UpgradeFactory(vehicle=vehicle)
+    client = APIClient()
+    client.force_authenticate(user=vehicle.owner)
+    return vehicle, client
+
+
+@pytest.mark.django_db
+def test_fields_limit_response_and_columns(garage):
+    vehicle, client = garage
+
+    with CaptureQueriesContext(connection) as queries:
+        response = client.get('/api/service-records/', {'fields': 'id,date,total_cost'})
+    assert response.status_code == 200
+    assert all(set(row) == {'id', 'date', 'total_cost'} for row in response.data['results'])
+    select = queries.captured_queries[-1]['sql']
+    assert 'ocr_raw_data' not in select and 'description' not in select
+
+    response = client.get(f'/api/vehicles/{vehicle.pk}/', {'fields': 'make,owner_username'})
+    assert response.data == {'make': vehicle.make, 'owner_username': vehicle.owner.username}
+
+
+@pytest.mark.django_db
+def test_expand_nests_related_objects_without_extra_queries(garage):
+    vehicle, client = garage
+
+    with CaptureQueriesContext(connection) as queries:
+        response = client.get('/api/upgrades/', {'fields': 'id,vehicle_display', 'expand': 'vehicle'})
+    assert response.status_code == 200
+    rows = response.data['results']
+    assert len(rows) == 3 and rows[0]['vehicle']['owner_username'] == vehicle.owner.username
+    assert len(queries) == 2  # count and page, with the vehicle and owner joined
+
+    with CaptureQueriesContext(connection) as queries:
+        response = client.get('/api/vehicles/', {'fields': 'id', 'expand': 'upgrades,services'})
+    row, = response.data['results']
+    assert len(row['upgrades']) == 3 and len(row['services']) == 3
+    assert len(queries) == 4  # count, page and one prefetch per expansion
+
+
+@pytest.mark.django_db
+def test_unknown_fields_and_writes(garage):
+    vehicle, client = garage
+
+    assert client.get('/api/vehicles/', {'fields': 'id,colour'}).status_code == 400
+    assert client.get('/api/vehicles/', {'expand': 'owner'}).status_code == 400
+    # Writes answer with the full representation whatever the query string says
+    response = client.patch(f'/api/vehicles/{vehicle.pk}/?fields=id', {'mileage': 42000}, format='json')
+    assert response.status_code == 200 and response.data['mileage'] == 42000 and 'make' in response.data
@@ -0,0 +1,70 @@
+"""Tests for the cached dashboard and vehicle page fragments."""
+from decimal import Decimal
+
+import pytest
+from django.core.cache import cache
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from my_garage.api import services
+from my_garage.api.selectors import vehicle_get_change_stamps
+from my_garage.models import Vehicle
+from my_garage.tests.factories import ServiceRecordFactory, UpgradeFactory, VehicleFactory
+
+
+@pytest.fixture(autouse=True)
+def clear_cache():
+    cache.clear()
+    yield
+    cache.clear()
+
+
+@pytest.mark.django_db
+def test_dashboard_cards_follow_the_change_stamp(client, django_capture_on_commit_callbacks):
+    vehicle = VehicleFactory(mileage=12345)
+    client.force_login(vehicle.owner)
+    assert b'12345 mi' in client.get('/garage/').content
+
+    # Writes that skip the service layer are served from the cached card...
+    Vehicle.objects.filter(pk=vehicle.pk).update(mileage=23456)
+    assert b'12345 mi' in client.get('/garage/').content
+
+    # ...until a service touches the vehicle
+    with django_capture_on_commit_callbacks(execute=True):
+        services.vehicle_record_valuation(vehicle, 'MANUAL', Decimal('31337.00'), absolute=True)
+    content = client.get('/garage/').content
+    assert b'23456 mi' in content and b'$31337' in content
+
+
+@pytest.mark.django_db
+def test_vehicle_page_skips_summary_queries_when_cached(client, django_capture_on_commit_callbacks):
+    vehicle = VehicleFactory(purchase_price=Decimal('10000.00'))
+    UpgradeFactory(vehicle=vehicle, status='WISHLIST', part_name='Coilovers')
+    client.force_login(vehicle.owner)
+
+    with CaptureQueriesContext(connection) as cold:
+        assert b'Coilovers' in client.get(f'/garage/{vehicle.pk}/').content
+    with CaptureQueriesContext(connection) as warm:
+        assert b'Coilovers' in client.get(f'/garage/{vehicle.pk}/').content
+    assert len(warm) < len(cold)
+    assert not any('my_garage_upgrade' in query['sql'] for query in warm.captured_queries)
+
+    with django_capture_on_commit_callbacks(execute=True):
+        ServiceRecordFactory(vehicle=vehicle, is_verified=True, total_cost=Decimal('2500.00'))
+    assert b'$12500' in client.get(f'/garage/{vehicle.pk}/').content
+
+    assert client.get(f'/garage/{VehicleFactory().pk}/').status_code == 401
+
+
+@pytest.mark.django_db
+def test_price_changes_touch_the_wishlists_of_the_part(django_capture_on_commit_callbacks):
+    upgrade = UpgradeFactory(status='WISHLIST')
+    other = UpgradeFactory(status='INSTALLED')
+    stamps = vehicle_get_change_stamps([upgrade.vehicle_id, other.vehicle_id])
+
+    with django_capture_on_commit_callbacks(execute=True):
+        services.tracked_part_apply_price(upgrade.tracked_part, Decimal('199.00'), timezone.now())
+    after = vehicle_get_change_stamps([upgrade.vehicle_id, other.vehicle_id])
+    assert after[upgrade.vehicle_id] != stamps[upgrade.vehicle_id]
+    assert after[other.vehicle_id] == stamps[other.vehicle_id]
@@ -0,0 +1,84 @@
+"""Tests for the comparable-listings warehouse."""
+import datetime
+from decimal import Decimal
+from unittest import mock
+
+import pytest
+from rest_framework.test import APIClient
+
+from my_garage.api import services
+from my_garage.api.selectors import market_listing_get_price_stats
+from my_garage.benchmarks.stubs import StubResponse
+from my_garage.models import MarketCohort, MarketListing
+from my_garage.tests.factories import VehicleFactory
+
+
+def _listing(n, price, year=2000, **fields):
+    return {'make': 'Honda', 'model': 'S2000', 'year': year, 'trim': 'AP1', 'mileage': 60000 + n * 1000,
+            'price': price, 'sold_date': '2024-05-01', 'source': 'bringatrailer.com',
+            'url': f"https://bringatrailer.com/listing/honda-s2000-{n}", **fields}
+
+
+def _search_response(listings):
+    def fake_post(url, json, **kwargs):
+        assert json['tool_name'] == 'search_market_listings'
+        return StubResponse({'results': listings})
+    return fake_post
+
+
+@pytest.mark.django_db
+def test_ingest_dedupes_by_url_and_skips_incomplete_listings():
+    written = services.market_listing_ingest([
+        _listing(1, 30000), _listing(1, 28500), _listing(2, 31000, make=' HONDA '),
+        _listing(3, 'n/a'), _listing(4, 30000, url=''),
+    ])
+    assert written == 2
+    assert services.market_listing_ingest([_listing(2, 29000)]) == 1
+
+    assert MarketListing.objects.count() == 2
+    assert set(MarketListing.objects.values_list('make', 'price')) == {
+        ('honda', Decimal('28500.00')), ('honda', Decimal('29000.00'))
+    }
+
+
+@pytest.mark.django_db
+def test_valuation_reads_the_warehouse_and_only_tops_up_stale_cohorts(settings):
+    settings.MARKET_MIN_COMPARABLES = 3
+    vehicle = VehicleFactory(make='Honda', model='S2000', year=2001, trim='AP1', mileage=0)
+    listings = [_listing(n, 20000 + n * 1000, year=2000 + n % 3) for n in range(5)]
+    listings.append(_listing(9, 90000, trim='CR'))
+
+    with mock.patch('requests.post', side_effect=_search_response(listings)) as post:
+        value = services.vehicle_update_market_valuation(vehicle)
+        # Within MARKET_COHORT_TTL the warehouse answers on its own
+        assert services.vehicle_update_market_valuation(vehicle) == value
+    assert post.call_count == 1
+    assert post.call_args.kwargs['json']['arguments']['year_min'] == 2000
+    assert value == Decimal('22000.00')  # The other trim is left out
+    assert MarketCohort.objects.count() == 3
+
+    MarketCohort.objects.filter(year=2002).update(fetched_at=MarketCohort.objects.get(year=2002).fetched_at
+                                                  - datetime.timedelta(days=30))
+    with mock.patch('requests.post', side_effect=_search_response([])) as post:
+        services.vehicle_update_market_valuation(vehicle)
+    arguments = post.call_args.kwargs['json']['arguments']
+    assert (arguments['year_min'], arguments['year_max']) == (2002, 2002)
+
+
+@pytest.mark.django_db
+def test_price_stats_narrow_by_mileage_and_market_endpoint(settings):
+    settings.MARKET_MIN_COMPARABLES = 2
+    settings.MARKET_MILEAGE_BAND = 5000
+    services.market_listing_ingest([_listing(n, 20000 + n * 1000) for n in range(4)]
+                                   + [_listing(50, 5000, mileage=200000)])
+
+    stats = market_listing_get_price_stats('honda', 's2000', 2000, 2000, mileage=62000)
+    assert stats['count'] == 4 and stats['median'] == Decimal('21500.00')
+    assert stats['by_year'] == {2000: Decimal('21500.00')}
+    assert market_listing_get_price_stats('Honda', 'S2000', 2000, 2000)['count'] == 5
+
+    vehicle = VehicleFactory(make='Honda', model='S2000', year=2001, trim='', mileage=61000)
+    client = APIClient()
+    client.force_authenticate(user=vehicle.owner)
+    response = client.get(f'/api/vehicles/{vehicle.pk}/market/')
+    assert response.status_code == 200 and response.data['count'] == 4
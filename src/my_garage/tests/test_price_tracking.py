@@ -0,0 +1,83 @@
+"""Tests for shared wishlist price tracking."""
+import datetime
+from decimal import Decimal
+from unittest import mock
+
+import pytest
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from my_garage.api import services
+from my_garage.benchmarks.stubs import StubResponse
+from my_garage.models import PartPricePoint, TrackedPart, Upgrade
+from my_garage.tests.factories import UpgradeFactory
+
+
+def _price_response(price):
+    def fake_post(url, json, **kwargs):
+        assert json['tool_name'] == 'search_part_prices'
+        return StubResponse({'results': [dict(part, lowest_price=price) for part in json['arguments']['parts']]})
+    return fake_post
+
+
+@pytest.mark.django_db
+def test_tracked_parts_are_shared_and_only_changes_are_recorded(settings):
+    settings.PART_PRICE_INITIAL_INTERVAL = datetime.timedelta(hours=24)
+    wishlist = [
+        UpgradeFactory(status='WISHLIST', brand='Brembo', part_number='GT-4 123'),
+        UpgradeFactory(status='WISHLIST', brand='BREMBO ', part_number='gt4123'),
+        UpgradeFactory(status='WISHLIST', brand='brembo', part_number='GT4/123'),
+    ]
+    UpgradeFactory(status='INSTALLED', brand='HKS', part_number='X1')  # not watched
+    part = TrackedPart.objects.get()
+    assert {u.tracked_part_id for u in wishlist} == {part.pk}
+
+    changes = []
+    services.part_price_changed.connect(lambda sender, **kw: changes.append(kw['price']), weak=False,
+                                        dispatch_uid='test_price_changes')
+    now = timezone.now()
+    try:
+        with mock.patch('requests.post', side_effect=_price_response(199.99)) as post:
+            assert services.tracked_part_poll_due(now=now) == {'polled': 1, 'changed': 1, 'failed': 0}
+            assert post.call_count == 1
+            # Not due again until its interval has passed
+            assert services.tracked_part_poll_due(now=now)['polled'] == 0
+            assert services.tracked_part_poll_due(now=now + datetime.timedelta(hours=12))['changed'] == 0
+        part.refresh_from_db()
+        assert part.check_interval == datetime.timedelta(hours=18)
+
+        with mock.patch('requests.post', side_effect=_price_response(179.5)):
+            services.tracked_part_poll_due(now=now + datetime.timedelta(days=2))
+    finally:
+        services.part_price_changed.disconnect(dispatch_uid='test_price_changes')
+
+    part.refresh_from_db()
+    assert part.last_price == Decimal('179.50')
+    assert part.check_interval == datetime.timedelta(hours=9)
+    assert list(PartPricePoint.objects.order_by('observed_at').values_list('price', flat=True)) == [
+        Decimal('199.99'), Decimal('179.50')]
+    assert changes == [Decimal('199.99'), Decimal('179.50')]
+
+
+@pytest.mark.django_db
+def test_link_upgrades_catches_bulk_created_rows():
+    template = UpgradeFactory.build(vehicle=UpgradeFactory().vehicle, status='WISHLIST', part_number='ABC-1')
+    Upgrade.objects.bulk_create([template])
+
+    assert services.tracked_part_link_upgrades() == 1
+    assert Upgrade.objects.get(part_number='ABC-1').tracked_part.part_number == 'ABC1'
+
+
+@pytest.mark.django_db
+def test_price_history_endpoint():
+    upgrade = UpgradeFactory(status='WISHLIST', part_number='ABC-1')
+    with mock.patch('requests.post', side_effect=_price_response(10)):
+        services.tracked_part_poll_due()
+    client = APIClient()
+    client.force_authenticate(user=upgrade.vehicle.owner)
+
+    response = client.get(f'/api/upgrades/{upgrade.pk}/price_history/')
+
+    assert response.status_code == 200
+    assert response.data['current_price'] == '10.00'
+    assert [p['price'] for p in response.data['points']] == ['10.00']
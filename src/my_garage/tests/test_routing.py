@@ -0,0 +1,62 @@
+"""Tests for read-replica routing."""
+from unittest import mock
+
+import pytest
+from django.core.cache import cache
+from django.db import connections
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+
+from my_garage.api.selectors import vehicle_get_build_summary
+from my_garage.tests.factories import VehicleFactory
+from my_garage.utils import routing
+
+
+@pytest.fixture
+def replica(settings):
+    """The test database's mirror, used as a replica that is never behind."""
+    settings.REPLICA_DATABASES = ['replica']
+    routing._replica_lag.clear()
+    cache.clear()  # read-your-writes pins left by other tests
+    yield connections['replica']
+    routing._replica_lag.clear()
+
+
+def _replica_queries(client, url):
+    with CaptureQueriesContext(connections['replica']) as queries:
+        response = client.get(url)
+    assert response.status_code == 200
+    return len(queries)
+
+
+@pytest.mark.django_db(transaction=True, databases=['default', 'replica'])
+def test_selectors_read_from_replica_until_the_user_writes(replica):
+    vehicle = VehicleFactory()
+    client = APIClient()
+    client.force_authenticate(user=vehicle.owner)
+
+    assert _replica_queries(client, f"/api/vehicles/{vehicle.pk}/build_summary/") > 0
+    assert _replica_queries(client, '/api/vehicles/') > 0
+
+    response = client.patch(f"/api/vehicles/{vehicle.pk}/", {'mileage': 1234}, format='json')
+    assert response.status_code == 200
+    # Read-your-writes: the replica may not have the new mileage yet
+    assert _replica_queries(client, '/api/vehicles/') == 0
+
+    # Reads outside a web request stay on the primary
+    with CaptureQueriesContext(replica) as queries:
+        vehicle_get_build_summary(vehicle.pk)
+    assert len(queries) == 0
+
+
+@pytest.mark.django_db(transaction=True, databases=['default', 'replica'])
+def test_lagging_replicas_are_skipped(replica):
+    vehicle = VehicleFactory()
+    client = APIClient()
+    client.force_authenticate(user=vehicle.owner)
+
+    with mock.patch.object(routing, 'replica_lag', return_value=60.0) as lag:
+        assert _replica_queries(client, '/api/vehicles/') == 0
+        assert _replica_queries(client, '/api/vehicles/') == 0
+    # Measured once per check interval, not per query
+    lag.assert_called_once_with('replica')
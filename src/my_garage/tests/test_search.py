@@ -0,0 +1,92 @@
+"""Tests for full-text search."""
+import pytest
+from django.contrib.admin.sites import site
+from django.test import RequestFactory
+from rest_framework.test import APIClient
+
+from my_garage.api import services
+from my_garage.api.selectors import search_documents
+from my_garage.models import SearchDocument, ServiceRecord
+from my_garage.tests.factories import (
+    ServiceRecordFactory,
+    UpgradeFactory,
+    UserFactory,
+    VehicleFactory,
+)
+
+
+@pytest.mark.django_db
+def test_documents_follow_record_changes():
+    """Saving, editing and deleting records keeps the index current."""
+    record = ServiceRecordFactory(vendor='Castrol Lube', description='Synthetic oil change')
+    owner = record.vehicle.owner
+    assert [d.object_id for d in search_documents(owner, 'oil')] == [record.id]
+
+    record.description = 'Brake fluid flush'
+    record.save()
+    assert search_documents(owner, 'oil') == []
+    assert [d.object_id for d in search_documents(owner, 'brake')] == [record.id]
+
+    record.delete()
+    assert not SearchDocument.objects.exists()
+
+
+@pytest.mark.django_db
+def test_search_ranks_title_matches_first_and_matches_prefixes():
+    vehicle = VehicleFactory(make='Toyota', model='Supra')
+    in_body = UpgradeFactory(vehicle=vehicle, part_name='Coilovers', brand='Tein', notes='Pairs with turbo kit')
+    in_title = UpgradeFactory(vehicle=vehicle, part_name='Turbo kit', brand='HKS', notes='')
+
+    results = search_documents(vehicle.owner, 'turb')
+    assert [d.object_id for d in results] == [in_title.id, in_body.id]
+    assert results[0].rank > results[1].rank
+    # Vehicle fields are indexed too
+    assert len(search_documents(vehicle.owner, 'supra turbo')) == 2
+
+
+@pytest.mark.django_db
+def test_ocr_line_items_are_searchable():
+    record = ServiceRecordFactory(description='Awaiting AI extraction')
+    services.search_document_set_ocr_text(record, [{'description': 'Spark plugs'}, {'description': 'Labor'}])
+
+    assert [d.object_id for d in search_documents(record.vehicle.owner, 'spark')] == [record.id]
+
+
+@pytest.mark.django_db
+def test_search_endpoint_is_scoped_to_the_user():
+    mine = ServiceRecordFactory(vendor='Brembo Service', description='Rotor replacement')
+    ServiceRecordFactory(vendor='Brembo Service', description='Rotor replacement')
+    client = APIClient()
+    client.force_authenticate(user=mine.vehicle.owner)
+
+    response = client.get('/api/search/', {'q': 'rotor', 'kind': 'service'})
+
+    assert response.status_code == 200
+    assert [r['object_id'] for r in response.data['results']] == [mine.id]
+    assert client.get('/api/search/', {'q': 'rotor', 'kind': 'bogus'}).status_code == 400
+
+
+@pytest.mark.django_db
+def test_admin_search_uses_index():
+    hit = ServiceRecordFactory(vendor='Quick Lube', description='Oil and filter')
+    ServiceRecordFactory(vendor='Tire Shop', description='Rotation')
+    model_admin = site._registry[ServiceRecord]
+    request = RequestFactory().get('/admin/my_garage/servicerecord/', {'q': 'filter'})
+    request.user = UserFactory(is_staff=True, is_superuser=True)
+
+    queryset, may_have_duplicates = model_admin.get_search_results(
+        request, ServiceRecord.objects.all(), 'filter'
+    )
+    assert list(queryset) == [hit] and not may_have_duplicates
+
+
+@pytest.mark.django_db
+def test_rebuild_index_covers_bulk_created_rows():
+    vehicle = VehicleFactory()
+    ServiceRecord.objects.bulk_create([
+        ServiceRecordFactory.build(vehicle=vehicle, description='Timing belt') for _ in range(3)
+    ])
+    assert search_documents(vehicle.owner, 'timing') == []
+
+    assert services.search_rebuild_index(batch_size=2) == 3
+    assert len(search_documents(vehicle.owner, 'timing')) == 3
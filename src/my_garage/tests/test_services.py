@@ -0,0 +1,134 @@
+"""Tests for the my_garage service layer."""
+import datetime
+from decimal import Decimal
+from unittest import mock
+
+import pytest
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from rest_framework.test import APIClient
+
+from my_garage.api import services
+from my_garage.benchmarks.stubs import StubResponse, in_memory_mongo
+from my_garage.tasks import INTERACTIVE_TASK_OPTIONS
+from my_garage.models import ServiceCostRollup, Upgrade
+from my_garage.tests.factories import ServiceRecordFactory, UpgradeFactory, VehicleFactory
+
+
+@pytest.fixture(autouse=True)
+def clear_cache():
+    cache.clear()
+    yield
+    cache.clear()
+
+
+def _pending_record(vehicle, n):
+    return ServiceRecordFactory(
+        vehicle=vehicle,
+        vendor='Processing...',
+        is_verified=False,
+        receipt_image=SimpleUploadedFile(f"r{n}.jpg", b'jpeg-bytes'),
+    )
+
+
+@pytest.mark.django_db
+def test_service_record_process_ocr_batch_applies_streamed_results(settings, tmp_path):
+    """Each NDJSON line updates its record; failed lines leave the record pending."""
+    settings.MEDIA_ROOT = tmp_path
+    settings.OCR_BATCH_SIZE = 2
+    vehicle = VehicleFactory()
+    records = [_pending_record(vehicle, n) for n in range(3)]
+
+    def fake_post(url, files, **kwargs):
+        assert url.endswith('/ocr/process-batch')
+        assert len(files) <= 2
+        return StubResponse([
+            {'index': i, 'ok': name != 'r1.jpg', 'error': 'unreadable',
+             'result': {'vendor': f"Shop {name}", 'total_cost': 10 + i}}
+            for i, (_, (name, _file)) in enumerate(files)
+        ])
+
+    with in_memory_mongo(), mock.patch('requests.post', side_effect=fake_post) as post:
+        outcomes = services.service_record_process_ocr_batch(records)
+
+    assert post.call_count == 2
+    assert outcomes == {records[0].id: True, records[1].id: False, records[2].id: True}
+    records[2].refresh_from_db()
+    assert records[2].vendor == 'Shop r2.jpg' and records[2].is_verified
+    records[1].refresh_from_db()
+    assert not records[1].is_verified
+
+
+@pytest.mark.django_db
+def test_ocr_receipt_date_files_the_cost_under_the_service_month(settings, tmp_path):
+    settings.MEDIA_ROOT = tmp_path
+    vehicle = VehicleFactory()
+    records = [_pending_record(vehicle, n) for n in range(2)]
+    results = [{'total_cost': 120, 'date': '2023-04-12'}, {'total_cost': 80, 'date': '2023-02-30'}]
+
+    def fake_post(url, files, **kwargs):
+        return StubResponse([{'index': i, 'ok': True, 'result': result} for i, result in enumerate(results)])
+
+    with in_memory_mongo(), mock.patch('requests.post', side_effect=fake_post):
+        services.service_record_process_ocr_batch(records)
+
+    records[0].refresh_from_db()
+    assert records[0].date == datetime.date(2023, 4, 12)
+    months = set(ServiceCostRollup.objects.filter(vehicle=vehicle).values_list('month', flat=True))
+    # An impossible date keeps the upload date
+    assert months == {datetime.date(2023, 4, 1), records[1].date.replace(day=1)}
+
+
+@pytest.mark.django_db
+def test_vehicle_enqueue_market_valuation_coalesces_pending_requests():
+    """A second refresh while one is pending returns the pending task id."""
+    vehicle = VehicleFactory()
+    with mock.patch('my_garage.tasks.task_update_market_valuation.apply_async') as apply_async:
+        first_id, first_created = services.vehicle_enqueue_market_valuation(vehicle.id)
+        second_id, second_created = services.vehicle_enqueue_market_valuation(vehicle.id)
+
+    assert (first_created, second_created) == (True, False)
+    assert second_id == first_id
+    apply_async.assert_called_once_with(args=(vehicle.id,), task_id=first_id, **INTERACTIVE_TASK_OPTIONS)
+
+    # Once the task finishes, the next request queues a new one
+    services.vehicle_release_market_valuation_lock(vehicle.id, first_id)
+    with mock.patch('my_garage.tasks.task_update_market_valuation.apply_async'):
+        third_id, third_created = services.vehicle_enqueue_market_valuation(vehicle.id)
+    assert third_created and third_id != first_id
+
+
+@pytest.mark.django_db
+def test_upgrade_bulk_transition_installs_a_stage_in_constant_queries(django_assert_max_num_queries):
+    vehicle = VehicleFactory()
+    stage_two = UpgradeFactory.create_batch(20, vehicle=vehicle, stage=2, status='ORDERED', installation_date=None)
+    done = UpgradeFactory(vehicle=vehicle, stage=2, status='INSTALLED', installation_date=datetime.date(2020, 1, 1))
+    other = UpgradeFactory(vehicle=vehicle, stage=3, status='WISHLIST')
+    UpgradeFactory(stage=2, status='ORDERED')  # someone else's car
+
+    with django_assert_max_num_queries(4):
+        changed = services.upgrade_bulk_transition(vehicle, 'INSTALLED', stage=2,
+                                                   installation_date=datetime.date(2024, 5, 1))
+
+    assert sorted(u.pk for u in changed) == sorted(u.pk for u in stage_two)
+    installed = Upgrade.objects.filter(vehicle=vehicle, status='INSTALLED')
+    assert installed.count() == 21
+    assert set(installed.exclude(pk=done.pk).values_list('installation_date', flat=True)) == {datetime.date(2024, 5, 1)}
+    assert Upgrade.objects.get(pk=done.pk).installation_date == datetime.date(2020, 1, 1)
+    assert Upgrade.objects.get(pk=other.pk).status == 'WISHLIST'
+
+
+@pytest.mark.django_db
+def test_transition_upgrades_endpoint_returns_build_summary():
+    vehicle = VehicleFactory(purchase_price=0)
+    parts = UpgradeFactory.create_batch(2, vehicle=vehicle, status='WISHLIST', cost=100)
+    client = APIClient()
+    client.force_authenticate(user=vehicle.owner)
+    url = f'/api/vehicles/{vehicle.pk}/upgrades/transition/'
+
+    response = client.post(url, {'status': 'INSTALLED', 'ids': [p.pk for p in parts]}, format='json')
+
+    assert response.status_code == 200
+    assert sorted(response.data['updated']) == sorted(p.pk for p in parts)
+    assert Decimal(response.data['build_summary']['upgrade_total']) == 200
+    assert client.post(url, {'status': 'INSTALLED'}, format='json').status_code == 400
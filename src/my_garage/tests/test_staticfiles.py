@@ -0,0 +1,54 @@
+"""Tests for the precompressed static files pipeline."""
+import gzip
+
+import pytest
+from django.core.management import call_command
+from django.http import HttpResponse
+from django.test import RequestFactory
+
+from my_garage.utils.staticfiles import IMMUTABLE_CACHE_CONTROL, StaticFilesMiddleware
+
+CSS = 'body { color: #123456; }\n' * 200
+
+
+@pytest.fixture
+def collected(tmp_path, settings):
+    source = tmp_path / 'static'
+    (source / 'css').mkdir(parents=True)
+    (source / 'css' / 'site.css').write_text(CSS)
+    (source / 'logo.png').write_bytes(b'\x89PNG' + bytes(2000))
+    settings.STATICFILES_DIRS = [source]
+    settings.STATIC_ROOT = tmp_path / 'collected'
+    settings.STORAGES = {**settings.STORAGES, 'staticfiles': {
+        'BACKEND': 'my_garage.utils.staticfiles.CompressedManifestStaticFilesStorage'}}
+    call_command('collectstatic', interactive=False, verbosity=0)
+    return settings.STATIC_ROOT
+
+
+def test_collectstatic_writes_hashed_and_compressed_files(collected):
+    hashed, = [path for path in (collected / 'css').glob('site.*.css')]
+    assert gzip.decompress((collected / 'css' / f"{hashed.name}.gz").read_bytes()).decode() == CSS
+    assert (collected / 'css' / 'site.css.gz').exists()
+    # Already compressed formats are left alone
+    assert not list(collected.glob('logo*.gz'))
+
+
+def test_middleware_negotiates_encoding_and_caching(collected):
+    middleware = StaticFilesMiddleware(lambda request: HttpResponse('app'))
+    factory = RequestFactory()
+    hashed = next((collected / 'css').glob('site.*.css')).name
+
+    response = middleware(factory.get(f'/static/css/{hashed}', HTTP_ACCEPT_ENCODING='gzip, br;q=0'))
+    assert response['Content-Encoding'] == 'gzip' and response['Vary'] == 'Accept-Encoding'
+    assert response['Cache-Control'] == IMMUTABLE_CACHE_CONTROL
+    assert response['Content-Type'].startswith('text/css')
+    assert gzip.decompress(b''.join(response.streaming_content)).decode() == CSS
+
+    response = middleware(factory.get('/static/css/site.css'))
+    assert 'Content-Encoding' not in response and response['Cache-Control'] == 'public, max-age=60'
+    assert b''.join(response.streaming_content).decode() == CSS
+    revalidated = middleware(factory.get('/static/css/site.css', HTTP_IF_NONE_MATCH=response['ETag']))
+    assert revalidated.status_code == 304
+
+    assert middleware(factory.get('/static/css/missing.css')).content == b'app'
+    assert middleware(factory.post(f'/static/css/{hashed}')).content == b'app'
@@ -0,0 +1,84 @@
+"""Tests for my_garage Celery tasks."""
+import datetime
+from decimal import Decimal
+from unittest import mock
+
+import pytest
+from django.core.cache import cache
+from django.utils import timezone
+
+from config.celery_app import app as celery_app
+from my_garage.benchmarks.stubs import stub_external_services
+from my_garage.tasks import task_bulk_valuation_refresh
+from my_garage.tests.factories import VehicleFactory
+from my_garage.utils.ratelimit import RateLimitExceeded, TokenBucket, acquire
+
+
+@pytest.fixture(autouse=True)
+def clear_cache():
+    cache.clear()
+    yield
+    cache.clear()
+
+
+@pytest.mark.django_db
+def test_bulk_valuation_refresh_skips_recently_valued_vehicles():
+    """Only stale or never-valued vehicles are refreshed, and their locks are released."""
+    now = timezone.now()
+    fresh = VehicleFactory(valuation_updated_at=now - datetime.timedelta(hours=1),
+                           current_market_value=Decimal('1.00'))
+    stale = VehicleFactory(valuation_updated_at=now - datetime.timedelta(days=30))
+    never = VehicleFactory()
+
+    with stub_external_services() as stub:
+        message = task_bulk_valuation_refresh.apply().get()
+
+    assert message == "Queued refresh for 2 vehicles (0 already in flight)."
+    assert stub.calls == 2
+    fresh.refresh_from_db()
+    assert fresh.current_market_value == Decimal('1.00')
+    for vehicle in (stale, never):
+        vehicle.refresh_from_db()
+        assert vehicle.valuation_updated_at > now
+        assert cache.get(f"valuation:inflight:{vehicle.id}") is None
+
+
+@pytest.mark.parametrize('task_name, queue', [
+    ('my_garage.tasks.task_process_receipt_ocr', 'interactive'),
+    ('my_garage.tasks.task_process_receipt_ocr_batch', 'interactive'),
+    ('my_garage.update_valuation', 'interactive'),
+    ('my_garage.bulk_refresh', 'bulk'),
+])
+def test_tasks_are_routed_to_their_queue(task_name, queue):
+    route = celery_app.amqp.router.route({}, task_name)
+    assert route['queue'].name == queue
+
+
+@pytest.mark.django_db
+def test_bulk_valuation_refresh_queues_at_bulk_priority(settings):
+    """Scheduled refreshes go to the bulk queue so they can't delay user requests."""
+    VehicleFactory()
+    with mock.patch('my_garage.tasks.task_update_market_valuation.apply_async') as apply_async:
+        task_bulk_valuation_refresh.apply().get()
+
+    options = apply_async.call_args.kwargs
+    assert options['queue'] == 'bulk'
+    assert options['priority'] == settings.TASK_PRIORITY_BULK
+
+
+def test_token_bucket_refills_at_rate():
+    now = [0.0]
+    bucket = TokenBucket(rate=2, burst=2, clock=lambda: now[0])
+
+    assert bucket.try_acquire() == 0 and bucket.try_acquire() == 0
+    assert bucket.try_acquire() == pytest.approx(0.5)
+    now[0] = 0.5
+    assert bucket.try_acquire() == 0
+
+
+def test_acquire_raises_instead_of_waiting_too_long(settings):
+    settings.EXTERNAL_SERVICE_RATE_LIMITS = {'ocr': {'rate': 0.5, 'burst': 1}}
+    acquire('ocr', max_wait=0)
+    with pytest.raises(RateLimitExceeded) as excinfo:
+        acquire('ocr', max_wait=0)
+    assert excinfo.value.retry_after == pytest.approx(2.0, abs=0.1)
@@ -0,0 +1,177 @@
+"""Tests for resumable chunked uploads."""
+import io
+from unittest import mock
+
+import pytest
+import requests
+from rest_framework.test import APIClient
+
+from my_garage.api import services
+from my_garage.models import ServiceRecord, UploadSession
+from my_garage.tests.factories import VehicleFactory
+from my_garage.utils.uploads import COPY_BLOCK_SIZE, staging_path
+
+
+@pytest.fixture
+def upload_dirs(settings, tmp_path):
+    settings.MEDIA_ROOT = tmp_path / 'media'
+    settings.UPLOAD_STAGING_DIR = tmp_path / 'staging'
+    return tmp_path
+
+
+def _patch_chunk(client, session_id, offset, data):
+    return client.generic(
+        'PATCH', f'/api/uploads/{session_id}/', data,
+        content_type='application/offset+octet-stream', HTTP_UPLOAD_OFFSET=str(offset),
+    )
+
+
+@pytest.mark.django_db
+def test_chunked_upload_resumes_and_hands_off_to_ocr(upload_dirs, django_capture_on_commit_callbacks):
+    vehicle = VehicleFactory()
+    client = APIClient()
+    client.force_authenticate(user=vehicle.owner)
+    payload = b'receipt-bytes-' * 100
+
+    response = client.post('/api/uploads/', {'vehicle': vehicle.pk, 'filename': 'receipt.jpg', 'size': len(payload)})
+    assert response.status_code == 201
+    session_id = response.data['id']
+
+    assert _patch_chunk(client, session_id, 0, payload[:600]).status_code == 204
+    # A retried chunk after a dropped response is rejected with the real offset
+    conflict = _patch_chunk(client, session_id, 0, payload[:600])
+    assert conflict.status_code == 409 and conflict['Upload-Offset'] == '600'
+    assert client.post(f'/api/uploads/{session_id}/finalize/').status_code == 400
+
+    response = _patch_chunk(client, session_id, 600, payload[600:])
+    assert response.status_code == 204 and response['Upload-Offset'] == str(len(payload))
+
+    with mock.patch('my_garage.tasks.task_process_receipt_ocr.apply_async') as ocr, \
+            django_capture_on_commit_callbacks(execute=True):
+        response = client.post(f'/api/uploads/{session_id}/finalize/')
+
+    assert response.status_code == 202
+    session = UploadSession.objects.get(pk=session_id)
+    assert session.status == 'COMPLETE'
+    record = ServiceRecord.objects.get(pk=session.service_record_id)
+    assert record.receipt_image.read() == payload
+    ocr.assert_called_once()
+    assert not staging_path(session_id).exists()
+
+
+class DroppedStream(io.BytesIO):
+    """A request body whose client disconnects after the first block."""
+
+    def read(self, size=-1):
+        if self.tell():
+            raise OSError("Connection reset by peer")
+        return super().read(size)
+
+
+@pytest.mark.django_db(transaction=True)
+def test_chunk_interrupted_by_read_error_can_be_resent(upload_dirs):
+    vehicle = VehicleFactory()
+    payload = bytes(range(256)) * (COPY_BLOCK_SIZE // 128)
+    session = services.upload_session_create(vehicle.owner, vehicle, 'receipt.jpg', len(payload))
+
+    with pytest.raises(OSError):
+        services.upload_session_append_chunk(session.pk, 0, DroppedStream(payload), len(payload))
+    session.refresh_from_db()
+    assert session.offset == 0 and staging_path(session.pk).stat().st_size == 0
+
+    # Bytes a crashed request left behind don't wedge the session either
+    staging_path(session.pk).write_bytes(payload[:100])
+    session = services.upload_session_append_chunk(session.pk, 0, io.BytesIO(payload), len(payload))
+    assert session.offset == len(payload) and staging_path(session.pk).read_bytes() == payload
+
+
+@pytest.mark.django_db
+def test_upload_limits_and_ownership(upload_dirs, settings):
+    settings.UPLOAD_MAX_SIZE = 100
+    vehicle = VehicleFactory()
+    client = APIClient()
+    client.force_authenticate(user=VehicleFactory().owner)
+
+    response = client.post('/api/uploads/', {'vehicle': vehicle.pk, 'filename': 'r.jpg', 'size': 10})
+    assert response.status_code == 400  # someone else's vehicle
+
+    with pytest.raises(services.UploadError):
+        services.upload_session_create(vehicle.owner, vehicle, 'r.jpg', 101)
+    session = services.upload_session_create(vehicle.owner, vehicle, 'r.jpg', 10)
+    assert _patch_chunk(client, session.pk, 0, b'x').status_code == 404
+
+    client.force_authenticate(user=vehicle.owner)
+    assert _patch_chunk(client, session.pk, 0, b'x' * 11).status_code == 400
+
+
+@pytest.mark.django_db
+def test_purge_abandoned_uploads(upload_dirs):
+    vehicle = VehicleFactory()
+    session = services.upload_session_create(vehicle.owner, vehicle, 'r.jpg', 10)
+
+    assert services.upload_session_purge_abandoned() == 0
+    UploadSession.objects.filter(pk=session.pk).update(updated_at=session.updated_at.replace(year=2000))
+
+    assert services.upload_session_purge_abandoned() == 1
+    assert not UploadSession.objects.exists()
+    assert not staging_path(session.pk).exists()
+
+
+@pytest.fixture
+def s3_media(settings, monkeypatch):
+    """S3 media storage against moto's in-process S3."""
+    moto = pytest.importorskip('moto')
+    for key, value in {'AWS_ACCESS_KEY_ID': 'test', 'AWS_SECRET_ACCESS_KEY': 'test',
+                       'AWS_DEFAULT_REGION': 'us-east-1'}.items():
+        monkeypatch.setenv(key, value)
+    with moto.mock_aws():
+        settings.STORAGES = {
+            **settings.STORAGES,
+            'default': {'BACKEND': 'my_garage.utils.storage.S3MediaStorage',
+                        'OPTIONS': {'bucket_name': 'garage-media', 'location': 'media'}},
+        }
+        from django.core.files.storage import default_storage
+        default_storage.client.create_bucket(Bucket='garage-media')
+        yield default_storage
+
+
+@pytest.mark.django_db
+def test_direct_upload_to_storage_and_ocr_by_reference(s3_media, django_capture_on_commit_callbacks):
+    vehicle = VehicleFactory()
+    client = APIClient()
+    client.force_authenticate(user=vehicle.owner)
+    payload = b'\xff\xd8\xff' + b'0' * 1024
+
+    response = client.post('/api/uploads/direct/', {'vehicle': vehicle.pk, 'filename': 'receipt.jpg',
+                                                     'size': len(payload), 'content_type': 'image/jpeg'})
+    assert response.status_code == 201
+    session_id, upload = response.data['id'], response.data['upload']
+    assert _patch_chunk(client, session_id, 0, payload).status_code == 400
+    assert client.post(f'/api/uploads/{session_id}/finalize/').status_code == 400  # nothing in the bucket yet
+
+    # The client's upload, which never touches Django
+    assert requests.post(upload['url'], data=upload['fields'], files={'file': payload}).status_code == 204
+
+    with mock.patch('my_garage.tasks.task_process_receipt_ocr.apply_async'), \
+            django_capture_on_commit_callbacks(execute=True):
+        response = client.post(f'/api/uploads/{session_id}/finalize/')
+    assert response.status_code == 202 and response.data['status'] == 'COMPLETE'
+    record = ServiceRecord.objects.get(pk=response.data['service_record'])
+    assert record.receipt_image.name == UploadSession.objects.get(pk=session_id).storage_key
+    assert record.receipt_image.read() == payload
+
+    ocr_result = {'vendor': 'Shop', 'total_cost': 12}
+    with mock.patch('requests.post', return_value=mock.Mock(json=lambda: ocr_result)) as post, \
+            mock.patch.object(services, '_service_record_store_ocr_result'):
+        assert services.service_record_process_ocr_data(record)
+    url, = post.call_args.args
+    assert url.endswith('/ocr/process-object')
+    assert post.call_args.kwargs['json']['key'] == record.receipt_image.name
+    assert 'files' not in post.call_args.kwargs
+
+
+@pytest.mark.django_db
+def test_direct_upload_needs_presigning_storage(upload_dirs):
+    vehicle = VehicleFactory()
+    with pytest.raises(services.UploadError):
+        services.upload_session_create_direct(vehicle.owner, vehicle, 'r.jpg', 10)
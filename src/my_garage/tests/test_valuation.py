@@ -0,0 +1,154 @@
+"""Tests for the vectorized garage valuation engine and the valuation ledger."""
+import datetime
+from decimal import Decimal
+
+import numpy as np
+import pytest
+from rest_framework.test import APIClient
+
+from my_garage.api.selectors import garage_get_valuation, vehicle_get_valuation_history
+from my_garage.api.services import condition_report_add_ai_grade, vehicle_record_valuation
+from my_garage.models import ConditionReport, ValuationEvent, Vehicle
+from my_garage.tests.factories import (
+    ConditionReportFactory,
+    ServiceRecordFactory,
+    UpgradeFactory,
+    VehicleFactory,
+)
+from my_garage.utils.valuation import ValuationInputs, compute_valuations
+
+MODEL = {
+    'reference_grade': 7.0,
+    'condition_weights': {'EXTERIOR': 0.05},
+    'upgrade_retention': {'enthusiast': {'ENGINE': 0.5}, 'purist': {'ENGINE': -0.25}},
+}
+SCENARIOS = {
+    'baseline': {'market': 1.0, 'buyer': 'enthusiast'},
+    'purist_buyer': {'market': 1.0, 'buyer': 'purist'},
+    'market_down_10': {'market': 0.9, 'buyer': 'enthusiast'},
+}
+
+
+def test_compute_valuations_applies_condition_upgrades_and_scenarios():
+    inputs = ValuationInputs.empty([1, 2], ['ENGINE'], ['EXTERIOR'])
+    inputs.market_value[:] = [10_000, 20_000]
+    inputs.total_investment[:] = [12_000, 15_000]
+    inputs.upgrade_cost[:, 0] = [2_000, 0]
+    inputs.grades[0, 0] = 9.0  # second car never graded
+
+    result = compute_valuations(inputs, MODEL, SCENARIOS)
+
+    # 10k + 10% condition bonus + half the upgrade cost
+    np.testing.assert_allclose(result.adjusted_value[0], [12_000, 10_500, 10_900])
+    np.testing.assert_allclose(result.adjusted_value[1], [20_000, 20_000, 18_000])
+    np.testing.assert_allclose(result.equity[:, 0], [0, 5_000])
+    assert result.totals()['baseline'] == {'adjusted_value': 32_000.0, 'equity': 5_000.0}
+
+
+@pytest.mark.django_db
+def test_garage_valuation_loads_latest_grades_and_installed_upgrades(settings):
+    settings.VALUATION_MODEL = MODEL
+    vehicle = VehicleFactory(current_market_value=Decimal('10000'), purchase_price=Decimal('8000'))
+    ServiceRecordFactory(vehicle=vehicle, total_cost=Decimal('500'))
+    UpgradeFactory(vehicle=vehicle, category='ENGINE', status='INSTALLED', cost=Decimal('2000'))
+    UpgradeFactory(vehicle=vehicle, category='ENGINE', status='WISHLIST', cost=Decimal('9999'))
+    old = ConditionReportFactory(vehicle=vehicle, area='EXTERIOR', grade=3.0)
+    ConditionReport.objects.filter(pk=old.pk).update(created_at=datetime.datetime(2020, 1, 1, tzinfo=datetime.timezone.utc))
+    ConditionReportFactory(vehicle=vehicle, area='EXTERIOR', grade=9.0)
+    VehicleFactory(owner=vehicle.owner, current_market_value=Decimal('5000'), purchase_price=None)
+
+    result = garage_get_valuation(Vehicle.objects.filter(owner=vehicle.owner), ['baseline'])
+
+    assert list(result.vehicle_ids)[0] == vehicle.id
+    assert result.adjusted_value[0, 0] == pytest.approx(12_000)
+    assert result.equity[0, 0] == pytest.approx(12_000 - (8_000 + 500 + 2_000))
+    assert result.adjusted_value[1, 0] == pytest.approx(5_000)
+
+
+@pytest.mark.django_db
+def test_garage_valuation_counts_recorded_condition_impact_once(settings):
+    settings.VALUATION_MODEL = MODEL
+    vehicle = VehicleFactory(current_market_value=Decimal('10000'))
+    condition_report_add_ai_grade(vehicle, 'EXTERIOR', None, 9.0, 'Fresh paint', Decimal('750'))
+    assert vehicle.current_market_value == Decimal('10750')
+
+    result = garage_get_valuation(Vehicle.objects.filter(pk=vehicle.pk), ['baseline'])
+    assert result.market_value[0, 0] == pytest.approx(10_000)
+    assert result.adjusted_value[0, 0] == pytest.approx(11_000)  # the engine's 10% grade bonus only
+
+    # A new market value replaces the earlier adjustments
+    vehicle_record_valuation(vehicle, 'MARKET', Decimal('12000'), absolute=True)
+    result = garage_get_valuation(Vehicle.objects.filter(pk=vehicle.pk), ['baseline'])
+    assert result.market_value[0, 0] == pytest.approx(12_000)
+
+
+@pytest.mark.django_db
+def test_valuation_endpoint():
+    vehicle = VehicleFactory()
+    client = APIClient()
+    client.force_authenticate(user=vehicle.owner)
+
+    response = client.get('/api/valuations/', {'scenario': ['baseline', 'purist_buyer']})
+
+    assert response.status_code == 200
+    assert response.data['scenarios'] == ['baseline', 'purist_buyer']
+    assert [row['vehicle'] for row in response.data['vehicles']] == [vehicle.id]
+    assert client.get('/api/valuations/', {'scenario': 'bogus'}).status_code == 400
+
+
+@pytest.mark.django_db
+def test_valuation_ledger_records_creation_adjustments_and_edits():
+    vehicle = VehicleFactory(current_market_value=Decimal('10000.00'))
+    stale = Vehicle.objects.get(pk=vehicle.pk)
+
+    condition_report_add_ai_grade(vehicle, 'EXTERIOR', 'photo.jpg', 8.0, 'Clean', Decimal('250.00'))
+    # A stale instance adjusts from the stored value, not its own copy
+    vehicle_record_valuation(stale, 'CONDITION', Decimal('-100.00'), absolute=False)
+    vehicle_record_valuation(vehicle, 'MARKET', Decimal('12000.00'), absolute=True)
+    vehicle.refresh_from_db()
+    vehicle.current_market_value = Decimal('11500.00')
+    vehicle.save()
+    vehicle.mileage += 10
+    vehicle.save()
+
+    events = list(vehicle.valuation_events.order_by('id').values_list('source', 'amount', 'value_after'))
+    assert events == [
+        ('BASELINE', Decimal('10000.00'), Decimal('10000.00')),
+        ('CONDITION', Decimal('250.00'), Decimal('10250.00')),
+        ('CONDITION', Decimal('-100.00'), Decimal('10150.00')),
+        ('MARKET', Decimal('12000.00'), Decimal('12000.00')),
+        ('MANUAL', Decimal('11500.00'), Decimal('11500.00')),
+    ]
+    assert stale.current_market_value == Decimal('10150.00')
+
+
+@pytest.mark.django_db
+def test_valuation_history_downsamples_to_last_value_per_bucket():
+    vehicle = VehicleFactory(current_market_value=Decimal('0'))
+    start = datetime.datetime(2024, 1, 1, tzinfo=datetime.timezone.utc)
+    ValuationEvent.objects.bulk_create([
+        ValuationEvent(vehicle=vehicle, source='MARKET', amount=i, is_absolute=True, value_after=i,
+                       created_at=start + datetime.timedelta(hours=6 * i))
+        for i in range(40)  # four a day for ten days
+    ])
+    window = {'start': start, 'end': start + datetime.timedelta(days=30)}
+
+    assert len(vehicle_get_valuation_history(vehicle, **window, max_points=100)) == 40
+    daily = vehicle_get_valuation_history(vehicle, **window, max_points=20)
+    assert [row['value_after'] for row in daily] == [Decimal(i) for i in range(3, 40, 4)]
+    weekly = vehicle_get_valuation_history(vehicle, **window, max_points=5)
+    assert len(weekly) <= 5 and weekly[-1]['value_after'] == Decimal(39)
+
+
+@pytest.mark.django_db
+def test_valuation_history_endpoint():
+    vehicle = VehicleFactory(current_market_value=Decimal('9000.00'))
+    client = APIClient()
+    client.force_authenticate(user=vehicle.owner)
+
+    response = client.get(f'/api/vehicles/{vehicle.pk}/valuation_history/')
+
+    assert response.status_code == 200
+    assert [(row['value'], row['source']) for row in response.data['series']] == [('9000.00', 'BASELINE')]
+    assert client.get(f'/api/vehicles/{vehicle.pk}/valuation_history/', {'points': 1}).status_code == 400
+    assert client.get(f'/api/vehicles/{vehicle.pk}/valuation_history/', {'start': '2024-13'}).status_code == 400
@@ -0,0 +1,102 @@
+"""Tests for offline VIN decoding."""
+import pytest
+from rest_framework.test import APIClient
+
+from my_garage.api import services
+from my_garage.forms import VehicleForm
+from my_garage.tests.factories import UserFactory
+from my_garage.utils.vin import VinError, VinIndex, build_index, check_digit, get_vin_index
+
+
+def _with_check_digit(vin):
+    return vin[:8] + check_digit(vin) + vin[9:]
+
+
+def test_check_digit_and_malformed_vins():
+    assert check_digit('1M8GDM9AXKP042788') == 'X'
+    assert check_digit('11111111111111111') == '1'
+
+    index = get_vin_index()
+    decoding = index.decode(' 1m8gdm9axkp042788 ')
+    assert decoding.vin == '1M8GDM9AXKP042788' and decoding.check_digit_valid
+    assert decoding.year == 1989 and decoding.region == 'North America'
+    assert not index.decode('1M8GDM9A1KP042788').valid  # mistyped check digit
+    # Outside North America the year code is read within the model's production run
+    miata = index.decode('JM1NA3510L0000001')
+    assert (miata.model, miata.year, miata.valid) == ('MX-5 Miata', 1990, True)
+    for malformed in ('1M8GDM9AXKP04278', '1M8GDM9AXKP04278O'):
+        with pytest.raises(VinError):
+            index.decode(malformed)
+
+
+def test_decode_prefers_longest_prefix(tmp_path):
+    dataset = tmp_path / 'patterns.csv'
+    dataset.write_text(
+        "wmi,vds,year_from,year_to,make,model,engine\n"
+        "JHM,,,,Honda,,\n"
+        "JHM,AP1,2000,2003,,S2000,F20C\n"
+        "JHM,AP2,2004,2009,,S2000,F22C1\n"
+    )
+    assert build_index(dataset, tmp_path / 'vin.idx') == 3
+    index = VinIndex(tmp_path / 'vin.idx')
+
+    s2000 = index.decode(_with_check_digit('JHMAP1140YT000001'))
+    assert (s2000.make, s2000.model, s2000.engine, s2000.year) == ('Honda', 'S2000', 'F20C', 2000)
+    other = index.decode(_with_check_digit('JHMGE8840CS000001'))
+    assert (other.make, other.model) == ('Honda', '')
+    assert index.decode(_with_check_digit('ZZZAP1140YT000001')).make == ''
+
+
+@pytest.mark.django_db
+def test_batch_decode_endpoint(settings):
+    settings.VIN_DECODE_BATCH_MAX = 3
+    client = APIClient()
+    client.force_authenticate(user=UserFactory())
+    z = _with_check_digit('JN1AZ34D05M000001')
+
+    response = client.post('/api/vins/decode/', {'vins': [z, 'not-a-vin']}, format='json')
+    assert response.status_code == 200
+    first, second = response.data['results']
+    assert (first['make'], first['model'], first['year'], first['valid']) == ('Nissan', '350Z', 2005, True)
+    assert second == {'vin': 'not-a-vin', 'valid': False, 'error': second['error']}
+
+    assert client.post('/api/vins/decode/', {'vins': [z] * 4}, format='json').status_code == 400
+    assert client.get('/api/vins/decode/', {'vin': z}).data == services.vehicle_decode_vin(z)
+    assert client.get('/api/vins/decode/', {'vin': 'short'}).status_code == 400
+
+
+@pytest.mark.django_db
+def test_vehicle_api_rejects_mistyped_vin():
+    user = UserFactory()
+    client = APIClient()
+    client.force_authenticate(user=user)
+    vehicle = {'make': 'Honda', 'model': 'S2000', 'year': 2000}
+
+    response = client.post('/api/vehicles/', {**vehicle, 'vin': '1HGAP1140YT000001'}, format='json')
+    assert response.status_code == 400 and 'vin' in response.data
+    vin = _with_check_digit('1HGAP1140YT000001').lower()
+    response = client.post('/api/vehicles/', {**vehicle, 'vin': vin}, format='json')
+    assert response.status_code == 201 and response.data['vin'] == vin.upper()
+
+
+@pytest.mark.django_db
+def test_vehicle_api_keeps_pre_1981_chassis_numbers():
+    client = APIClient()
+    client.force_authenticate(user=UserFactory())
+
+    response = client.post('/api/vehicles/', {'make': 'Porsche', 'model': '911', 'year': 1973,
+                                              'vin': ' 9113100123 '}, format='json')
+    assert response.status_code == 201 and response.data['vin'] == '9113100123'
+
+
+@pytest.mark.django_db
+def test_vehicle_form_applies_the_same_vin_rules():
+    vehicle = {'make': 'Honda', 'model': 'S2000', 'year': 2000, 'mileage': 0}
+
+    form = VehicleForm(data={**vehicle, 'vin': '1HGAP1140YT000001'})
+    assert not form.is_valid() and 'vin' in form.errors
+    vin = _with_check_digit('1HGAP1140YT000001')
+    form = VehicleForm(data={**vehicle, 'vin': f" {vin.lower()} "})
+    assert form.is_valid() and form.cleaned_data['vin'] == vin
+    form = VehicleForm(data={**vehicle, 'vin': '9113100123'})
+    assert form.is_valid() and form.cleaned_data['vin'] == '9113100123'
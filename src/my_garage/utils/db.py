@@ -0,0 +1,32 @@
+"""Database connection lifetime for web and worker processes."""
+from typing import Any, Dict
+
+from django.db import connections
+
+
+def apply_connection_settings(overrides: Dict[str, Any]) -> None:
+    """
+    Switches every configured database to `overrides` (CONN_MAX_AGE,
+    CONN_HEALTH_CHECKS and the `pool` option, as built by the settings), e.g.
+    WORKER_DATABASE_CONNECTION when a Celery worker starts. Call it before the
+    process opens connections; open ones keep their settings until closed.
+    """
+    for alias in connections:
+        database = connections.settings[alias]
+        options = {key: value for key, value in database.get('OPTIONS', {}).items() if key != 'pool'}
+        options.update(overrides.get('OPTIONS', {}))
+        database.update({key: value for key, value in overrides.items() if key != 'OPTIONS'})
+        database['OPTIONS'] = options
+
+
+def close_stale_connections() -> None:
+    """
+    Closes connections that are broken or older than CONN_MAX_AGE, like
+    Django does between requests and Celery between tasks. Long-running
+    tasks call it between batches, so a connection that outlives its welcome
+    (or was dropped by the server) is replaced rather than failing the next
+    batch. Connections inside a transaction are left alone.
+    """
+    for connection in connections.all(initialized_only=True):
+        if not connection.in_atomic_block:
+            connection.close_if_unusable_or_obsolete()
@@ -0,0 +1,138 @@
+"""
+Per-user events pushed to clients over server-sent events.
+
+Tasks call `publish_user_event` and the event goes out once their
+transaction commits. `GET /api/events/` is an async view, so it has to be
+served by the ASGI app (config.asgi). It subscribes to the user's channel
+and streams whatever arrives, so clients keep one idle connection open
+instead of polling.
+
+Redis pub/sub (EVENTS_REDIS_URL) carries events from worker to web
+processes. EVENTS_BACKEND='memory' keeps them within one process, for
+tests and a single-process dev server. Delivery is best effort: events
+published while a client is disconnected are lost, so a client re-reads
+the state it shows whenever it (re)connects.
+"""
+import asyncio
+import functools
+import json
+import logging
+from collections import defaultdict
+from typing import Any, Dict, Optional, Set
+
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import transaction
+
+logger = logging.getLogger(__name__)
+
+
+def user_channel(user_id: int) -> str:
+    return f"events:user:{user_id}"
+
+
+class MemorySubscription:
+    def __init__(self, bus: 'InMemoryEventBus', channel: str):
+        self.bus = bus
+        self.channel = channel
+        self.loop = asyncio.get_running_loop()
+        self.queue: asyncio.Queue = asyncio.Queue()
+
+    async def get(self, timeout: float) -> Optional[str]:
+        """The next message, or None after `timeout` seconds without one."""
+        try:
+            return await asyncio.wait_for(self.queue.get(), timeout)
+        except asyncio.TimeoutError:
+            return None
+
+    async def close(self) -> None:
+        self.bus.subscribers[self.channel].discard(self)
+
+
+class InMemoryEventBus:
+    """Delivers to subscribers in this process only; publishing is thread-safe."""
+
+    def __init__(self):
+        self.subscribers: Dict[str, Set[MemorySubscription]] = defaultdict(set)
+
+    def publish(self, channel: str, message: str) -> None:
+        for subscription in list(self.subscribers[channel]):
+            subscription.loop.call_soon_threadsafe(subscription.queue.put_nowait, message)
+
+    async def subscribe(self, channel: str) -> MemorySubscription:
+        subscription = MemorySubscription(self, channel)
+        self.subscribers[channel].add(subscription)
+        return subscription
+
+
+class RedisSubscription:
+    def __init__(self, client, pubsub):
+        self.client = client
+        self.pubsub = pubsub
+
+    async def get(self, timeout: float) -> Optional[str]:
+        """The next message, or None after `timeout` seconds without one."""
+        message = await self.pubsub.get_message(ignore_subscribe_messages=True, timeout=timeout)
+        return message['data'].decode() if message else None
+
+    async def close(self) -> None:
+        await self.pubsub.aclose()
+        await self.client.aclose()
+
+
+class RedisEventBus:
+    """
+    Redis pub/sub. Publishing shares one connection per process; each stream
+    holds its own subscriber connection, which sits idle between events.
+    """
+
+    def __init__(self, url: str):
+        self.url = url
+        self._client = None
+
+    def publish(self, channel: str, message: str) -> None:
+        if self._client is None:
+            import redis
+            self._client = redis.Redis.from_url(self.url)
+        self._client.publish(channel, message)
+
+    async def subscribe(self, channel: str) -> RedisSubscription:
+        import redis.asyncio
+
+        client = redis.asyncio.Redis.from_url(self.url)
+        pubsub = client.pubsub()
+        await pubsub.subscribe(channel)
+        return RedisSubscription(client, pubsub)
+
+
+@functools.lru_cache(maxsize=None)
+def _event_bus(backend: str, url: str):
+    if backend == 'memory':
+        return InMemoryEventBus()
+    if backend == 'redis':
+        return RedisEventBus(url)
+    raise ImproperlyConfigured(f"Unknown EVENTS_BACKEND {backend!r} (expected 'redis' or 'memory').")
+
+
+def get_event_bus():
+    """The process-wide bus for EVENTS_BACKEND."""
+    return _event_bus(settings.EVENTS_BACKEND, settings.EVENTS_REDIS_URL)
+
+
+def publish_user_event(user_id: int, event: str, data: Dict[str, Any]) -> None:
+    """
+    Sends `event` with `data` to `user_id`'s open streams once the current
+    transaction commits (immediately outside one), so a client that reacts
+    by fetching the object reads the new state. A failed publish is logged:
+    polling clients still see the change.
+    """
+    message = json.dumps({'event': event, 'data': data}, cls=DjangoJSONEncoder)
+
+    def send():
+        try:
+            get_event_bus().publish(user_channel(user_id), message)
+        except Exception:
+            logger.warning(f"Could not publish {event} for user {user_id}", exc_info=True)
+
+    transaction.on_commit(send)
@@ -1,7 +1,10 @@
 """MongoDB utility functions."""
+from typing import TYPE_CHECKING
+
 from django.conf import settings
-from pymongo import MongoClient
-from pymongo.collection import Collection
+
+if TYPE_CHECKING:
+    from pymongo.collection import Collection
 
 _client = None
 
@@ -9,6 +12,9 @@ def get_client():
     """Get or create MongoDB client."""
     global _client
     if _client is None:
+        # pymongo is imported on first use, so processes that never touch Mongo don't load it
+        from pymongo import MongoClient
+
         # Use settings for connection string if available, otherwise default
         mongo_uri = getattr(settings, 'MONGO_URI', 'mongodb://localhost:27017/')
         _client = MongoClient(mongo_uri)
@@ -20,7 +26,7 @@ def get_db():
     db_name = getattr(settings, 'MONGO_DB_NAME', 'my_garage_docs')
     return client[db_name]
 
-def get_collection(collection_name: str) -> Collection:
+def get_collection(collection_name: str) -> "Collection":
     """Get a specific collection."""
     db = get_db()
     return db[collection_name]
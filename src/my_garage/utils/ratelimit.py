@@ -0,0 +1,87 @@
+"""Token-bucket rate limiting for calls to external services."""
+import threading
+import time
+from typing import Callable, Dict, Optional, Tuple
+
+from django.conf import settings
+
+
+class RateLimitExceeded(Exception):
+    """No token became available within the allowed wait."""
+
+    def __init__(self, service: str, retry_after: float):
+        super().__init__(f"Rate limit for '{service}' exceeded; retry in {retry_after:.1f}s")
+        self.service = service
+        self.retry_after = retry_after
+
+
+class TokenBucket:
+    """
+    Classic token bucket: refills at `rate` tokens/second up to `burst`.
+    Thread-safe, so one bucket can be shared by a threaded worker pool.
+    """
+
+    def __init__(self, rate: float, burst: float, clock: Callable[[], float] = time.monotonic):
+        self.rate = rate
+        self.burst = burst
+        self._clock = clock
+        self._tokens = burst
+        self._updated = clock()
+        self._lock = threading.Lock()
+
+    def try_acquire(self, tokens: float = 1) -> float:
+        """
+        Takes `tokens` if available and returns 0, otherwise takes nothing and
+        returns the seconds until enough tokens will have accumulated.
+        """
+        tokens = min(tokens, self.burst)
+        with self._lock:
+            now = self._clock()
+            self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            if self._tokens >= tokens:
+                self._tokens -= tokens
+                return 0.0
+            return (tokens - self._tokens) / self.rate
+
+
+_buckets: Dict[Tuple[str, float, float], TokenBucket] = {}
+_buckets_lock = threading.Lock()
+
+
+def get_bucket(service: str) -> Optional[TokenBucket]:
+    """
+    The process-wide bucket for `service` as configured in
+    EXTERNAL_SERVICE_RATE_LIMITS, or None when the service is unlimited.
+    """
+    config = getattr(settings, 'EXTERNAL_SERVICE_RATE_LIMITS', {}).get(service)
+    if not config or not config.get('rate'):
+        return None
+    key = (service, float(config['rate']), float(config.get('burst', config['rate'])))
+    with _buckets_lock:
+        if key not in _buckets:
+            _buckets[key] = TokenBucket(rate=key[1], burst=key[2])
+        return _buckets[key]
+
+
+def acquire(service: str, tokens: float = 1, max_wait: Optional[float] = None) -> None:
+    """
+    Blocks until `service` has capacity for `tokens` requests, waiting at most
+    `max_wait` seconds (RATE_LIMIT_MAX_WAIT by default). Raises
+    RateLimitExceeded when the wait would be longer, so Celery tasks can retry
+    with a countdown instead of holding a worker slot.
+    """
+    bucket = get_bucket(service)
+    if bucket is None:
+        return
+    if max_wait is None:
+        max_wait = getattr(settings, 'RATE_LIMIT_MAX_WAIT', 2.0)
+
+    deadline = time.monotonic() + max_wait
+    while True:
+        wait = bucket.try_acquire(tokens)
+        if not wait:
+            return
+        if time.monotonic() + wait > deadline:
+            raise RateLimitExceeded(service, wait)
+        time.sleep(wait)
@@ -0,0 +1,180 @@
+"""
+Read replicas for selectors and reporting endpoints.
+
+Reads go to the primary unless they happen inside a web request *and* inside
+a `replica_reads()` block (or a `@replica_read` selector). Even then the
+primary is used when:
+
+- no replica is within the allowed lag (REPLICA_MAX_LAG_SECONDS by default,
+  or the selector's own `max_lag`),
+- the request has already written, or its user wrote within the last
+  REPLICA_PIN_SECONDS (read-your-writes),
+- a transaction is open on the primary.
+
+Celery tasks, management commands and the shell never read from a replica.
+Writes always go to the primary.
+"""
+import contextlib
+import functools
+import math
+import random
+import time
+from contextvars import ContextVar
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS, DatabaseError, connections
+from django.db.models import QuerySet
+
+# How far a PostgreSQL standby's replay is behind; 0 once it has replayed all it received
+POSTGRES_LAG_SQL = """
+    SELECT CASE WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0
+                ELSE EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()) END
+"""
+
+
+@dataclass
+class RequestRouting:
+    """Routing state for one web request."""
+    request: Any
+    wrote: bool = False
+    max_lag: Optional[float] = None
+    _pinned: Optional[bool] = None
+
+    @property
+    def pinned(self) -> bool:
+        """True when the request's user wrote recently. Checked once, when first needed."""
+        if self._pinned is None:
+            user_id = _user_id(self.request)
+            self._pinned = user_id is not None and cache.get(_pin_key(user_id)) is not None
+        return self._pinned
+
+
+_routing: ContextVar[Optional[RequestRouting]] = ContextVar('replica_routing', default=None)
+
+# alias -> (monotonic time checked, lag in seconds)
+_replica_lag: Dict[str, Tuple[float, float]] = {}
+
+
+def _user_id(request: Any) -> Optional[int]:
+    # DRF copies the user it authenticates onto the underlying request
+    user = getattr(request, 'user', None)
+    return user.pk if user is not None and user.is_authenticated else None
+
+
+def _pin_key(user_id: int) -> str:
+    return f"replica_pin:{user_id}"
+
+
+def replica_lag(alias: str) -> float:
+    """Seconds `alias` is behind the primary (0 on backends without replication)."""
+    connection = connections[alias]
+    if connection.vendor != 'postgresql':
+        return 0.0
+    with connection.cursor() as cursor:
+        cursor.execute(POSTGRES_LAG_SQL)
+        lag = cursor.fetchone()[0]
+    return float(lag or 0)
+
+
+def available_replicas(max_lag: float) -> List[str]:
+    """
+    Replicas no more than `max_lag` seconds behind. Each replica's lag is
+    measured at most every REPLICA_LAG_CHECK_INTERVAL seconds per process;
+    an unreachable one counts as infinitely behind until the next check.
+    """
+    now = time.monotonic()
+    replicas = []
+    for alias in settings.REPLICA_DATABASES:
+        checked_at, lag = _replica_lag.get(alias, (-math.inf, math.inf))
+        if now - checked_at >= settings.REPLICA_LAG_CHECK_INTERVAL:
+            try:
+                lag = replica_lag(alias)
+            except DatabaseError:
+                lag = math.inf
+            _replica_lag[alias] = (now, lag)
+        if lag <= max_lag:
+            replicas.append(alias)
+    return replicas
+
+
+@contextlib.contextmanager
+def replica_reads(max_lag: Optional[float] = None) -> Iterator[None]:
+    """Lets reads in this block use a replica at most `max_lag` seconds behind."""
+    state = _routing.get()
+    if state is None:
+        yield
+        return
+    previous = state.max_lag
+    state.max_lag = settings.REPLICA_MAX_LAG_SECONDS if max_lag is None else max_lag
+    try:
+        yield
+    finally:
+        state.max_lag = previous
+
+
+def replica_read(func: Optional[Callable] = None, *, max_lag: Optional[float] = None) -> Callable:
+    """
+    Marks a selector as safe to answer from a replica (see `replica_reads`).
+    A returned QuerySet is bound to the chosen database, so it stays there
+    when evaluated after the selector returns.
+    """
+    def decorator(selector: Callable) -> Callable:
+        @functools.wraps(selector)
+        def wrapper(*args, **kwargs):
+            with replica_reads(max_lag):
+                result = selector(*args, **kwargs)
+                if isinstance(result, QuerySet) and result._db is None:
+                    result = result.using(result.db)
+            return result
+        return wrapper
+    return decorator(func) if func is not None else decorator
+
+
+class ReplicaRouter:
+    """Database router implementing the rules in the module docstring."""
+
+    def db_for_read(self, model, **hints) -> str:
+        state = _routing.get()
+        if (state is None or state.max_lag is None or not settings.REPLICA_DATABASES or state.wrote
+                or connections[DEFAULT_DB_ALIAS].in_atomic_block or state.pinned):
+            return DEFAULT_DB_ALIAS
+        replicas = available_replicas(state.max_lag)
+        return random.choice(replicas) if replicas else DEFAULT_DB_ALIAS
+
+    def db_for_write(self, model, **hints) -> str:
+        state = _routing.get()
+        if state is not None:
+            state.wrote = True
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints) -> bool:
+        # Replicas hold the same rows as the primary
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints) -> Optional[bool]:
+        return False if db in settings.REPLICA_DATABASES else None
+
+
+class ReplicaRoutingMiddleware:
+    """
+    Scopes routing state to each request, and pins the user to the primary
+    for REPLICA_PIN_SECONDS after a request that wrote.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        state = RequestRouting(request)
+        token = _routing.set(state)
+        try:
+            response = self.get_response(request)
+        finally:
+            _routing.reset(token)
+        user_id = _user_id(request)
+        if state.wrote and user_id is not None:
+            cache.set(_pin_key(user_id), True, settings.REPLICA_PIN_SECONDS)
+        return response
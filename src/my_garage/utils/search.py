@@ -0,0 +1,178 @@
+"""
+Full-text index over SearchDocument, per database backend.
+
+PostgreSQL: a weighted, generated `tsvector` column with a GIN index, plus a
+pg_trgm index on titles used as a fallback for misspellings.
+SQLite: an external-content FTS5 table kept in sync by triggers.
+Other backends fall back to `icontains`, which is correct but unindexed.
+"""
+import re
+from typing import List, Optional, Sequence, Tuple
+
+from django.db.models import BooleanField, Q
+from django.db.models.expressions import RawSQL
+
+TABLE = 'my_garage_searchdocument'
+FTS_TABLE = 'my_garage_searchdocument_fts'
+
+# Longer queries add little and make every term a separate index lookup
+MAX_TERMS = 8
+# Minimum pg_trgm similarity for the fallback to count as a match
+TRIGRAM_THRESHOLD = 0.3
+
+POSTGRES_SCHEMA = [
+    "CREATE EXTENSION IF NOT EXISTS pg_trgm",
+    f"""
+    ALTER TABLE {TABLE} ADD COLUMN IF NOT EXISTS search_vector tsvector GENERATED ALWAYS AS (
+        setweight(to_tsvector('english', coalesce(title, '')), 'A') ||
+        setweight(to_tsvector('english', coalesce(body, '')), 'B') ||
+        setweight(to_tsvector('english', coalesce(ocr_text, '')), 'C') ||
+        setweight(to_tsvector('english', coalesce(vehicle_label, '')), 'D')
+    ) STORED
+    """,
+    f"CREATE INDEX IF NOT EXISTS {TABLE}_vector_gin ON {TABLE} USING GIN (search_vector)",
+    f"CREATE INDEX IF NOT EXISTS {TABLE}_title_trgm ON {TABLE} USING GIN (title gin_trgm_ops)",
+]
+
+SQLITE_SCHEMA = [
+    f"""
+    CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} USING fts5(
+        title, body, ocr_text, vehicle_label,
+        content='{TABLE}', content_rowid='id', tokenize='porter unicode61'
+    )
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS {TABLE}_ai AFTER INSERT ON {TABLE} BEGIN
+        INSERT INTO {FTS_TABLE}(rowid, title, body, ocr_text, vehicle_label)
+        VALUES (new.id, new.title, new.body, new.ocr_text, new.vehicle_label);
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS {TABLE}_ad AFTER DELETE ON {TABLE} BEGIN
+        INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, title, body, ocr_text, vehicle_label)
+        VALUES ('delete', old.id, old.title, old.body, old.ocr_text, old.vehicle_label);
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS {TABLE}_au AFTER UPDATE ON {TABLE} BEGIN
+        INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, title, body, ocr_text, vehicle_label)
+        VALUES ('delete', old.id, old.title, old.body, old.ocr_text, old.vehicle_label);
+        INSERT INTO {FTS_TABLE}(rowid, title, body, ocr_text, vehicle_label)
+        VALUES (new.id, new.title, new.body, new.ocr_text, new.vehicle_label);
+    END
+    """,
+]
+
+
+def install_search_schema(connection) -> None:
+    """Creates the backend's full-text index. Safe to run repeatedly."""
+    with connection.cursor() as cursor:
+        if connection.vendor == 'postgresql':
+            for statement in POSTGRES_SCHEMA:
+                cursor.execute(statement)
+        elif connection.vendor == 'sqlite':
+            cursor.execute("SELECT 1 FROM sqlite_master WHERE name = %s", [FTS_TABLE])
+            exists = cursor.fetchone() is not None
+            for statement in SQLITE_SCHEMA:
+                cursor.execute(statement)
+            if not exists:
+                # Index rows written before the table existed
+                cursor.execute(f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('rebuild')")
+
+
+def uninstall_search_schema(connection) -> None:
+    """Drops what `install_search_schema` created (pg_trgm is left installed)."""
+    with connection.cursor() as cursor:
+        if connection.vendor == 'postgresql':
+            cursor.execute(f"DROP INDEX IF EXISTS {TABLE}_title_trgm")
+            cursor.execute(f"DROP INDEX IF EXISTS {TABLE}_vector_gin")
+            cursor.execute(f"ALTER TABLE {TABLE} DROP COLUMN IF EXISTS search_vector")
+        elif connection.vendor == 'sqlite':
+            for suffix in ('ai', 'ad', 'au'):
+                cursor.execute(f"DROP TRIGGER IF EXISTS {TABLE}_{suffix}")
+            cursor.execute(f"DROP TABLE IF EXISTS {FTS_TABLE}")
+
+
+def query_terms(text: str) -> List[str]:
+    """Splits user input into plain word terms, so no input can be a syntax error."""
+    return re.findall(r'\w+', text.lower())[:MAX_TERMS]
+
+
+def _match_query(connection, terms: Sequence[str]) -> str:
+    # Every term must match; the last one as a prefix so results update as you type
+    if connection.vendor == 'postgresql':
+        return ' & '.join(terms[:-1] + [f"{terms[-1]}:*"])
+    return ' '.join([f'"{t}"' for t in terms[:-1]] + [f'"{terms[-1]}"*'])
+
+
+def match_condition(connection, text: str) -> Optional[Q]:
+    """
+    A filter for SearchDocument querysets matching `text` through the index,
+    or None when `text` has no searchable terms.
+    """
+    terms = query_terms(text)
+    if not terms:
+        return None
+    if connection.vendor == 'postgresql':
+        sql = "search_vector @@ to_tsquery('english', %s)"
+    elif connection.vendor == 'sqlite':
+        sql = f"id IN (SELECT rowid FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s)"
+    else:
+        condition = Q()
+        for term in terms:
+            condition &= (Q(title__icontains=term) | Q(body__icontains=term)
+                          | Q(ocr_text__icontains=term) | Q(vehicle_label__icontains=term))
+        return condition
+    return Q(RawSQL(sql, [_match_query(connection, terms)], output_field=BooleanField()))
+
+
+def ranked_ids(connection, text: str, owner_id: int, kinds: Optional[Sequence[str]] = None,
+               limit: int = 20) -> Optional[List[Tuple[int, float]]]:
+    """
+    The `limit` best (id, rank) pairs of `owner_id`'s documents for `text`,
+    best first. Returns None on backends without a ranking index.
+    """
+    terms = query_terms(text)
+    if not terms:
+        return []
+
+    filters = ["d.owner_id = %s"]
+    filter_params: List[object] = [owner_id]
+    if kinds:
+        filters.append(f"d.kind IN ({', '.join(['%s'] * len(kinds))})")
+        filter_params.extend(kinds)
+    where = ' AND '.join(filters)
+    match = _match_query(connection, terms)
+
+    with connection.cursor() as cursor:
+        if connection.vendor == 'postgresql':
+            cursor.execute(
+                f"SELECT d.id, ts_rank_cd(d.search_vector, q) AS rank "
+                f"FROM {TABLE} d, to_tsquery('english', %s) q "
+                f"WHERE d.search_vector @@ q AND {where} ORDER BY rank DESC, d.id LIMIT %s",
+                [match, *filter_params, limit],
+            )
+            rows = cursor.fetchall()
+            if rows:
+                return rows
+            # Nothing matched word-for-word: look for near-miss spellings of the title
+            phrase = ' '.join(terms)
+            cursor.execute(
+                f"SELECT d.id, similarity(d.title, %s) AS rank FROM {TABLE} d "
+                f"WHERE d.title %% %s AND similarity(d.title, %s) >= %s AND {where} "
+                f"ORDER BY rank DESC, d.id LIMIT %s",
+                [phrase, phrase, phrase, TRIGRAM_THRESHOLD, *filter_params, limit],
+            )
+            return cursor.fetchall()
+
+        if connection.vendor == 'sqlite':
+            # bm25 is lower-is-better; columns weighted title > body > ocr_text > vehicle
+            cursor.execute(
+                f"SELECT d.id, -bm25({FTS_TABLE}, 10.0, 4.0, 2.0, 1.0) AS rank "
+                f"FROM {FTS_TABLE} JOIN {TABLE} d ON d.id = {FTS_TABLE}.rowid "
+                f"WHERE {FTS_TABLE} MATCH %s AND {where} ORDER BY rank DESC, d.id LIMIT %s",
+                [match, *filter_params, limit],
+            )
+            return cursor.fetchall()
+
+    return None
@@ -0,0 +1,248 @@
+"""
+Fingerprinted, precompressed static files served by the app itself.
+
+`collectstatic` with CompressedManifestStaticFilesStorage writes each file
+under a content-hashed name as well (css/site.3f2a9c1b07e4.css, through
+Django's manifest storage) and, next to every file that compresses well,
+a gzip and, when the optional brotli package is installed
+(`pip install my-garage[static]`), a brotli variant.
+
+StaticFilesMiddleware answers requests under STATIC_URL from an index of
+STATIC_ROOT held in memory, sending the smallest variant the client
+accepts. Hashed names never change content, so they are cached by browsers
+for a year without revalidation; the unhashed names get STATIC_MAX_AGE.
+That is enough for small deployments without a CDN or a web server in
+front. The index is read when the process starts: restart after
+collectstatic, as a deploy does anyway.
+"""
+import gzip
+import mimetypes
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Set, Tuple
+from urllib.parse import urlsplit
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.conf import settings
+from django.contrib.staticfiles.storage import ManifestFilesMixin, ManifestStaticFilesStorage
+from django.core.exceptions import MiddlewareNotUsed
+from django.core.files.storage import storages
+from django.http import FileResponse, HttpResponse, HttpResponseNotModified
+from django.utils.http import http_date, parse_etags
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+IMMUTABLE_CACHE_CONTROL = 'public, max-age=31536000, immutable'
+
+# Formats that are compressed already
+INCOMPRESSIBLE_SUFFIXES = frozenset({
+    '.avif', '.br', '.gif', '.gz', '.jpeg', '.jpg', '.mp3', '.mp4', '.png',
+    '.webm', '.webp', '.woff', '.woff2', '.zip',
+})
+
+# A variant is only kept if it is at most this fraction of the original
+MAX_COMPRESSED_RATIO = 0.95
+
+
+def _compressors() -> List[Tuple[str, Callable[[bytes], bytes]]]:
+    """(file suffix, compress) for each encoding available here."""
+    compressors = [('.gz', lambda data: gzip.compress(data, compresslevel=9, mtime=0))]
+    if brotli is not None:
+        compressors.append(('.br', lambda data: brotli.compress(data, quality=11)))
+    return compressors
+
+
+# Content-Encoding of each variant suffix, in order of preference
+ENCODINGS = (('br', '.br'), ('gzip', '.gz'))
+
+
+def compress_file(path: Path) -> List[Path]:
+    """
+    Writes the compressed variants of `path` that are worth having, removes
+    stale ones that aren't, and returns the variants written.
+    """
+    if path.suffix.lower() in INCOMPRESSIBLE_SUFFIXES:
+        return []
+    data = path.read_bytes()
+    written = []
+    for suffix, compress in _compressors():
+        target = path.with_name(path.name + suffix)
+        compressed = compress(data)
+        if len(compressed) <= len(data) * MAX_COMPRESSED_RATIO:
+            target.write_bytes(compressed)
+            written.append(target)
+        elif target.exists():
+            target.unlink()
+    return written
+
+
+class CompressedManifestStaticFilesStorage(ManifestStaticFilesStorage):
+    """
+    Manifest storage (content-hashed names) that also writes the compressed
+    variants of every collected file, under both its names.
+    """
+
+    def post_process(self, paths, dry_run=False, **options):
+        names: Dict[str, None] = {}
+        for name, hashed_name, processed in super().post_process(paths, dry_run=dry_run, **options):
+            yield name, hashed_name, processed
+            if hashed_name and not isinstance(processed, Exception):
+                names.update(dict.fromkeys((name, hashed_name)))
+        if dry_run:
+            return
+
+        # zlib and brotli release the GIL while compressing
+        with ThreadPoolExecutor() as pool:
+            results = pool.map(lambda name: compress_file(Path(self.path(name))), names)
+            for name, variants in zip(names, results):
+                for variant in variants:
+                    yield name, f"{name}{variant.suffix}", True
+
+
+@dataclass(frozen=True)
+class Variant:
+    encoding: str  # '' for the uncompressed file
+    path: Path
+    size: int
+    etag: str
+
+
+@dataclass(frozen=True)
+class StaticFile:
+    content_type: str
+    cache_control: str
+    last_modified: str
+    variants: Tuple[Variant, ...]  # Smallest first
+
+    def negotiate(self, accept_encoding: str) -> Variant:
+        accepted = _accepted_encodings(accept_encoding)
+        return next(v for v in self.variants if not v.encoding or v.encoding in accepted)
+
+
+def _accepted_encodings(header: str) -> Set[str]:
+    accepted = set()
+    for item in header.split(','):
+        coding, _, params = item.strip().partition(';')
+        if params.replace(' ', '') not in ('q=0', 'q=0.0', 'q=0.00', 'q=0.000'):
+            accepted.add(coding.strip().lower())
+    return accepted
+
+
+def build_index(root: Path, immutable_names: Set[str], max_age: int) -> Dict[str, StaticFile]:
+    """Maps each file name under `root` to what is needed to serve it."""
+    index = {}
+    suffixes = {suffix for _, suffix in ENCODINGS}
+    for path in root.rglob('*'):
+        if not path.is_file():
+            continue
+        if path.suffix in suffixes and path.with_suffix('').is_file():
+            continue  # A variant, indexed with its original
+        name = path.relative_to(root).as_posix()
+        stat = path.stat()
+        tag = f"{stat.st_mtime_ns:x}-{stat.st_size:x}"
+        variants = [Variant('', path, stat.st_size, f'"{tag}"')]
+        for encoding, suffix in ENCODINGS:
+            compressed = path.with_name(path.name + suffix)
+            if compressed.is_file():
+                variants.append(Variant(encoding, compressed, compressed.stat().st_size, f'"{tag}-{encoding}"'))
+        content_type, _ = mimetypes.guess_type(name)
+        index[name] = StaticFile(
+            content_type=content_type or 'application/octet-stream',
+            cache_control=IMMUTABLE_CACHE_CONTROL if name in immutable_names else f'public, max-age={max_age}',
+            last_modified=http_date(stat.st_mtime),
+            variants=tuple(sorted(variants, key=lambda v: v.size)),
+        )
+    return index
+
+
+def _immutable_names() -> Set[str]:
+    """The hashed names in the staticfiles manifest, if the storage keeps one."""
+    storage = storages['staticfiles']
+    if isinstance(storage, ManifestFilesMixin):
+        return set(storage.hashed_files.values())
+    return set()
+
+
+class StaticFilesMiddleware:
+    """
+    Serves STATIC_ROOT under STATIC_URL before the rest of the middleware
+    runs. Unused when STATIC_URL is on another host or STATIC_ROOT is empty.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.prefix = urlsplit(settings.STATIC_URL or '').path
+        if not self.prefix.startswith('/') or urlsplit(settings.STATIC_URL).netloc:
+            raise MiddlewareNotUsed
+        root = Path(settings.STATIC_ROOT) if settings.STATIC_ROOT else None
+        self.files = build_index(root, _immutable_names(), settings.STATIC_MAX_AGE) if root and root.is_dir() else {}
+        if not self.files:
+            raise MiddlewareNotUsed
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        found = self.lookup(request)
+        if found is None:
+            return self.get_response(request)
+        static_file, variant = found
+        response = self.respond(request, static_file, variant)
+        if response is None:
+            response = FileResponse(variant.path.open('rb'), content_type=static_file.content_type)
+            response.headers.pop('Content-Disposition', None)
+            self.set_headers(response, static_file, variant)
+        return response
+
+    async def __acall__(self, request):
+        found = self.lookup(request)
+        if found is None:
+            return await self.get_response(request)
+        static_file, variant = found
+        response = self.respond(request, static_file, variant)
+        if response is None:
+            # Read in one go: a streamed file would cost a thread hop per chunk
+            content = await sync_to_async(variant.path.read_bytes)()
+            response = HttpResponse(content, content_type=static_file.content_type)
+            self.set_headers(response, static_file, variant)
+        return response
+
+    def lookup(self, request) -> Optional[Tuple[StaticFile, Variant]]:
+        if request.method not in ('GET', 'HEAD') or not request.path.startswith(self.prefix):
+            return None
+        static_file = self.files.get(request.path[len(self.prefix):])
+        if static_file is None:
+            return None
+        return static_file, static_file.negotiate(request.headers.get('Accept-Encoding', ''))
+
+    def respond(self, request, static_file: StaticFile, variant: Variant) -> Optional[HttpResponse]:
+        """The response that needs no file read (304 or HEAD), if any."""
+        etags = parse_etags(request.headers.get('If-None-Match', ''))
+        if variant.etag in etags or '*' in etags:
+            response = HttpResponseNotModified()
+        elif request.method == 'HEAD':
+            response = HttpResponse(content_type=static_file.content_type)
+        else:
+            return None
+        self.set_headers(response, static_file, variant)
+        return response
+
+    @staticmethod
+    def set_headers(response: HttpResponse, static_file: StaticFile, variant: Variant) -> None:
+        if response.status_code == 200:
+            response['Content-Length'] = str(variant.size)
+        response['ETag'] = variant.etag
+        response['Last-Modified'] = static_file.last_modified
+        response['Cache-Control'] = static_file.cache_control
+        if len(static_file.variants) > 1:
+            response['Vary'] = 'Accept-Encoding'
+        if variant.encoding:
+            response['Content-Encoding'] = variant.encoding
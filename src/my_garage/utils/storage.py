@@ -0,0 +1,124 @@
+"""
+S3-compatible media storage (AWS S3, MinIO, ...) with presigned URLs.
+
+Clients upload straight to the bucket with a presigned POST and the OCR
+service downloads objects with presigned GET URLs, so image bytes never pass
+through Django. Enabled with MEDIA_STORAGE=s3; boto3 is only imported then
+(`pip install my-garage[s3]`).
+"""
+import mimetypes
+import posixpath
+import tempfile
+from typing import Any, Dict, Optional
+
+from django.core.exceptions import ImproperlyConfigured
+from django.core.files import File
+from django.core.files.storage import Storage
+from django.utils.deconstruct import deconstructible
+
+# Files larger than this are spooled to disk when opened
+SPOOL_MAX_SIZE = 5 * 1024 * 1024
+
+
+@deconstructible
+class S3MediaStorage(Storage):
+    """
+    Stores media as objects under `location` in `bucket_name`. Credentials
+    come from boto3's usual chain (environment, config files, instance role).
+    `url()` returns a presigned GET URL valid for `querystring_expire` seconds.
+    """
+
+    def __init__(self, bucket_name: Optional[str] = None, endpoint_url: Optional[str] = None,
+                 region_name: Optional[str] = None, location: str = '', querystring_expire: int = 3600):
+        if not bucket_name:
+            raise ImproperlyConfigured("S3MediaStorage needs a bucket_name (AWS_STORAGE_BUCKET_NAME).")
+        self.bucket_name = bucket_name
+        self.endpoint_url = endpoint_url or None
+        self.region_name = region_name or None
+        self.location = location.strip('/')
+        self.querystring_expire = querystring_expire
+        self._client = None
+
+    @property
+    def client(self):
+        if self._client is None:
+            try:
+                import boto3
+                from botocore.config import Config
+            except ImportError as exc:
+                raise ImproperlyConfigured("MEDIA_STORAGE=s3 requires boto3 (pip install my-garage[s3]).") from exc
+            self._client = boto3.client(
+                's3', endpoint_url=self.endpoint_url, region_name=self.region_name,
+                config=Config(signature_version='s3v4'),
+            )
+        return self._client
+
+    def _key(self, name: str) -> str:
+        return posixpath.join(self.location, name) if self.location else name
+
+    def _is_missing(self, error: Exception) -> bool:
+        code = getattr(error, 'response', {}).get('Error', {}).get('Code')
+        return code in ('404', 'NoSuchKey', 'NotFound')
+
+    def _head(self, name: str) -> Dict[str, Any]:
+        return self.client.head_object(Bucket=self.bucket_name, Key=self._key(name))
+
+    def _open(self, name: str, mode: str = 'rb') -> File:
+        if 'w' in mode or 'a' in mode:
+            raise ValueError("S3MediaStorage files are read-only once stored; save a new file instead.")
+        spooled = tempfile.SpooledTemporaryFile(max_size=SPOOL_MAX_SIZE)
+        self.client.download_fileobj(self.bucket_name, self._key(name), spooled)
+        spooled.seek(0)
+        return File(spooled, name=name)
+
+    def _save(self, name: str, content: File) -> str:
+        content.seek(0)
+        content_type = getattr(content, 'content_type', None) or mimetypes.guess_type(name)[0]
+        extra = {'ContentType': content_type} if content_type else {}
+        # Multipart for large files, streamed from `content` without reading it whole
+        self.client.upload_fileobj(content, self.bucket_name, self._key(name), ExtraArgs=extra)
+        return name
+
+    def delete(self, name: str) -> None:
+        self.client.delete_object(Bucket=self.bucket_name, Key=self._key(name))
+
+    def exists(self, name: str) -> bool:
+        try:
+            self._head(name)
+        except Exception as exc:
+            if self._is_missing(exc):
+                return False
+            raise
+        return True
+
+    def size(self, name: str) -> int:
+        return self._head(name)['ContentLength']
+
+    def get_modified_time(self, name: str):
+        return self._head(name)['LastModified']
+
+    def url(self, name: str) -> str:
+        return self.client.generate_presigned_url(
+            'get_object', Params={'Bucket': self.bucket_name, 'Key': self._key(name)},
+            ExpiresIn=self.querystring_expire,
+        )
+
+    def presigned_post(self, name: str, size: int, content_type: str = '',
+                       expires_in: Optional[int] = None) -> Dict[str, Any]:
+        """
+        A form (`url` plus `fields`) that lets a client POST exactly `size`
+        bytes to `name` directly, without credentials.
+        """
+        fields = {'Content-Type': content_type} if content_type else {}
+        conditions = [['content-length-range', size, size]]
+        if content_type:
+            conditions.append({'Content-Type': content_type})
+        return self.client.generate_presigned_post(
+            self.bucket_name, self._key(name), Fields=fields, Conditions=conditions,
+            ExpiresIn=expires_in or self.querystring_expire,
+        )
+
+
+def supports_direct_access(storage: Storage) -> bool:
+    """True if clients and services can reach `storage` objects through presigned URLs."""
+    return callable(getattr(storage, 'presigned_post', None))
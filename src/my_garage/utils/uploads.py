@@ -0,0 +1,66 @@
+"""Staging files for resumable uploads (see UploadSession)."""
+import os
+from pathlib import Path
+from typing import BinaryIO
+
+from django.conf import settings
+
+# Bytes copied from the request stream per read
+COPY_BLOCK_SIZE = 64 * 1024
+
+
+class UploadOffsetMismatch(Exception):
+    """The staged file doesn't end where the chunk claims to start."""
+
+    def __init__(self, expected: int, received: int):
+        super().__init__(f"Chunk starts at byte {received}, upload is at byte {expected}")
+        self.expected = expected
+        self.received = received
+
+
+def staging_path(session_id: object) -> Path:
+    """Where the bytes received so far for an upload session are kept."""
+    return Path(settings.UPLOAD_STAGING_DIR) / f"{session_id}.part"
+
+
+def create_staging_file(session_id: object) -> Path:
+    path = staging_path(session_id)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.touch()
+    return path
+
+
+def append_chunk(session_id: object, offset: int, stream: BinaryIO, length: int) -> int:
+    """
+    Copies `length` bytes from `stream` onto the staging file at `offset`,
+    the committed size of the upload, in COPY_BLOCK_SIZE reads. Returns the
+    new size. A short read (client disconnected) keeps whatever arrived, so
+    the client can resume from the returned offset. If reading raises, the
+    file is cut back to `offset` to match the offset that was not saved;
+    bytes past `offset` left by a request that crashed are dropped too.
+    """
+    path = staging_path(session_id)
+    with open(path, 'ab') as staged:
+        if staged.tell() > offset:
+            staged.truncate(offset)
+            staged.seek(offset)
+        if staged.tell() != offset:
+            raise UploadOffsetMismatch(staged.tell(), offset)
+        remaining = length
+        try:
+            while remaining:
+                block = stream.read(min(COPY_BLOCK_SIZE, remaining))
+                if not block:
+                    break
+                staged.write(block)
+                remaining -= len(block)
+        except BaseException:
+            staged.truncate(offset)
+            raise
+        staged.flush()
+        os.fsync(staged.fileno())
+        return staged.tell()
+
+
+def delete_staging_file(session_id: object) -> None:
+    staging_path(session_id).unlink(missing_ok=True)
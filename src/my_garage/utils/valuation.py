@@ -0,0 +1,117 @@
+"""
+Vectorized what-if valuation for many vehicles at once.
+
+Inputs are loaded into arrays (one row per vehicle) and every scenario is
+computed in a single pass of matrix operations, so valuing a whole garage
+costs about the same as valuing one car. Amounts are float64: these are
+estimates, and results are rounded to cents when reported.
+"""
+from dataclasses import dataclass
+from typing import Any, Dict, List, Mapping, Sequence, Tuple
+
+import numpy as np
+
+
+@dataclass
+class ValuationInputs:
+    """Per-vehicle arrays; row i of every array describes `vehicle_ids[i]`."""
+    vehicle_ids: np.ndarray       # (n,) int64
+    market_value: np.ndarray      # (n,) market value before condition adjustments
+    total_investment: np.ndarray  # (n,) purchase price + verified services + installed upgrades
+    upgrade_cost: np.ndarray      # (n, len(categories)) installed upgrade cost per category
+    grades: np.ndarray            # (n, len(areas)) latest grade per area, NaN if never graded
+    categories: Tuple[str, ...]
+    areas: Tuple[str, ...]
+
+    @classmethod
+    def empty(cls, vehicle_ids: Sequence[int], categories: Sequence[str], areas: Sequence[str]) -> "ValuationInputs":
+        """Zeroed inputs (no grades) for `vehicle_ids`, to be filled in by the caller."""
+        n = len(vehicle_ids)
+        return cls(
+            vehicle_ids=np.asarray(vehicle_ids, dtype=np.int64),
+            market_value=np.zeros(n),
+            total_investment=np.zeros(n),
+            upgrade_cost=np.zeros((n, len(categories))),
+            grades=np.full((n, len(areas)), np.nan),
+            categories=tuple(categories),
+            areas=tuple(areas),
+        )
+
+    def rows_for(self, vehicle_ids: Sequence[int]) -> np.ndarray:
+        """Row indices of `vehicle_ids`, each of which must be in the (sorted) inputs."""
+        return np.searchsorted(self.vehicle_ids, np.asarray(vehicle_ids, dtype=np.int64))
+
+
+@dataclass
+class ValuationResult:
+    """Per-vehicle, per-scenario outcomes as (n, len(scenarios)) arrays."""
+    vehicle_ids: np.ndarray
+    scenarios: Tuple[str, ...]
+    market_value: np.ndarray
+    condition_adjustment: np.ndarray
+    upgrade_premium: np.ndarray
+    adjusted_value: np.ndarray
+    equity: np.ndarray
+
+    def totals(self) -> Dict[str, Dict[str, float]]:
+        """Garage-wide sums per scenario."""
+        adjusted = self.adjusted_value.sum(axis=0)
+        equity = self.equity.sum(axis=0)
+        return {
+            name: {'adjusted_value': round(float(adjusted[i]), 2), 'equity': round(float(equity[i]), 2)}
+            for i, name in enumerate(self.scenarios)
+        }
+
+    def rows(self) -> List[Dict[str, Any]]:
+        """One dict per vehicle, amounts rounded to cents."""
+        fields = ('market_value', 'condition_adjustment', 'upgrade_premium', 'adjusted_value', 'equity')
+        rounded = {field: np.round(getattr(self, field), 2).tolist() for field in fields}
+        return [
+            {
+                'vehicle': int(vehicle_id),
+                'scenarios': {
+                    name: {field: rounded[field][i][j] for field in fields}
+                    for j, name in enumerate(self.scenarios)
+                },
+            }
+            for i, vehicle_id in enumerate(self.vehicle_ids)
+        ]
+
+
+def compute_valuations(inputs: ValuationInputs, model: Mapping[str, Any],
+                       scenarios: Mapping[str, Mapping[str, Any]]) -> ValuationResult:
+    """
+    Values every vehicle under every scenario (see VALUATION_MODEL and
+    VALUATION_SCENARIOS in settings):
+
+        market    = market_value * scenario market multiplier
+        condition = market * sum over areas of weight * (grade - reference_grade)
+        premium   = upgrade cost per category @ buyer retention per category
+        adjusted  = max(market + condition + premium, 0)
+        equity    = adjusted - total_investment
+    """
+    names = tuple(scenarios)
+    multipliers = np.array([scenarios[name]['market'] for name in names], dtype=float)     # (S,)
+    retention = np.array([                                                                  # (C, S)
+        [model['upgrade_retention'][scenarios[name]['buyer']].get(category, 0.0) for name in names]
+        for category in inputs.categories
+    ], dtype=float).reshape(len(inputs.categories), len(names))
+    weights = np.array([model['condition_weights'].get(area, 0.0) for area in inputs.areas], dtype=float)
+
+    market = inputs.market_value[:, None] * multipliers[None, :]                            # (n, S)
+    # Ungraded areas count as reference condition
+    grade_delta = np.nan_to_num(inputs.grades - model['reference_grade'])                   # (n, A)
+    condition = market * (grade_delta @ weights)[:, None]
+    premium = inputs.upgrade_cost @ retention
+    adjusted = np.maximum(market + condition + premium, 0.0)
+    equity = adjusted - inputs.total_investment[:, None]
+
+    return ValuationResult(
+        vehicle_ids=inputs.vehicle_ids,
+        scenarios=names,
+        market_value=market,
+        condition_adjustment=condition,
+        upgrade_premium=premium,
+        adjusted_value=adjusted,
+        equity=equity,
+    )
@@ -0,0 +1,264 @@
+"""
+Offline VIN decoding.
+
+The first three characters of a VIN (the WMI) identify the manufacturer, the
+next five (the VDS, before the check digit) the model line and engine, and
+the tenth the model year. Known WMI/VDS prefixes come from a CSV dataset
+(VIN_DATASET_PATH, by default the sample bundled in my_garage/data) compiled
+into a binary index file (VIN_INDEX_PATH): fixed-width records sorted by
+prefix, followed by a table of the distinct names. The index is
+memory-mapped and binary-searched, so a decode is a handful of slice
+comparisons with nothing parsed per process, and web and worker processes
+share the same pages.
+
+The index is rebuilt on first use whenever the dataset is newer than it;
+`manage.py build_vin_index` does that ahead of a deploy.
+"""
+import csv
+import datetime
+import functools
+import mmap
+import os
+import struct
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+from django.conf import settings
+
+VIN_LENGTH = 17
+CHECK_DIGIT_INDEX = 8
+WEIGHTS = (8, 7, 6, 5, 4, 3, 2, 10, 0, 9, 8, 7, 6, 5, 4, 3, 2)
+TRANSLITERATION = {
+    **{str(digit): digit for digit in range(10)},
+    'A': 1, 'B': 2, 'C': 3, 'D': 4, 'E': 5, 'F': 6, 'G': 7, 'H': 8,
+    'J': 1, 'K': 2, 'L': 3, 'M': 4, 'N': 5, 'P': 7, 'R': 9,
+    'S': 2, 'T': 3, 'U': 4, 'V': 5, 'W': 6, 'X': 7, 'Y': 8, 'Z': 9,
+}
+# Position 10 codes for 1980-2009; the cycle repeats every 30 years
+YEAR_CODES = 'ABCDEFGHJKLMNPRSTVWXY123456789'
+REGIONS = (
+    ('12345', 'North America'), ('67', 'Oceania'), ('89', 'South America'),
+    ('ABCDEFGH', 'Africa'), ('JKLMNPR', 'Asia'), ('STUVWXYZ', 'Europe'),
+)
+
+# Index file layout
+MAGIC = b'VINIDX1\0'
+HEADER = struct.Struct('<8sII')  # magic, record count, string count
+RECORD = struct.Struct('<8sHHHHH')  # key, make, model, engine (string ids), year from, year to
+OFFSET = struct.Struct('<I')
+KEY_LENGTH = 8  # WMI plus the five VDS characters before the check digit
+MIN_KEY_LENGTH = 3
+KEY_PAD = b'*'  # Sorts before every VIN character
+
+
+class VinError(ValueError):
+    """Raised for a string that cannot be a VIN."""
+
+
+def normalize_vin(vin: str) -> str:
+    """`vin` in upper case without surrounding whitespace; raises VinError if malformed."""
+    vin = (vin or '').strip().upper()
+    if len(vin) != VIN_LENGTH:
+        raise VinError(f"A VIN has {VIN_LENGTH} characters, not {len(vin)}.")
+    invalid = sorted(set(vin) - set(TRANSLITERATION))
+    if invalid:
+        raise VinError(f"Invalid VIN character(s): {''.join(invalid)} (I, O and Q are never used).")
+    return vin
+
+
+def check_digit(vin: str) -> str:
+    """The check digit (position 9) a normalized VIN should carry."""
+    remainder = sum(TRANSLITERATION[char] * weight for char, weight in zip(vin, WEIGHTS)) % 11
+    return 'X' if remainder == 10 else str(remainder)
+
+
+def check_digit_required(vin: str) -> bool:
+    """North American VINs must carry a valid check digit; elsewhere position 9 may be arbitrary."""
+    return vin[0] in REGIONS[0][0]
+
+
+def clean_vehicle_vin(vin: Optional[str]) -> Optional[str]:
+    """
+    The VIN to store for a vehicle: None when blank, trimmed and upper case
+    otherwise. Shorter values are chassis numbers from before the 1981
+    standard and are kept as entered; a 17-character VIN must be well formed
+    and, where one is mandatory, carry the right check digit (VinError).
+    """
+    vin = (vin or '').strip().upper()
+    if not vin:
+        return None
+    if len(vin) != VIN_LENGTH:
+        return vin
+    vin = normalize_vin(vin)
+    if check_digit_required(vin) and vin[CHECK_DIGIT_INDEX] != check_digit(vin):
+        raise VinError("VIN check digit does not match; please check for a typo.")
+    return vin
+
+
+def region(vin: str) -> str:
+    return next((name for chars, name in REGIONS if vin[0] in chars), '')
+
+
+def model_year(vin: str, year_from: int = 0, year_to: int = 0, today: Optional[datetime.date] = None) -> Optional[int]:
+    """
+    The model year from position 10. The code repeats every 30 years: North
+    American VINs tell the cycles apart with a letter in position 7 from
+    2010 on; otherwise the year is the one within the decoded model's
+    production years, or failing that the latest not after next year.
+    """
+    index = YEAR_CODES.find(vin[9])
+    if index < 0:
+        return None
+    candidates = [1980 + index + 30 * cycle for cycle in range(3)]
+    if check_digit_required(vin):
+        return candidates[1] if vin[6].isalpha() else candidates[0]
+    latest = (today or datetime.date.today()).year + 1
+    in_production = [year for year in candidates if year_from <= year <= (year_to or latest)]
+    if in_production:
+        return in_production[-1]
+    return max((year for year in candidates if year <= latest), default=None)
+
+
+@dataclass
+class VinDecoding:
+    vin: str
+    wmi: str
+    region: str
+    check_digit_valid: bool
+    make: str = ''
+    model: str = ''
+    engine: str = ''
+    year: Optional[int] = None
+
+    @property
+    def valid(self) -> bool:
+        """False for a VIN whose check digit is wrong where one is mandatory (usually a typo)."""
+        return self.check_digit_valid or not check_digit_required(self.vin)
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {**asdict(self), 'valid': self.valid}
+
+
+def _read_dataset(dataset_path: Path) -> Dict[bytes, Tuple[str, str, str, int, int]]:
+    """Dataset rows by padded key; VDS rows inherit blank fields from their WMI row."""
+    rows: Dict[bytes, Tuple[str, str, str, int, int]] = {}
+    with open(dataset_path, newline='', encoding='utf-8') as file:
+        for line, row in enumerate(csv.DictReader(file), start=2):
+            prefix = (row['wmi'] + row['vds']).strip().upper()
+            if not MIN_KEY_LENGTH <= len(prefix) <= KEY_LENGTH or set(prefix) - set(TRANSLITERATION):
+                raise ValueError(f"{dataset_path}:{line}: invalid WMI/VDS prefix {prefix!r}")
+            key = prefix.encode('ascii').ljust(KEY_LENGTH, KEY_PAD)
+            if key in rows:
+                raise ValueError(f"{dataset_path}:{line}: duplicate prefix {prefix!r}")
+            rows[key] = (row['make'].strip(), row['model'].strip(), row['engine'].strip(),
+                         int(row['year_from'] or 0), int(row['year_to'] or 0))
+    for key, (make, model, engine, year_from, year_to) in rows.items():
+        parent = rows.get(key[:MIN_KEY_LENGTH].ljust(KEY_LENGTH, KEY_PAD))
+        if parent is not None and not make:
+            rows[key] = (parent[0], model, engine, year_from, year_to)
+    return rows
+
+
+def build_index(dataset_path: Path, index_path: Path) -> int:
+    """Compiles the dataset into an index file, replaced atomically; returns the record count."""
+    rows = _read_dataset(dataset_path)
+    strings: List[str] = ['']
+    string_ids = {'': 0}
+
+    def string_id(value: str) -> int:
+        if value not in string_ids:
+            string_ids[value] = len(strings)
+            strings.append(value)
+        return string_ids[value]
+
+    records = [
+        RECORD.pack(key, string_id(make), string_id(model), string_id(engine), year_from, year_to)
+        for key, (make, model, engine, year_from, year_to) in sorted(rows.items())
+    ]
+    encoded = [value.encode('utf-8') for value in strings]
+    offsets, position = [], 0
+    for value in encoded:
+        offsets.append(OFFSET.pack(position))
+        position += len(value)
+    offsets.append(OFFSET.pack(position))
+
+    index_path = Path(index_path)
+    index_path.parent.mkdir(parents=True, exist_ok=True)
+    partial = index_path.with_name(f"{index_path.name}.{os.getpid()}.tmp")
+    with open(partial, 'wb') as file:
+        file.write(HEADER.pack(MAGIC, len(records), len(strings)))
+        file.writelines(records)
+        file.writelines(offsets)
+        file.writelines(encoded)
+    # Processes that already mapped the old file keep reading it undisturbed
+    os.replace(partial, index_path)
+    return len(records)
+
+
+class VinIndex:
+    """A memory-mapped index file written by `build_index`."""
+
+    def __init__(self, index_path: Path):
+        with open(index_path, 'rb') as file:
+            self._map = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, self.count, string_count = HEADER.unpack_from(self._map, 0)
+        if magic != MAGIC:
+            raise ValueError(f"{index_path} is not a VIN index.")
+        offsets_start = HEADER.size + self.count * RECORD.size
+        blob_start = offsets_start + (string_count + 1) * OFFSET.size
+        bounds = [blob_start + OFFSET.unpack_from(self._map, offsets_start + i * OFFSET.size)[0]
+                  for i in range(string_count + 1)]
+        # A few hundred names at most; decoded once instead of on every lookup
+        self._strings = [self._map[start:end].decode('utf-8') for start, end in zip(bounds, bounds[1:])]
+
+    def _key_at(self, position: int) -> bytes:
+        start = HEADER.size + position * RECORD.size
+        return self._map[start:start + KEY_LENGTH]
+
+    def _find(self, key: bytes) -> Optional[int]:
+        low, high = 0, self.count
+        while low < high:
+            middle = (low + high) // 2
+            if self._key_at(middle) < key:
+                low = middle + 1
+            else:
+                high = middle
+        return low if low < self.count and self._key_at(low) == key else None
+
+    def lookup(self, vin: str) -> Optional[Tuple[str, str, str, int, int]]:
+        """(make, model, engine, year from, year to) for the longest known prefix of `vin`."""
+        prefix = vin[:KEY_LENGTH].encode('ascii')
+        for length in range(KEY_LENGTH, MIN_KEY_LENGTH - 1, -1):
+            position = self._find(prefix[:length].ljust(KEY_LENGTH, KEY_PAD))
+            if position is not None:
+                _, make, model, engine, year_from, year_to = RECORD.unpack_from(
+                    self._map, HEADER.size + position * RECORD.size
+                )
+                return self._strings[make], self._strings[model], self._strings[engine], year_from, year_to
+        return None
+
+    def decode(self, vin: str) -> VinDecoding:
+        """Decodes `vin`; raises VinError if it is malformed. Unknown prefixes decode to blanks."""
+        vin = normalize_vin(vin)
+        decoding = VinDecoding(vin=vin, wmi=vin[:MIN_KEY_LENGTH], region=region(vin),
+                               check_digit_valid=vin[CHECK_DIGIT_INDEX] == check_digit(vin))
+        match = self.lookup(vin)
+        year_from = year_to = 0
+        if match is not None:
+            decoding.make, decoding.model, decoding.engine, year_from, year_to = match
+        decoding.year = model_year(vin, year_from, year_to)
+        return decoding
+
+
+@functools.lru_cache(maxsize=None)
+def _open_index(dataset_path: str, index_path: str) -> VinIndex:
+    index = Path(index_path)
+    if not index.exists() or index.stat().st_mtime < Path(dataset_path).stat().st_mtime:
+        build_index(Path(dataset_path), index)
+    return VinIndex(index)
+
+
+def get_vin_index() -> VinIndex:
+    """The process-wide index for VIN_DATASET_PATH, built or refreshed first if needed."""
+    return _open_index(str(settings.VIN_DATASET_PATH), str(settings.VIN_INDEX_PATH))
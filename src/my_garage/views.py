@@ -1,13 +1,28 @@
+from typing import Any, Dict
+
+from django.conf import settings
 from django.shortcuts import render, get_object_or_404, redirect
 from django.contrib.auth.decorators import login_required
 from django.contrib import messages
 from django.http import HttpRequest, HttpResponse
+from django.utils.functional import SimpleLazyObject
 
 # Import our custom Application Layer components
 from my_garage.models import Vehicle
-from .api.selectors import vehicle_get_build_summary, vehicle_list_wishlist_items
-from .api.services import service_record_create_from_ocr
-from .tasks import task_update_market_valuation
+from .api.selectors import vehicle_get_build_summary, vehicle_get_change_stamps, vehicle_list_wishlist_items
+from .api.services import (
+    service_record_create_from_ocr,
+    service_record_create_batch_from_ocr,
+    vehicle_enqueue_market_valuation,
+)
+
+
+def _fragment_context() -> Dict[str, Any]:
+    """Timeout and version for the {% cache %} fragments keyed on vehicle change stamps."""
+    return {
+        "fragment_timeout": settings.FRAGMENT_CACHE_TIMEOUT,
+        "fragment_version": settings.FRAGMENT_CACHE_VERSION,
+    }
 
 
 @login_required
@@ -21,13 +36,18 @@ def vehicle_list(request):
 def garage_dashboard(request: HttpRequest) -> HttpResponse:
     """
     Primary dashboard showing all vehicles in the user's garage.
+    Vehicle cards are cached fragments, versioned by change stamp.
     """
-    vehicles = request.user.vehicles.all()
+    vehicles = list(request.user.vehicles.all())
+    stamps = vehicle_get_change_stamps([v.pk for v in vehicles])
+    for vehicle in vehicles:
+        vehicle.change_stamp = stamps.get(vehicle.pk)
 
     # We could enhance this with a selector that summarizes the whole garage
     context = {
         "vehicles": vehicles,
         "total_garage_value": sum(v.current_market_value for v in vehicles),
+        **_fragment_context(),
     }
     return render(request, "my_garage/dashboard.html", context)
 
@@ -36,17 +56,22 @@ def garage_dashboard(request: HttpRequest) -> HttpResponse:
 def vehicle_detail(request: HttpRequest, vehicle_id: int) -> HttpResponse:
     """
     Detailed view for a single vehicle using our selector for complex data.
+    The financial summary and wishlist are cached fragments, versioned by
+    change stamp, so their queries only run when the cache misses.
     """
-    # Use our selector to get a complete financial/condition summary
-    summary = vehicle_get_build_summary(vehicle_id)
+    vehicle = get_object_or_404(Vehicle, pk=vehicle_id)
 
     # Check ownership
-    if summary['vehicle'].owner != request.user:
+    if vehicle.owner_id != request.user.pk:
         return HttpResponse("Unauthorized", status=401)
+    vehicle.change_stamp = vehicle_get_change_stamps([vehicle.pk]).get(vehicle.pk)
 
     context = {
-        **summary,
-        "wishlist": vehicle_list_wishlist_items(summary['vehicle']),
+        "vehicle": vehicle,
+        # Use our selector to get a complete financial/condition summary
+        "summary": SimpleLazyObject(lambda: vehicle_get_build_summary(vehicle.pk)),
+        "wishlist": vehicle_list_wishlist_items(vehicle),
+        **_fragment_context(),
     }
     return render(request, "my_garage/vehicle_detail.html", context)
 
@@ -58,10 +83,13 @@ def trigger_valuation_refresh(request: HttpRequest, vehicle_id: int) -> HttpResp
     """
     vehicle = get_object_or_404(Vehicle, pk=vehicle_id, owner=request.user)
 
-    # Trigger the background Celery task
-    task_update_market_valuation.delay(vehicle.id)
+    # Trigger the background Celery task unless one is already pending
+    _, created = vehicle_enqueue_market_valuation(vehicle.id)
 
-    messages.success(request, f"Valuation update for {vehicle} has been queued.")
+    if created:
+        messages.success(request, f"Valuation update for {vehicle} has been queued.")
+    else:
+        messages.info(request, f"Valuation update for {vehicle} is already in progress.")
     return redirect("my_garage:vehicle_detail", vehicle_id=vehicle.id)
 
 
@@ -72,11 +100,18 @@ def upload_service_receipt(request: HttpRequest, vehicle_id: int) -> HttpRespons
     """
     vehicle = get_object_or_404(Vehicle, pk=vehicle_id, owner=request.user)
 
-    if request.method == "POST" and request.FILES.get("receipt"):
+    receipts = request.FILES.getlist("receipt") if request.method == "POST" else []
+    if len(receipts) > 1:
+        # Several receipts share one batch OCR request
+        service_record_create_batch_from_ocr(vehicle=vehicle, receipt_images=receipts)
+        messages.info(request, f"{len(receipts)} receipts uploaded! AI is now extracting the details.")
+        return redirect("my_garage:vehicle_detail", vehicle_id=vehicle.id)
+
+    if receipts:
         # Use the service layer to create the record and start the pipeline
         record = service_record_create_from_ocr(
             vehicle=vehicle,
-            receipt_image=request.FILES["receipt"]
+            receipt_image=receipts[0]
         )
 
         # The service_record_create_from_ocr would trigger the Celery task internally